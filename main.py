@@ -1,11 +1,11 @@
-from src.app import app
+import multiprocessing
+import sys
 
+from src.server import main
 
-def main():
+if __name__ == '__main__':
+    # Lets a frozen build start the worker processes that check bulk imports
+    multiprocessing.freeze_support()
     print('Starting Alpha Strike Group Editor...')
     print('Navigate to http://localhost:5000 in your browser')
-    app.run(debug=True, host='0.0.0.0', port=5000)
-
-
-if __name__ == '__main__':
-    main()
+    sys.exit(main())
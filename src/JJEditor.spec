@@ -2,10 +2,10 @@
 
 
 a = Analysis(
-    ['app.py'],
-    pathex=[],
+    ['../main.py'],
+    pathex=['..'],
     binaries=[],
-    datas=[('templates', 'templates'), ('../data', 'data')],
+    datas=[('templates', 'src/templates'), ('../data', 'data'), ('../jeffimport.schema.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
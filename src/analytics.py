@@ -0,0 +1,157 @@
+import threading
+from array import array
+from collections import Counter, OrderedDict
+
+# Pilot skill that a member's basePoints is quoted at
+BASE_SKILL = 4
+
+RANGES = ('short', 'medium', 'long', 'extreme')
+
+# Numeric member fields loaded as columns, with the array type code they are stored as
+_COLUMNS = {'pv': 'q', 'skill': 'q', 'tonnage': 'd', 'armor': 'd', 'structure': 'd'}
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def adjusted_pv(pv, skill):
+    """Return the point value of a unit quoted at skill 4 when it is fielded at ``skill``.
+
+    Each skill level better than 4 adds 1 point plus 1 for every 5 points above 7;
+    each level worse takes away 1 point plus 1 for every 10 points above 14. A
+    unit is never worth less than 1 point.
+    """
+    if pv <= 0:
+        return pv
+    if skill < BASE_SKILL:
+        pv += (BASE_SKILL - skill) * (1 + max(0, (pv - 3) // 5))
+    elif skill > BASE_SKILL:
+        pv -= (skill - BASE_SKILL) * (1 + max(0, (pv - 5) // 10))
+    return max(pv, 1)
+
+
+class MemberColumns:
+    """A group's members held column by column in typed arrays, ready for aggregation.
+
+    Every numeric field is one ``array`` (``pv``, ``skill``, ``tonnage``,
+    ``armor``, ``structure`` and ``damage[range]``); ``roles`` and ``sizes`` are
+    plain lists. Missing or malformed values count as 0. A member's skill is its
+    ``currentSkill``, falling back to the pilot's gunnery.
+    """
+
+    __slots__ = ('count', 'pv', 'skill', 'tonnage', 'armor', 'structure', 'damage', 'roles', 'sizes')
+
+    def __init__(self, members):
+        self.count = len(members)
+        for name, code in _COLUMNS.items():
+            setattr(self, name, array(code))
+        self.damage = {name: array('d') for name in RANGES}
+        self.roles = []
+        self.sizes = []
+        for member in members:
+            pilot = member.get('pilot') or {}
+            damage = member.get('damage') or {}
+            skill = member.get('currentSkill')
+            if skill is None:
+                skill = pilot.get('gunnery', BASE_SKILL)
+            self.pv.append(int(_number(member.get('basePoints'))))
+            self.skill.append(int(_number(skill)))
+            self.tonnage.append(_number(member.get('tonnage')))
+            self.armor.append(_number(member.get('armor')))
+            self.structure.append(_number(member.get('structure')))
+            for name in RANGES:
+                self.damage[name].append(_number(damage.get(name)))
+            self.roles.append(member.get('role') or 'None')
+            self.sizes.append(int(_number(member.get('size'))))
+
+    def summary(self):
+        """Return the group's totals and breakdowns as a JSON-ready dict."""
+        adjusted = sum(map(adjusted_pv, self.pv, self.skill))
+        return {
+            'members': self.count,
+            'pv': sum(self.pv),
+            'adjustedPv': adjusted,
+            'averageSkill': round(sum(self.skill) / self.count, 2) if self.count else None,
+            'tonnage': _tidy(sum(self.tonnage)),
+            'armor': _tidy(sum(self.armor)),
+            'structure': _tidy(sum(self.structure)),
+            'damage': {name: _tidy(sum(column)) for name, column in self.damage.items()},
+            'roles': dict(Counter(self.roles).most_common()),
+            'sizes': {str(size): count for size, count in sorted(Counter(self.sizes).items())},
+        }
+
+
+def _tidy(number):
+    return int(number) if float(number).is_integer() else round(number, 2)
+
+
+def combine(summaries):
+    """Add up group summaries into one for the whole force."""
+    total = {
+        'members': 0,
+        'pv': 0,
+        'adjustedPv': 0,
+        'tonnage': 0,
+        'armor': 0,
+        'structure': 0,
+        'damage': dict.fromkeys(RANGES, 0),
+    }
+    roles = Counter()
+    sizes = Counter()
+    skill_sum = 0
+    for summary in summaries:
+        for key in ('members', 'pv', 'adjustedPv', 'tonnage', 'armor', 'structure'):
+            total[key] += summary[key]
+        for name in RANGES:
+            total['damage'][name] += summary['damage'][name]
+        if summary['members']:
+            skill_sum += summary['averageSkill'] * summary['members']
+        roles.update(summary['roles'])
+        sizes.update(summary['sizes'])
+    total['averageSkill'] = round(skill_sum / total['members'], 2) if total['members'] else None
+    for key in ('tonnage', 'armor', 'structure'):
+        total[key] = _tidy(total[key])
+    total['damage'] = {name: _tidy(value) for name, value in total['damage'].items()}
+    total['roles'] = dict(roles.most_common())
+    total['sizes'] = {size: sizes[size] for size in sorted(sizes, key=int)}
+    return total
+
+
+class ForceAnalytics:
+    """Summaries of the groups in a :class:`GroupRepository`, cached by file version.
+
+    A summary is recomputed only when the group's ETag changes, so showing it on
+    every view of a large group does not walk all its members each time. Across
+    many groups, :meth:`GroupCatalog.summaries` reads them from the catalog instead.
+    """
+
+    def __init__(self, repository, max_entries=256):
+        self.repository = repository
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summary(self, filename):
+        """Return the summary of the group in ``filename``."""
+        etag = self.repository.version(filename)[0]
+        with self._lock:
+            cached = self._cache.get(filename)
+            if cached is not None and cached[0] == etag:
+                self._cache.move_to_end(filename)
+                return cached[1]
+
+        summary = MemberColumns(self.repository.load(filename).members).summary()
+        with self._lock:
+            self._cache[filename] = (etag, summary)
+            self._cache.move_to_end(filename)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return summary
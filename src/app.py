@@ -1,25 +1,335 @@
-import copy
-import json
+import atexit
+import functools
+import hashlib
+import io
 import os
 import uuid as uuid_lib
 from datetime import datetime
 from pathlib import Path
 
-from flask import Flask, flash, redirect, render_template, request, send_file, url_for
+from flask import Flask, flash, jsonify, make_response, redirect, render_template, request, send_file, session, url_for
+
+from src import codec
+from src.analytics import ForceAnalytics, combine
+from src.batch import apply_batch
+from src.bulk import BulkImport, export_zip
+from src.catalog import SORT_COLUMNS, GroupCatalog
+from src.conditional import add_validators, not_modified, precondition_failed
+from src.config import load_config, load_secret_key
+from src.forms import MemberForm
+from src.history import OP_LABELS, GroupHistory, HistoryError, describe
+from src.metrics import RequestMetrics, registry, span
+from src.patching import JSON_PATCH, MERGE_PATCH, PatchError, PatchTestFailed, apply_patch
+from src.repository import GroupRepository
+from src.roster import SORT_KEYS, member_summary, query_members
+from src.search import SearchError, SearchIndex, group_counts
+from src.uploads import UploadTooLarge, save_stream, validate_group_file
+from src.validation import GroupValidator, format_error
+from src.watcher import ChangeFeed, FolderWatcher
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
+# Signs sessions and flash messages; if not configured, a random key is kept in the data folder
+app.config['SECRET_KEY'] = None
 app.config['UPLOAD_FOLDER'] = 'data'
+# Approximate memory budget for parsed groups, measured in uncompressed JSON bytes
+app.config['GROUP_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+# Member edits to the same group within this many seconds are written out together
+app.config['WRITE_BEHIND_DELAY'] = 0.5
+# How group files are written: 'pretty' (as Jeff's tools export), 'minified', 'gzip' or 'zstd'; all are readable
+app.config['STORAGE_FORMAT'] = 'pretty'
+app.config['INDEX_PAGE_SIZE'] = 50
+# Member cards per page on the edit page; further pages are loaded as the list is scrolled
+app.config['MEMBER_PAGE_SIZE'] = 24
+# Largest page the member summary API returns
+app.config['MEMBER_API_MAX_PAGE_SIZE'] = 500
+# Members offered by the duplicate picker before the user searches
+app.config['DUPLICATE_PICKER_SIZE'] = 50
+# Minimum seconds between full scans of the data folder for changes made outside the app
+app.config['CATALOG_REFRESH_INTERVAL'] = 2.0
+# Uploads are streamed to disk and rejected once they exceed this size
+app.config['MAX_UPLOAD_BYTES'] = 32 * 1024 * 1024
+# Schema checking of an upload stops after this many errors
+app.config['UPLOAD_MAX_ERRORS'] = 50
+# Zip and multi-file imports are refused once the request, or the files unpacked from it, exceed this size
+app.config['MAX_IMPORT_BYTES'] = 512 * 1024 * 1024
+# Most group files taken from one import
+app.config['MAX_IMPORT_FILES'] = 5000
+# Workers that validate and convert imported files; 0 starts one per CPU
+app.config['IMPORT_WORKERS'] = 0
+# 'process' checks imported files in worker processes, 'thread' in threads of the server process
+app.config['IMPORT_POOL'] = 'process'
+# Keep a journal of every change to each group, for undo, redo, restoring old versions and the trash
+app.config['HISTORY_ENABLED'] = True
+# Every this many history entries, the whole group is stored rather than just the change
+app.config['HISTORY_SNAPSHOT_INTERVAL'] = 50
+# History entries kept per group; older ones are folded together
+app.config['HISTORY_MAX_ENTRIES'] = 200
+# Days that history, and deleted groups in the trash, are kept; 0 keeps them for good
+app.config['HISTORY_RETENTION_DAYS'] = 30
+# Watch the data folder, so changes made outside the app reach the caches and open pages straight away
+app.config['WATCH_FOLDER'] = True
+# 'auto' uses watchdog when it is installed and otherwise polls; 'watchdog' or 'poll' choose one
+app.config['WATCH_BACKEND'] = 'auto'
+# Seconds between scans of the data folder when polling
+app.config['WATCH_INTERVAL'] = 1.0
+# Open edit pages told about changes at once; each holds a request thread, later pages retry after 30 seconds
+app.config['LIVE_UPDATE_CLIENTS'] = 4
+# Seconds a page's update stream stays open before the browser reconnects
+app.config['LIVE_UPDATE_STREAM_SECONDS'] = 300
+# Maximum number of members listed for a cross-group search
+app.config['SEARCH_RESULT_LIMIT'] = 200
+# When enabled, adding ?profile=1 to a URL returns a profile of that request
+app.config['PROFILE_REQUESTS'] = False
+# 'auto' uses pyinstrument if it is installed, 'cprofile' always uses cProfile
+app.config['PROFILER'] = 'auto'
+# Requests slower than this are logged with a breakdown of where the time went
+app.config['SLOW_REQUEST_SECONDS'] = 1.0
+
+# The JJEDITOR_CONFIG file and JJEDITOR_* environment variables override the defaults above
+load_config(app.config)
+
+# Sidecar database holding per-file summaries for the index page
+app.config.setdefault('CATALOG_PATH', os.path.join(app.config['UPLOAD_FOLDER'], '.catalog.sqlite3'))
+# Leave room for the multipart framing around the file itself
+if app.config['MAX_CONTENT_LENGTH'] is None:
+    app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_UPLOAD_BYTES'] + 1024 * 1024
 
 # Ensure data folder exists
 Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
 
+if not app.config['SECRET_KEY']:
+    app.config['SECRET_KEY'] = load_secret_key(os.path.join(app.config['UPLOAD_FOLDER'], '.secret_key'))
+
+repository = GroupRepository(
+    app.config['UPLOAD_FOLDER'],
+    max_bytes=app.config['GROUP_CACHE_MAX_BYTES'],
+    write_delay=app.config['WRITE_BEHIND_DELAY'],
+    storage_format=app.config['STORAGE_FORMAT'],
+)
+atexit.register(repository.close)
+
+catalog = GroupCatalog(
+    app.config['UPLOAD_FOLDER'],
+    app.config['CATALOG_PATH'],
+    refresh_interval=app.config['CATALOG_REFRESH_INTERVAL'],
+)
+repository.add_listener(catalog.update)
+
+search_index = SearchIndex(app.config['UPLOAD_FOLDER'], refresh_interval=app.config['CATALOG_REFRESH_INTERVAL'])
+repository.add_listener(search_index.update)
+
+analytics = ForceAnalytics(repository)
+
+history = GroupHistory(
+    app.config['UPLOAD_FOLDER'],
+    snapshot_interval=app.config['HISTORY_SNAPSHOT_INTERVAL'],
+    max_entries=app.config['HISTORY_MAX_ENTRIES'],
+    retention_days=app.config['HISTORY_RETENTION_DAYS'],
+    enabled=app.config['HISTORY_ENABLED'],
+)
+repository.add_listener(history.baseline, before=True)
+repository.add_listener(history.record)
+
+live_updates = ChangeFeed(
+    max_subscribers=app.config['LIVE_UPDATE_CLIENTS'], stream_seconds=app.config['LIVE_UPDATE_STREAM_SECONDS']
+)
+
+
+def file_changed(filename):
+    """Bring the caches and indexes in line with ``filename`` after the watcher saw it change, and tell open pages."""
+    with repository.lock(filename):
+        repository.refresh(filename)
+        try:
+            st = os.stat(repository.path(filename))
+        except FileNotFoundError:
+            st = None
+        exists = st is not None
+        # Writes made by this process reached the indexes through the repository listeners already
+        stale = [index for index in (catalog, search_index) if not exists or not index.is_current(filename, st)]
+        if stale and not exists:
+            catalog.remove(filename)
+            search_index.remove(filename)
+        elif stale:
+            try:
+                # Parse the file once for every index; the stat came first so a change while reading is seen again
+                content = codec.load_file(repository.path(filename))
+            except (OSError, ValueError):
+                for index in stale:
+                    index.refresh_file(filename)
+            else:
+                for index in stale:
+                    index.update(filename, content, st)
+                with history.label(filename, 'external'):
+                    history.record(filename, content)
+        if live_updates.subscribers:
+            event = {'file': filename, 'exists': exists}
+            if exists:
+                event['etags'] = repository.etags(filename)
+            live_updates.publish(filename, event)
+
+
+watcher = FolderWatcher(
+    app.config['UPLOAD_FOLDER'],
+    file_changed,
+    interval=app.config['WATCH_INTERVAL'],
+    backend=app.config['WATCH_BACKEND'],
+)
+if app.config['WATCH_FOLDER']:
+    watcher.start()
+    atexit.register(watcher.stop)
+    # Only a watcher that sees changes as they happen can stand in for the cache's own checks
+    repository.watched = watcher.live
+    catalog.watched = search_index.watched = True
+
+group_validator = GroupValidator.from_file()
+member_form = MemberForm.from_group_schema(group_validator.schema)
+
+request_metrics = RequestMetrics(app)
+
+
+def cache_metrics():
+    stats = repository.stats()
+    return [
+        ('group_cache_hits_total', 'counter', 'Group loads served from the cache.', stats['hits']),
+        ('group_cache_misses_total', 'counter', 'Group loads that parsed the file.', stats['misses']),
+        ('group_cache_entries', 'gauge', 'Groups held in the cache.', stats['entries']),
+        ('group_cache_bytes', 'gauge', 'On-disk size of the cached groups.', stats['bytes']),
+    ]
+
+
+registry.collectors.append(cache_metrics)
+
+
+def template_version():
+    """Return a short hash of the template sources, so cached pages are not reused after they change."""
+    digest = hashlib.blake2b(digest_size=4)
+    for name in sorted(app.jinja_env.list_templates()):
+        digest.update(app.jinja_loader.get_source(app.jinja_env, name)[0].encode('utf-8'))
+    return digest.hexdigest()
+
+
+TEMPLATE_VERSION = template_version()
+
+
+def locks_group(view):
+    """Serialize non-GET requests for the same group file so concurrent edits are not lost.
+
+    A request made against an older version of the group (its If-Match header or
+    ``etag`` form field names another ETag) is refused before the view runs.
+    Successful API responses carry the group's new ETag.
+    """
+
+    @functools.wraps(view)
+    def wrapper(filename, *args, **kwargs):
+        if request.method == 'GET':
+            return view(filename, *args, **kwargs)
+        with repository.lock(filename):
+            # Another process may have written the file since the watcher last reported it
+            repository.refresh(filename)
+            try:
+                etags = repository.etags(filename) if repository.exists(filename) else None
+            except ValueError:
+                # A file that is not valid JSON has no version to compare; the view reports the problem
+                etags = None
+            if etags is not None and precondition_failed(*etags):
+                return edit_conflict(filename)
+            response = view(filename, *args, **kwargs)
+            if request.path.startswith('/api/'):
+                response = make_response(response)
+                if response.status_code < 300 and repository.exists(filename):
+                    response.set_etag(repository.version(filename)[0])
+            return response
+
+    return wrapper
+
+
+def edit_conflict(filename):
+    """Refuse a change made to an out-of-date copy of ``filename``."""
+    message = f'"{filename}" was changed by someone else after you opened it'
+    if request.path.startswith('/api/'):
+        return jsonify(error=message, etag=repository.version(filename)[0]), 412
+
+    flash(f'{message}. Your changes were not saved; check the current version and try again.', 'warning')
+    if 'GET' in request.url_rule.methods:
+        return redirect(request.full_path)
+    return redirect(url_for('edit_group', filename=filename))
+
 
 @app.route('/')
 def index():
-    """List all JSON files in the data folder."""
-    json_files = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.endswith('.json')]
-    return render_template('index.html', files=json_files)
+    """List the JSON files in the data folder with their group summaries."""
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'filename')
+    if sort not in SORT_COLUMNS:
+        sort = 'filename'
+    descending = request.args.get('order') == 'desc'
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = app.config['INDEX_PAGE_SIZE']
+
+    catalog.refresh()
+    groups, total = catalog.query(search, sort=sort, descending=descending, page=page, per_page=per_page)
+
+    return render_template(
+        'index.html',
+        groups=groups,
+        total=total,
+        search=search,
+        sort=sort,
+        descending=descending,
+        page=page,
+        pages=max((total + per_page - 1) // per_page, 1),
+    )
+
+
+def run_search(query):
+    """Search members across all groups. Returns ``(results, total)``; raises SearchError for a bad query."""
+    search_index.refresh()
+    results, total = search_index.search(query, limit=app.config['SEARCH_RESULT_LIMIT'])
+    for result in results:
+        result['url'] = url_for('edit_member', filename=result['filename'], member_uuid=result['uuid'])
+    return results, total
+
+
+@app.route('/search')
+def search_members():
+    """Search members across every group file."""
+    query = request.args.get('q', '').strip()
+    results, total = [], 0
+    if query:
+        try:
+            results, total = run_search(query)
+        except SearchError as e:
+            flash(f'Invalid search: {e}', 'danger')
+
+    return render_template(
+        'search.html',
+        query=query,
+        results=results,
+        total=total,
+        groups=group_counts(results),
+        limit=app.config['SEARCH_RESULT_LIMIT'],
+    )
+
+
+@app.route('/api/search')
+def api_search():
+    """Search members across every group file, as JSON."""
+    query = request.args.get('q', '').strip()
+    try:
+        results, total = run_search(query)
+    except SearchError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(query=query, total=total, results=results)
+
+
+@app.route('/events')
+def live_update_stream():
+    """Stream changes to the group named by ``file``, or to every group, as Server-Sent Events."""
+    response = app.response_class(live_updates.stream(request.args.get('file') or None), mimetype='text/event-stream')
+    response.cache_control.no_store = True
+    # Stop nginx and similar proxies from holding the events back
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @app.route('/new', methods=['GET', 'POST'])
@@ -39,9 +349,7 @@ def new_group():
         if not filename.endswith('.json'):
             filename += '.json'
 
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        with open(filepath, 'w') as f:
-            json.dump(group_data, f, indent=2)
+        repository.save(filename, group_data)
 
         flash(f'Group "{group_data["name"]}" created successfully!', 'success')
         return redirect(url_for('edit_group', filename=filename))
@@ -50,6 +358,7 @@ def new_group():
 
 
 @app.route('/edit/<filename>', methods=['GET', 'POST'])
+@locks_group
 def edit_group(filename):
     """Edit an existing group."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -61,29 +370,155 @@ def edit_group(filename):
     if request.method == 'POST':
         try:
             # Update group metadata
-            with open(filepath, 'r') as f:
-                group_data = json.load(f)
+            group_data = repository.load(filename)
 
             group_data['name'] = request.form.get('name', group_data.get('name'))
             group_data['formationBonus'] = request.form.get('formationBonus', '')
             group_data['groupLabel'] = request.form.get('groupLabel', '')
             group_data['lastUpdated'] = datetime.now().isoformat()
 
-            with open(filepath, 'w') as f:
-                json.dump(group_data, f, indent=2)
+            repository.save(filename, group_data, defer=True)
 
             flash('Group updated successfully!', 'success')
             return redirect(url_for('edit_group', filename=filename))
         except Exception as e:
             flash(f'Error updating group: {str(e)}', 'danger')
 
-    with open(filepath, 'r') as f:
-        group_data = json.load(f)
+    group_data = repository.load(filename)
+    etag, modified = repository.version(filename)
+    page_etag = f'{etag}-{TEMPLATE_VERSION}'
+    # Pending flash messages are part of the page, so it can only be reused without them
+    if '_flashes' not in session and not_modified(page_etag, modified):
+        return add_validators(app.response_class(status=304), page_etag, modified)
+
+    query, sort, descending, page = member_query()
+    per_page = app.config['MEMBER_PAGE_SIZE']
+    members, total = query_members(group_data.members, query, sort, descending, page, per_page)
+    response = make_response(
+        render_template(
+            'edit_group.html',
+            group=group_data,
+            filename=filename,
+            etag=etag,
+            members=members,
+            total=total,
+            query=query,
+            sort=sort,
+            descending=descending,
+            page=page,
+            pages=max((total + per_page - 1) // per_page, 1),
+            next_url=next_page_url('member_cards', filename, page, total, per_page),
+            force=analytics.summary(filename),
+            show_members=any(key in request.args for key in ('q', 'sort', 'order', 'page')),
+        )
+    )
+    return add_validators(response, page_etag, modified)
+
+
+def member_query():
+    """Return the member list ``(query, sort, descending, page)`` from the query string."""
+    query = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'position')
+    if sort not in SORT_KEYS:
+        sort = 'position'
+    descending = request.args.get('order') == 'desc'
+    page = max(request.args.get('page', 1, type=int), 1)
+    return query, sort, descending, page
+
+
+def next_page_url(endpoint, filename, page, total, per_page):
+    """Return the URL of the next page of members for ``endpoint``, or None on the last page."""
+    if page * per_page >= total:
+        return None
+    args = {key: value for key, value in request.args.items() if key not in ('page', 'filename')}
+    return url_for(endpoint, filename=filename, **args, page=page + 1)
+
+
+@app.route('/edit/<filename>/members')
+def member_cards(filename):
+    """Return one page of the edit page's member cards as an HTML fragment, for loading more as the list scrolls."""
+    if not repository.exists(filename):
+        return 'Not found', 404
+
+    group_data = repository.load(filename)
+    etag, modified = repository.version(filename)
+    page_etag = f'{etag}-{TEMPLATE_VERSION}'
+    if not_modified(page_etag, modified):
+        return add_validators(app.response_class(status=304), page_etag, modified)
+
+    query, sort, descending, page = member_query()
+    per_page = app.config['MEMBER_PAGE_SIZE']
+    members, total = query_members(group_data.members, query, sort, descending, page, per_page)
+    response = make_response(render_template('_member_cards.html', members=members, filename=filename))
+    next_url = next_page_url('member_cards', filename, page, total, per_page)
+    if next_url:
+        response.headers['X-Next-Page'] = next_url
+    return add_validators(response, page_etag, modified)
+
+
+@app.route('/api/groups/<filename>/members')
+def api_members(filename):
+    """Return member summaries (name, class, variant, pilot skills, PV), filtered, sorted and paged, as JSON."""
+    if not repository.exists(filename):
+        return jsonify(error=f'File "{filename}" not found'), 404
+
+    group_data = repository.load(filename)
+    etag, modified = repository.version(filename)
+    if not_modified(etag, modified):
+        return add_validators(app.response_class(status=304), etag, modified)
+
+    query, sort, descending, page = member_query()
+    per_page = request.args.get('per_page', app.config['MEMBER_PAGE_SIZE'], type=int)
+    per_page = min(max(per_page, 1), app.config['MEMBER_API_MAX_PAGE_SIZE'])
+    members, total = query_members(group_data.members, query, sort, descending, page, per_page)
+    response = jsonify(
+        filename=filename,
+        total=total,
+        page=page,
+        per_page=per_page,
+        pages=max((total + per_page - 1) // per_page, 1),
+        members=[member_summary(member) | {'position': position} for position, member in members],
+    )
+    return add_validators(response, etag, modified)
+
+
+@app.route('/api/groups/<filename>/analytics')
+def api_group_analytics(filename):
+    """Return the group's PV (base and adjusted for pilot skill), tonnage, damage, armor and role/size breakdowns."""
+    if not repository.exists(filename):
+        return jsonify(error=f'File "{filename}" not found'), 404
+
+    etag, modified = repository.version(filename)
+    if not_modified(etag, modified):
+        return add_validators(app.response_class(status=304), etag, modified)
+    return add_validators(jsonify(filename=filename, **analytics.summary(filename)), etag, modified)
 
-    return render_template('edit_group.html', group=group_data, filename=filename)
+
+def compared_groups():
+    """Return the catalog summaries of the groups named by ``file`` arguments, or of all groups."""
+    # Deferred saves reach the catalog when they are written
+    repository.flush()
+    catalog.refresh()
+    filenames = request.args.getlist('file')
+    return catalog.summaries(filenames or None)
+
+
+@app.route('/analytics')
+def compare_groups():
+    """Compare the force totals of several groups side by side."""
+    groups = compared_groups()
+    return render_template('analytics.html', groups=groups, total=combine(groups))
+
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Return the force summary of each group named by ``file`` arguments (or of all groups) and their total."""
+    groups = compared_groups()
+    return jsonify(groups=groups, total=combine(groups))
 
 
 @app.route('/member/<filename>/new', methods=['GET', 'POST'])
+@locks_group
 def new_member(filename):
     """Add a new member to a group."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -94,151 +529,58 @@ def new_member(filename):
 
     if request.method == 'POST':
         try:
-            with open(filepath, 'r') as f:
-                group_data = json.load(f)
+            group_data = repository.load(filename)
 
             # Quick path: duplicate an existing member immediately
             duplicate_uuid = request.form.get('duplicate_uuid')
             if duplicate_uuid:
-                src = next((m for m in group_data.get('members', []) if m.get('uuid') == duplicate_uuid), None)
-                if not src:
+                # Copies get a new UUID and are marked as copy to distinguish them in the list
+                if group_data.duplicate(duplicate_uuid) is None:
                     flash('Selected member to duplicate was not found.', 'danger')
                     return redirect(url_for('new_member', filename=filename))
 
-                new_member_obj = copy.deepcopy(src)
-                new_member_obj['uuid'] = str(uuid_lib.uuid4())
-                # Optionally mark as copy to distinguish in list
-                if new_member_obj.get('name'):
-                    new_member_obj['name'] = f'{new_member_obj["name"]} (Copy)'
-
-                group_data['members'].append(new_member_obj)
                 group_data['lastUpdated'] = datetime.now().isoformat()
 
-                with open(filepath, 'w') as wf:
-                    json.dump(group_data, wf, indent=2)
+                repository.save(filename, group_data, defer=True)
 
                 flash('Member duplicated and added successfully!', 'success')
                 return redirect(url_for('edit_group', filename=filename))
 
-            member = {
-                'uuid': str(uuid_lib.uuid4()),
-                'class': request.form.get('class', ''),
-                'variant': request.form.get('variant', ''),
-                'name': request.form.get('name', ''),
-                'customName': request.form.get('customName', ''),
-                'classification': request.form.get('classification', ''),
-                'dateIntroduced': request.form.get('dateIntroduced', ''),
-                'tmm': float(request.form.get('tmm', 0) or 0),
-                'tonnage': float(request.form.get('tonnage', 0) or 0),
-                'tro': request.form.get('tro', ''),
-                'role': request.form.get('role', ''),
-                'threshold': int(request.form.get('threshold', 0) or 0),
-                'costCR': float(request.form.get('costCR', 0) or 0),
-                'mulID': int(request.form.get('mulID', 0) or 0),
-                'basePoints': int(request.form.get('basePoints', 0) or 0),
-                'currentSkill': int(request.form.get('currentSkill', 4) or 4),
-                'overheat': int(request.form.get('overheat', 0) or 0),
-                'structure': int(request.form.get('structure', 0) or 0),
-                'armor': int(request.form.get('armor', 0) or 0),
-                'type': request.form.get('type', ''),
-                'size': int(request.form.get('size', 1) or 1),
-                'showDetails': request.form.get('showDetails') == 'on',
-                'imageURL': request.form.get('imageURL', ''),
-                'currentHeat': int(request.form.get('currentHeat', 0) or 0),
-                'roundHeat': int(request.form.get('roundHeat', 0) or 0),
-                'abilities': [a.strip() for a in request.form.get('abilities', '').split(',') if a.strip()],
-                'jumpMove': int(request.form.get('jumpMove', 0) or 0),
-                'move': [
-                    {
-                        'move': int(request.form.get('move_value', 0) or 0),
-                        'currentMove': int(request.form.get('move_current', 0) or 0),
-                        'type': request.form.get('move_type', 'Walk'),
-                    }
-                ]
-                if request.form.get('move_value')
-                else [],
-                'damage': {
-                    'short': int(request.form.get('damage_short', 0) or 0),
-                    'medium': int(request.form.get('damage_medium', 0) or 0),
-                    'long': int(request.form.get('damage_long', 0) or 0),
-                    'extreme': int(request.form.get('damage_extreme', 0) or 0),
-                },
-                'pilot': {
-                    'name': request.form.get('pilot_name', ''),
-                    'piloting': int(request.form.get('pilot_piloting', 4) or 4),
-                    'gunnery': int(request.form.get('pilot_gunnery', 4) or 4),
-                    'wounds': int(request.form.get('pilot_wounds', 0) or 0),
-                },
-            }
-
-            group_data['members'].append(member)
+            data, errors = member_form.parse(request.form)
+            if errors:
+                flash('Please correct the highlighted fields.', 'danger')
+                return render_new_member(filename, group_data, member_form.values(form=request.form), errors), 422
+
+            member = group_data.add({'uuid': str(uuid_lib.uuid4())} | data)
             group_data['lastUpdated'] = datetime.now().isoformat()
 
-            with open(filepath, 'w') as f:
-                json.dump(group_data, f, indent=2)
+            repository.save(filename, group_data, defer=True)
 
             flash(f'Member "{member["name"]}" added successfully!', 'success')
             return redirect(url_for('edit_group', filename=filename))
         except Exception as e:
             flash(f'Error adding member: {str(e)}', 'danger')
     # GET: load group members and optional duplicate prefill
-    with open(filepath, 'r') as f:
-        group_data = json.load(f)
-
-    prefill = {}
+    group_data = repository.load(filename)
     dup_uuid = request.args.get('duplicate')
-    if dup_uuid:
-        src = next((m for m in group_data.get('members', []) if m.get('uuid') == dup_uuid), None)
-        if src:
-            # Build prefill mapping for the form fields
-            move0 = (src.get('move') or [{}])[0]
-            prefill = {
-                'class': src.get('class', ''),
-                'variant': src.get('variant', ''),
-                'name': src.get('name', ''),
-                'customName': src.get('customName', ''),
-                'classification': src.get('classification', ''),
-                'type': src.get('type', ''),
-                'role': src.get('role', ''),
-                'tonnage': src.get('tonnage', 0),
-                'tmm': src.get('tmm', 0),
-                'armor': src.get('armor', 0),
-                'structure': src.get('structure', 0),
-                'size': src.get('size', 1),
-                'threshold': src.get('threshold', 0),
-                'basePoints': src.get('basePoints', 0),
-                'costCR': src.get('costCR', 0),
-                'currentSkill': src.get('currentSkill', 4),
-                'currentHeat': src.get('currentHeat', 0),
-                'overheat': src.get('overheat', 0),
-                'damage_short': (src.get('damage') or {}).get('short', 0),
-                'damage_medium': (src.get('damage') or {}).get('medium', 0),
-                'damage_long': (src.get('damage') or {}).get('long', 0),
-                'damage_extreme': (src.get('damage') or {}).get('extreme', 0),
-                'pilot_name': (src.get('pilot') or {}).get('name', ''),
-                'pilot_gunnery': (src.get('pilot') or {}).get('gunnery', 4),
-                'pilot_piloting': (src.get('pilot') or {}).get('piloting', 4),
-                'pilot_wounds': (src.get('pilot') or {}).get('wounds', 0),
-                'dateIntroduced': src.get('dateIntroduced', ''),
-                'tro': src.get('tro', ''),
-                'mulID': src.get('mulID', 0),
-                'imageURL': src.get('imageURL', ''),
-                'abilities': ', '.join(src.get('abilities', [])),
-                'move_value': move0.get('move', 0),
-                'move_current': move0.get('currentMove', 0),
-                'move_type': move0.get('type', 'Walk'),
-                'jumpMove': src.get('jumpMove', 0),
-            }
+    return render_new_member(filename, group_data, member_form.values(group_data.find(dup_uuid) if dup_uuid else None))
+
 
+def render_new_member(filename, group_data, values, errors=None):
+    # The picker starts with the first members; the rest are found by searching the member API
+    picker, member_total = query_members(group_data.members, per_page=app.config['DUPLICATE_PICKER_SIZE'])
     return render_template(
         'new_member.html',
         filename=filename,
-        members=group_data.get('members', []),
-        prefill=prefill,
+        members=[member for _, member in picker],
+        member_total=member_total,
+        values=values,
+        errors=errors or {},
     )
 
 
 @app.route('/member/<filename>/edit/<member_uuid>', methods=['GET', 'POST'])
+@locks_group
 def edit_member(filename, member_uuid):
     """Edit an existing member."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -247,78 +589,47 @@ def edit_member(filename, member_uuid):
         flash(f'File "{filename}" not found!', 'danger')
         return redirect(url_for('index'))
 
-    with open(filepath, 'r') as f:
-        group_data = json.load(f)
+    group_data = repository.load(filename)
 
-    member = next((m for m in group_data['members'] if m['uuid'] == member_uuid), None)
+    member = group_data.find(member_uuid)
     if not member:
         flash('Member not found!', 'danger')
         return redirect(url_for('edit_group', filename=filename))
 
     if request.method == 'POST':
         try:
-            member['class'] = request.form.get('class', '')
-            member['variant'] = request.form.get('variant', '')
-            member['name'] = request.form.get('name', '')
-            member['customName'] = request.form.get('customName', '')
-            member['classification'] = request.form.get('classification', '')
-            member['dateIntroduced'] = request.form.get('dateIntroduced', '')
-            member['tmm'] = float(request.form.get('tmm', 0) or 0)
-            member['tonnage'] = float(request.form.get('tonnage', 0) or 0)
-            member['tro'] = request.form.get('tro', '')
-            member['role'] = request.form.get('role', '')
-            member['threshold'] = int(request.form.get('threshold', 0) or 0)
-            member['costCR'] = float(request.form.get('costCR', 0) or 0)
-            member['mulID'] = int(request.form.get('mulID', 0) or 0)
-            member['basePoints'] = int(request.form.get('basePoints', 0) or 0)
-            member['currentSkill'] = int(request.form.get('currentSkill', 4) or 4)
-            member['overheat'] = int(request.form.get('overheat', 0) or 0)
-            member['structure'] = int(request.form.get('structure', 0) or 0)
-            member['armor'] = int(request.form.get('armor', 0) or 0)
-            member['type'] = request.form.get('type', '')
-            member['size'] = int(request.form.get('size', 1) or 1)
-            member['showDetails'] = request.form.get('showDetails') == 'on'
-            member['imageURL'] = request.form.get('imageURL', '')
-            member['currentHeat'] = int(request.form.get('currentHeat', 0) or 0)
-            member['roundHeat'] = int(request.form.get('roundHeat', 0) or 0)
-            member['abilities'] = [a.strip() for a in request.form.get('abilities', '').split(',') if a.strip()]
-            member['jumpMove'] = int(request.form.get('jumpMove', 0) or 0)
-            member['move'] = (
-                [
-                    {
-                        'move': int(request.form.get('move_value', 0) or 0),
-                        'currentMove': int(request.form.get('move_current', 0) or 0),
-                        'type': request.form.get('move_type', 'Walk'),
-                    }
-                ]
-                if request.form.get('move_value')
-                else member.get('move', [])
-            )
-
-            member['damage']['short'] = int(request.form.get('damage_short', 0) or 0)
-            member['damage']['medium'] = int(request.form.get('damage_medium', 0) or 0)
-            member['damage']['long'] = int(request.form.get('damage_long', 0) or 0)
-            member['damage']['extreme'] = int(request.form.get('damage_extreme', 0) or 0)
-
-            member['pilot']['name'] = request.form.get('pilot_name', '')
-            member['pilot']['piloting'] = int(request.form.get('pilot_piloting', 4) or 4)
-            member['pilot']['gunnery'] = int(request.form.get('pilot_gunnery', 4) or 4)
-            member['pilot']['wounds'] = int(request.form.get('pilot_wounds', 0) or 0)
+            # Every field is read into a copy first so a bad value changes nothing
+            data, errors = member_form.parse(request.form, member)
+            if errors:
+                flash('Please correct the highlighted fields.', 'danger')
+                return render_edit_member(filename, member, member_form.values(member, request.form), errors), 422
 
+            group_data.replace(member_uuid, data)
             group_data['lastUpdated'] = datetime.now().isoformat()
 
-            with open(filepath, 'w') as f:
-                json.dump(group_data, f, indent=2)
+            repository.save(filename, group_data, defer=True)
 
             flash('Member updated successfully!', 'success')
             return redirect(url_for('edit_group', filename=filename))
         except Exception as e:
             flash(f'Error updating member: {str(e)}', 'danger')
 
-    return render_template('edit_member.html', member=member, filename=filename)
+    return render_edit_member(filename, member, member_form.values(member))
+
+
+def render_edit_member(filename, member, values, errors=None):
+    return render_template(
+        'edit_member.html',
+        member=member,
+        filename=filename,
+        etag=repository.version(filename)[0],
+        values=values,
+        errors=errors or {},
+    )
 
 
 @app.route('/member/<filename>/delete/<member_uuid>', methods=['POST'])
+@locks_group
 def delete_member(filename, member_uuid):
     """Delete a member from a group."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -328,14 +639,12 @@ def delete_member(filename, member_uuid):
         return redirect(url_for('index'))
 
     try:
-        with open(filepath, 'r') as f:
-            group_data = json.load(f)
+        group_data = repository.load(filename)
 
-        group_data['members'] = [m for m in group_data['members'] if m['uuid'] != member_uuid]
+        group_data.remove(member_uuid)
         group_data['lastUpdated'] = datetime.now().isoformat()
 
-        with open(filepath, 'w') as f:
-            json.dump(group_data, f, indent=2)
+        repository.save(filename, group_data, defer=True)
 
         flash('Member deleted successfully!', 'success')
     except Exception as e:
@@ -345,19 +654,157 @@ def delete_member(filename, member_uuid):
 
 
 @app.route('/delete/<filename>', methods=['POST'])
+@locks_group
 def delete_group(filename):
     """Delete a group file."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
 
     if os.path.exists(filepath):
+        # The last history entry keeps the group, so it can be brought back from the trash
+        repository.flush(filename)
+        try:
+            history.record_file(filename, 'delete')
+        except HistoryError:
+            flash(
+                f'File "{filename}" is not valid JSON, so it cannot be kept in the trash. '
+                'Replace it with a valid group or remove it from the data folder.',
+                'danger',
+            )
+            return redirect(url_for('index'))
+        repository.invalidate(filename)
         os.remove(filepath)
-        flash(f'File "{filename}" deleted successfully!', 'success')
+        catalog.remove(filename)
+        search_index.remove(filename)
+        if history.enabled:
+            flash(f'File "{filename}" moved to the trash.', 'success')
+        else:
+            flash(f'File "{filename}" deleted successfully!', 'success')
     else:
         flash(f'File "{filename}" not found!', 'danger')
 
     return redirect(url_for('index'))
 
 
+@app.route('/history/<filename>')
+def group_history(filename):
+    """List the saved versions of a group, newest first."""
+    repository.flush(filename)
+    entries = history.entries(filename)
+    exists = repository.exists(filename)
+    if not exists and not entries:
+        flash(f'File "{filename}" not found!', 'danger')
+        return redirect(url_for('index'))
+
+    current = history.current_state(entries)
+    versions = [
+        {
+            'v': entry['v'],
+            'time': datetime.fromtimestamp(entry['t']),
+            'label': OP_LABELS.get(entry['op'], entry['op']),
+            'description': describe(entry),
+            'state': entry.get('state'),
+            'current': entry['v'] == current,
+        }
+        for entry in reversed(entries)
+    ]
+    return render_template(
+        'history.html',
+        filename=filename,
+        versions=versions,
+        exists=exists,
+        etag=repository.version(filename)[0] if exists else None,
+        can_undo=exists and history.undo_target(entries) is not None,
+        can_redo=exists and history.redo_target(entries) is not None,
+    )
+
+
+def change_history(filename, op, message, plan, *args):
+    """Save the version of ``filename`` chosen by ``plan``, recording it in the history as ``op``."""
+    if not repository.exists(filename):
+        flash(f'File "{filename}" not found!', 'danger')
+        return redirect(url_for('index'))
+
+    # A pending deferred save is the latest change, so it must be in the history first
+    repository.flush(filename)
+    try:
+        content, fields = plan(filename, *args)
+    except HistoryError as e:
+        flash(f'{e}.', 'warning')
+        return redirect(url_for('group_history', filename=filename))
+
+    with history.label(filename, op, **fields):
+        repository.save(filename, content)
+    flash(message, 'success')
+    return redirect(url_for('edit_group', filename=filename))
+
+
+@app.route('/history/<filename>/undo', methods=['POST'])
+@locks_group
+def undo_change(filename):
+    """Go back to the version before the last change."""
+    return change_history(filename, 'undo', 'Last change undone.', history.undo)
+
+
+@app.route('/history/<filename>/redo', methods=['POST'])
+@locks_group
+def redo_change(filename):
+    """Apply the last undone change again."""
+    return change_history(filename, 'redo', 'Change redone.', history.redo)
+
+
+@app.route('/history/<filename>/restore', methods=['POST'])
+@locks_group
+def restore_version(filename):
+    """Go back to the version given by the ``version`` field, or to the one current at the ``at`` date and time."""
+    try:
+        if request.form.get('at'):
+            version, at = None, datetime.fromisoformat(request.form['at']).timestamp()
+        else:
+            version, at = int(request.form.get('version', '')), None
+    except ValueError:
+        flash('Please choose a version or a date and time to go back to.', 'danger')
+        return redirect(url_for('group_history', filename=filename))
+    return change_history(filename, 'restore', 'Earlier version restored.', history.restore, version, at)
+
+
+@app.route('/trash')
+def trash():
+    """List deleted groups that can still be brought back."""
+    deleted = [(filename, datetime.fromtimestamp(deleted_at)) for filename, deleted_at in history.deleted()]
+    return render_template('trash.html', deleted=deleted, retention_days=app.config['HISTORY_RETENTION_DAYS'])
+
+
+@app.route('/trash/<filename>/restore', methods=['POST'])
+@locks_group
+def undelete_group(filename):
+    """Bring a deleted group back from the trash."""
+    if repository.exists(filename):
+        flash(f'File "{filename}" already exists!', 'danger')
+        return redirect(url_for('trash'))
+    try:
+        content, fields = history.undelete(filename)
+    except HistoryError as e:
+        flash(f'{e}.', 'danger')
+        return redirect(url_for('trash'))
+
+    with history.label(filename, 'undelete', **fields):
+        repository.save(filename, content)
+    flash(f'File "{filename}" restored from the trash.', 'success')
+    return redirect(url_for('edit_group', filename=filename))
+
+
+@app.route('/trash/<filename>/purge', methods=['POST'])
+@locks_group
+def purge_group(filename):
+    """Remove a deleted group and its history for good."""
+    if history.in_trash(filename):
+        history.purge(filename)
+        flash(f'File "{filename}" removed from the trash for good.', 'success')
+    else:
+        flash(f'File "{filename}" is not in the trash.', 'danger')
+    return redirect(url_for('trash'))
+
+
 @app.route('/copy/<filename>', methods=['GET', 'POST'])
 def copy_group(filename):
     """Copy a group file."""
@@ -383,8 +830,7 @@ def copy_group(filename):
             return render_template('copy_group.html', filename=filename)
 
         try:
-            with open(filepath, 'r') as f:
-                group_data = json.load(f)
+            group_data = repository.load(filename).copy()
 
             # Update UUID and timestamp for the copy
             group_data['uuid'] = str(uuid_lib.uuid4())
@@ -392,11 +838,9 @@ def copy_group(filename):
 
             # Update member UUIDs if requested
             if request.form.get('update_member_uuids') == 'on':
-                for member in group_data.get('members', []):
-                    member['uuid'] = str(uuid_lib.uuid4())
+                group_data.regenerate_member_uuids()
 
-            with open(new_filepath, 'w') as f:
-                json.dump(group_data, f, indent=2)
+            repository.save(new_filename, group_data)
 
             flash(f'File copied to "{new_filename}" successfully!', 'success')
             return redirect(url_for('edit_group', filename=new_filename))
@@ -407,6 +851,7 @@ def copy_group(filename):
 
 
 @app.route('/rename/<filename>', methods=['GET', 'POST'])
+@locks_group
 def rename_group(filename):
     """Rename a group file."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -431,9 +876,22 @@ def rename_group(filename):
             return render_template('rename_group.html', filename=filename)
 
         try:
-            os.rename(filepath, new_filepath)
+            repository.flush(filename)
+            # Refuses before anything moves if a deleted group of the new name still has its history
+            history.rename(filename, new_filename)
+            try:
+                os.rename(filepath, new_filepath)
+            except OSError:
+                history.rename(new_filename, filename)
+                raise
+            repository.invalidate(filename)
+            repository.invalidate(new_filename)
+            catalog.refresh(force=True)
+            search_index.refresh(force=True)
             flash(f'File renamed to "{new_filename}" successfully!', 'success')
             return redirect(url_for('edit_group', filename=new_filename))
+        except HistoryError as e:
+            flash(f'{e}.', 'danger')
         except Exception as e:
             flash(f'Error renaming file: {str(e)}', 'danger')
 
@@ -442,52 +900,313 @@ def rename_group(filename):
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    """Download a JSON file."""
+    """Download a group as the indented JSON Jeff's BT Tools imports, whatever format it is stored in."""
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
 
     if not os.path.exists(filepath):
         flash(f'File "{filename}" not found!', 'danger')
         return redirect(url_for('index'))
 
-    # Convert to absolute path
-    absolute_path = os.path.abspath(filepath)
-
-    return send_file(absolute_path, as_attachment=True, download_name=filename, mimetype='application/json')
+    # Read the file and its version together, so the ETag always describes the bytes sent
+    with repository.lock(filename):
+        repository.flush(filename)
+        etag, modified = repository.version(filename)
+        f = open(os.path.abspath(filepath), 'rb')
+    head = f.read(8)
+    f.seek(0)
+    encoding = codec.content_encoding(head)
+
+    if encoding is None and codec.is_pretty(head):
+        return send_file(
+            f,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/json',
+            etag=etag,
+            last_modified=modified,
+        )
+
+    if encoding is not None and encoding in request.accept_encodings:
+        # Compressed files hold the indented JSON, so the browser unpacks them into the exported format
+        response = send_file(
+            f,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/json',
+            etag=f'{etag}-{encoding}',
+            last_modified=modified,
+        )
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    # Re-indent (and possibly compress) the content; each variant has its own ETag
+    encoding = 'gzip' if 'gzip' in request.accept_encodings else None
+    etag = f'{etag}-json-{encoding}' if encoding else f'{etag}-json'
+    if not_modified(etag, modified):
+        f.close()
+        response = add_validators(app.response_class(status=304), etag, modified)
+    else:
+        with f:
+            content = codec.decompress(f.read())
+        if not codec.is_pretty(content):
+            content = codec.dumps(codec.loads(content))
+        if encoding is not None:
+            content = codec.compress(content, encoding)
+        response = send_file(
+            io.BytesIO(content),
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/json',
+            etag=etag,
+            last_modified=modified,
+        )
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def allow_bulk_upload():
+    """Raise the request size and part limits for views that accept many files at once."""
+    request.max_content_length = app.config['MAX_IMPORT_BYTES'] + 1024 * 1024
+    request.max_form_parts = app.config['MAX_IMPORT_FILES'] + 100
+
+
+def run_import(files):
+    """Import uploaded ``.json`` and ``.zip`` files; returns one :class:`ImportResult` per group file."""
+    importer = BulkImport(
+        repository,
+        max_bytes=app.config['MAX_UPLOAD_BYTES'],
+        max_total_bytes=app.config['MAX_IMPORT_BYTES'],
+        max_files=app.config['MAX_IMPORT_FILES'],
+        max_errors=app.config['UPLOAD_MAX_ERRORS'],
+        workers=app.config['IMPORT_WORKERS'],
+        pool=app.config['IMPORT_POOL'],
+        history=history,
+    )
+    try:
+        with span('read'):
+            for file in files:
+                importer.add(file.filename, file.stream)
+    except BaseException:
+        importer.discard()
+        raise
+    results = importer.run()
+    if any(result.ok for result in results):
+        catalog.refresh(force=True)
+        search_index.refresh(force=True)
+    return results
 
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Upload a JSON file."""
+    """Upload a JSON file, or several JSON and zip files at once."""
+    allow_bulk_upload()
     if 'file' not in request.files:
         flash('No file provided!', 'danger')
         return redirect(url_for('index'))
 
-    file = request.files['file']
-    if file.filename == '':
+    files = [file for file in request.files.getlist('file') if file.filename]
+    if not files:
         flash('No file selected!', 'danger')
         return redirect(url_for('index'))
 
+    if len(files) > 1 or files[0].filename.endswith('.zip'):
+        results = run_import(files)
+        imported = sum(result.ok for result in results)
+        return render_template('import_report.html', results=results, imported=imported), 200 if imported else 422
+
+    file = files[0]
     if file and file.filename.endswith('.json'):
+        tmp_path = None
         try:
-            # Validate JSON
-            content = file.read()
-            json.loads(content)
+            # Stream to a temporary file, then validate it member by member against the schema
+            with span('write'):
+                tmp_path = save_stream(file.stream, app.config['UPLOAD_FOLDER'], app.config['MAX_UPLOAD_BYTES'])
+            with span('validate'):
+                report = validate_group_file(tmp_path, group_validator, max_errors=app.config['UPLOAD_MAX_ERRORS'])
+            if not report.ok:
+                return render_template('upload_report.html', filename=file.filename, report=report), 422
 
             # Save file
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            with open(filepath, 'wb') as f:
-                f.write(content)
+            with repository.lock(file.filename):
+                repository.invalidate(file.filename)
+                if repository.storage_format == 'pretty':
+                    history.baseline(file.filename)
+                    os.replace(tmp_path, filepath)
+                    tmp_path = None
+                    history.record_file(file.filename)
+                else:
+                    with history.label(file.filename, 'upload'):
+                        repository.save(file.filename, codec.load_file(tmp_path))
+            catalog.refresh(force=True)
+            search_index.refresh(force=True)
 
             flash(f'File "{file.filename}" uploaded successfully!', 'success')
-        except json.JSONDecodeError:
+        except UploadTooLarge as e:
+            flash(f'{e}!', 'danger')
+        except ValueError:
             flash('Invalid JSON file!', 'danger')
         except Exception as e:
             flash(f'Error uploading file: {str(e)}', 'danger')
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
     else:
         flash('Only JSON files are allowed!', 'danger')
 
     return redirect(url_for('index'))
 
 
-if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+@app.route('/api/import', methods=['POST'])
+def api_import():
+    """Import the JSON and zip files sent as ``file`` fields and report the outcome for each group file."""
+    allow_bulk_upload()
+    files = [file for file in request.files.getlist('file') if file.filename]
+    if not files:
+        return jsonify(error='Send the group files, or zip archives of them, as multipart "file" fields'), 400
+
+    results = run_import(files)
+    imported = sum(result.ok for result in results)
+    status = 200 if imported == len(results) else 207 if imported else 422
+    return jsonify(imported=imported, results=[result.to_dict() for result in results]), status
+
+
+@app.route('/export')
+def export_groups():
+    """Download the groups named by ``file`` arguments, or all groups, as a zip streamed while it is built."""
+    filenames = list(dict.fromkeys(request.args.getlist('file')))
+    for filename in filenames:
+        if os.path.basename(filename) != filename or not filename.endswith('.json') or not repository.exists(filename):
+            flash(f'File "{filename}" not found!', 'danger')
+            return redirect(url_for('index'))
+    if not filenames:
+        filenames = sorted(
+            name for name in os.listdir(app.config['UPLOAD_FOLDER']) if name.endswith('.json') and name[0] != '.'
+        )
+
+    response = app.response_class(export_zip(repository, filenames), mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename=f'groups-{datetime.now():%Y%m%d-%H%M%S}.zip')
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/api/groups/<filename>/members:batch', methods=['POST'])
+@locks_group
+def batch_members(filename):
+    """Apply a list of add/update/delete/duplicate member operations in one load and one save."""
+    if not repository.exists(filename):
+        return jsonify(error=f'File "{filename}" not found'), 404
+
+    payload = request.get_json(silent=True)
+    operations = payload.get('operations') if isinstance(payload, dict) else payload
+    if not isinstance(operations, list):
+        return jsonify(error='Expected a list of operations or {"operations": [...]}'), 400
+
+    group_data = repository.load(filename)
+    ok, results = apply_batch(group_data, operations, group_validator)
+    if not ok:
+        return jsonify(error='No changes were made because some operations failed', results=results), 422
+
+    group_data['lastUpdated'] = datetime.now().isoformat()
+    repository.save(filename, group_data, defer=True)
+
+    return jsonify(filename=filename, lastUpdated=group_data['lastUpdated'], results=results)
+
+
+def read_patch():
+    """Return ``(patch, None)`` for a PATCH request body, or ``(None, error_response)``."""
+    if request.mimetype not in (JSON_PATCH, MERGE_PATCH, 'application/json'):
+        return None, (jsonify(error=f'Use {JSON_PATCH} or {MERGE_PATCH}'), 415)
+
+    patch = request.get_json(force=True, silent=True)
+    if patch is None:
+        return None, (jsonify(error='Request body is not valid JSON'), 400)
+    return patch, None
+
+
+def patch_failed(e):
+    """Return the JSON error response for a patch that could not be applied."""
+    return jsonify(error=str(e)), 409 if isinstance(e, PatchTestFailed) else 422
+
+
+@app.route('/api/groups/<filename>', methods=['PATCH'])
+@locks_group
+def patch_group(filename):
+    """Apply a JSON Patch or merge patch to the group fields other than its members."""
+    if not repository.exists(filename):
+        return jsonify(error=f'File "{filename}" not found'), 404
+
+    patch, error = read_patch()
+    if error:
+        return error
+
+    group_data = repository.load(filename)
+    fields = {key: value for key, value in group_data.data.items() if key != 'members'}
+    try:
+        patched = apply_patch(fields, patch, request.mimetype)
+    except PatchError as e:
+        return patch_failed(e)
+
+    if not isinstance(patched, dict) or 'members' in patched:
+        return jsonify(error='Members can only be changed through the member endpoints'), 422
+    errors = group_validator.validate_metadata(patched)
+    if errors:
+        return jsonify(error='Patched group does not match the schema', details=[format_error(e) for e in errors]), 422
+
+    for key in [key for key in fields if key not in patched]:
+        del group_data.data[key]
+    for key, value in patched.items():
+        if key not in fields or fields[key] is not value:
+            group_data[key] = value
+    group_data['lastUpdated'] = datetime.now().isoformat()
+    repository.save(filename, group_data, defer=True)
+
+    return jsonify(lastUpdated=group_data['lastUpdated'])
+
+
+@app.route('/api/groups/<filename>/members/<member_uuid>', methods=['PATCH'])
+@locks_group
+def patch_member(filename, member_uuid):
+    """Apply a JSON Patch or merge patch to a single member."""
+    if not repository.exists(filename):
+        return jsonify(error=f'File "{filename}" not found'), 404
+
+    patch, error = read_patch()
+    if error:
+        return error
+
+    group_data = repository.load(filename)
+    member = group_data.find(member_uuid)
+    if member is None:
+        return jsonify(error=f'Member {member_uuid} not found'), 404
+
+    try:
+        patched = apply_patch(member.to_dict(), patch, request.mimetype)
+    except PatchError as e:
+        return patch_failed(e)
+
+    if not isinstance(patched, dict) or patched.get('uuid') != member_uuid:
+        return jsonify(error='A patch cannot replace the member or change its uuid'), 422
+    errors = group_validator.validate_member(patched)
+    if errors:
+        return jsonify(error='Patched member does not match the schema', details=[format_error(e) for e in errors]), 422
+
+    group_data.replace(member_uuid, patched)
+    group_data['lastUpdated'] = datetime.now().isoformat()
+    repository.save(filename, group_data, defer=True)
+
+    return jsonify(uuid=member_uuid, lastUpdated=group_data['lastUpdated'])
+
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    """Report uploads rejected by MAX_CONTENT_LENGTH, or by the import limit for views that take many files."""
+    limit = app.config['MAX_IMPORT_BYTES'] if request.endpoint in ('upload_file', 'api_import') else None
+    message = f'Upload is larger than {limit or app.config["MAX_UPLOAD_BYTES"]} bytes'
+    if request.endpoint == 'api_import':
+        return jsonify(error=message), 413
+    flash(f'{message}!', 'danger')
+    return redirect(url_for('index'))
@@ -0,0 +1,102 @@
+import uuid as uuid_lib
+
+from src.validation import format_error
+
+OPERATIONS = ('add', 'update', 'delete', 'duplicate')
+
+
+class BatchError(Exception):
+    """Raised for a single operation that cannot be applied."""
+
+
+def apply_batch(group, operations, validator):
+    """Apply a list of member operations to ``group`` as one unit.
+
+    Each operation is a dict with an ``op`` of ``add`` (``member``), ``update``
+    (``uuid`` and the ``member`` fields to change), ``delete`` (``uuid``) or
+    ``duplicate`` (``uuid``, optional ``name``). Operations run in order and see
+    the effect of earlier ones. Every operation is attempted so all problems are
+    reported at once; if any fails, the applied ones are undone and the group is
+    left as it was.
+
+    Returns ``(ok, results)`` with one result dict per operation.
+    """
+    results = []
+    undo = []
+
+    for index, operation in enumerate(operations):
+        try:
+            result = _apply(group, operation, validator, undo)
+            results.append({'index': index, 'op': operation.get('op'), 'status': 'ok', **result})
+        except BatchError as e:
+            op = operation.get('op') if isinstance(operation, dict) else None
+            results.append({'index': index, 'op': op, 'status': 'error', 'error': str(e)})
+
+    ok = all(result['status'] == 'ok' for result in results)
+    if not ok:
+        for action in reversed(undo):
+            action()
+        for result in results:
+            if result['status'] == 'ok':
+                result['status'] = 'rolled_back'
+    return ok, results
+
+
+def _apply(group, operation, validator, undo):
+    if not isinstance(operation, dict):
+        raise BatchError('operation must be an object')
+
+    op = operation.get('op')
+    if op not in OPERATIONS:
+        raise BatchError(f'op must be one of {", ".join(OPERATIONS)}')
+
+    if op == 'add':
+        member = operation.get('member')
+        if not isinstance(member, dict):
+            raise BatchError('add needs a "member" object')
+        member = dict(member)
+        member.setdefault('uuid', str(uuid_lib.uuid4()))
+        _check(validator, member)
+        if group.find(member['uuid']) is not None:
+            raise BatchError(f'member {member["uuid"]} already exists')
+        group.add(member)
+        undo.append(lambda: group.remove(member['uuid']))
+        return {'uuid': member['uuid']}
+
+    member_uuid = operation.get('uuid')
+    if not isinstance(member_uuid, str):
+        raise BatchError(f'{op} needs a "uuid" string')
+    existing = group.find(member_uuid)
+    if existing is None:
+        raise BatchError(f'member {member_uuid} not found')
+
+    if op == 'update':
+        fields = operation.get('member')
+        if not isinstance(fields, dict):
+            raise BatchError('update needs a "member" object with the fields to change')
+        if fields.get('uuid', member_uuid) != member_uuid:
+            raise BatchError('update cannot change a member uuid')
+        updated = existing | fields
+        _check(validator, updated)
+        group.replace(member_uuid, updated)
+        undo.append(lambda: group.replace(member_uuid, existing))
+        return {'uuid': member_uuid}
+
+    if op == 'delete':
+        position = group.index_of(member_uuid)
+        group.remove(member_uuid)
+        undo.append(lambda: group.insert(position, existing))
+        return {'uuid': member_uuid}
+
+    # duplicate
+    copy = group.duplicate(member_uuid)
+    if operation.get('name'):
+        copy['name'] = str(operation['name'])
+    undo.append(lambda: group.remove(copy['uuid']))
+    return {'uuid': copy['uuid'], 'source': member_uuid}
+
+
+def _check(validator, member):
+    errors = validator.validate_member(member)
+    if errors:
+        raise BatchError('; '.join(format_error(e) for e in errors))
@@ -0,0 +1,298 @@
+import concurrent.futures
+import contextlib
+import functools
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+import zlib
+
+from src import codec
+from src.metrics import span
+from src.persistence import write_bytes_atomic
+from src.uploads import CHUNK_SIZE, UploadTooLarge, save_stream, validate_group_file
+from src.validation import GroupValidator
+
+logger = logging.getLogger(__name__)
+
+POOLS = ('process', 'thread')
+
+# Imports with fewer files than this are checked without a pool
+POOL_MIN_FILES = 8
+
+# Files that archive tools add next to the real content
+_IGNORED_PREFIXES = ('.', '__MACOSX')
+
+
+class ImportResult:
+    """Outcome of one file of a bulk import.
+
+    ``status`` is ``'imported'``, ``'invalid'`` (the file does not match the
+    schema; ``report`` says where), ``'skipped'`` (not a group file) or
+    ``'error'``. ``source`` names the zip archive the file came from, if any.
+    """
+
+    __slots__ = ('filename', 'source', 'status', 'message', 'report', 'tmp_path')
+
+    def __init__(self, filename, source=None, status='error', message='', tmp_path=None):
+        self.filename = filename
+        self.source = source
+        self.status = status
+        self.message = message
+        self.report = None
+        self.tmp_path = tmp_path
+
+    @property
+    def ok(self):
+        return self.status == 'imported'
+
+    def to_dict(self):
+        result = {'filename': self.filename, 'status': self.status}
+        if self.source is not None:
+            result['source'] = self.source
+        if self.message:
+            result['message'] = self.message
+        if self.report is not None:
+            result['members'] = self.report.member_count
+            if not self.report.ok:
+                result['errors'] = self.report.errors
+                result['memberErrors'] = self.report.members
+                result['truncated'] = self.report.truncated
+        return result
+
+
+@functools.cache
+def _validator():
+    # Compiled once per worker process
+    return GroupValidator.from_file()
+
+
+def check_file(tmp_path, storage_format, max_errors):
+    """Validate the staged group file at ``tmp_path`` and rewrite it in ``storage_format``.
+
+    Runs in the import pool. Returns ``(report, error_message)``.
+    """
+    try:
+        report = validate_group_file(tmp_path, _validator(), max_errors=max_errors)
+        if report.ok and storage_format != 'pretty':
+            write_bytes_atomic(tmp_path, codec.encode(codec.load_file(tmp_path), storage_format))
+    except ValueError:
+        return None, 'Invalid JSON file'
+    except OSError as e:
+        return None, str(e)
+    return report, None
+
+
+def _executor(pool, workers):
+    if pool == 'thread':
+        return concurrent.futures.ThreadPoolExecutor(workers)
+    # Forking a threaded server is unsafe; forkserver and spawn start clean interpreters
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    return concurrent.futures.ProcessPoolExecutor(workers, mp_context=context)
+
+
+def _check_all(staged, storage_format, max_errors, pool, workers):
+    workers = min(workers or os.cpu_count() or 1, len(staged))
+    paths = [result.tmp_path for result in staged]
+    # Starting a pool costs more than checking a few files
+    if workers <= 1 or len(paths) < POOL_MIN_FILES:
+        return [check_file(path, storage_format, max_errors) for path in paths]
+    try:
+        with _executor(pool, workers) as executor:
+            chunk = max(1, len(paths) // (workers * 4))
+            return list(
+                executor.map(
+                    check_file, paths, [storage_format] * len(paths), [max_errors] * len(paths), chunksize=chunk
+                )
+            )
+    except (concurrent.futures.BrokenExecutor, OSError):
+        logger.exception('Import workers failed; checking the files in this process instead')
+        return [check_file(path, storage_format, max_errors) for path in paths]
+
+
+class BulkImport:
+    """Stage, check and save many uploaded group files, possibly packed in zip archives.
+
+    Files are copied to temporary files as they are read from the request
+    (:meth:`add`), then :meth:`run` validates and converts them to the
+    repository's storage format across a pool of ``workers`` processes or
+    threads and moves the good ones into place one by one under their file
+    lock. A file that fails does not stop the others. A :class:`GroupHistory`
+    passed as ``history`` records each file saved.
+    """
+
+    def __init__(
+        self,
+        repository,
+        max_bytes,
+        max_total_bytes,
+        max_files,
+        max_errors=50,
+        workers=0,
+        pool='process',
+        history=None,
+    ):
+        if pool not in POOLS:
+            raise ValueError(f'Unknown import pool {pool!r}, expected one of {", ".join(POOLS)}')
+        self.repository = repository
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_files = max_files
+        self.max_errors = max_errors
+        self.workers = workers
+        self.pool = pool
+        self.history = history
+        self.results = []
+        self.staged_bytes = 0
+        self._names = set()
+
+    def add(self, filename, stream):
+        """Stage an uploaded ``.json`` or ``.zip`` file read from ``stream``."""
+        filename = os.path.basename(filename.replace('\\', '/'))
+        if filename.endswith('.zip'):
+            self._add_zip(filename, stream)
+        else:
+            self._add_file(filename, stream)
+
+    def _add_file(self, filename, stream, source=None):
+        result = ImportResult(filename, source)
+        self.results.append(result)
+        if not filename.endswith('.json') or filename.startswith('.'):
+            result.status, result.message = 'skipped', 'Only .json group files are imported'
+        elif filename in self._names:
+            result.status, result.message = 'skipped', 'Another file in this import has the same name'
+        elif len(self._names) >= self.max_files:
+            result.status, result.message = 'skipped', f'Only {self.max_files} files are imported at once'
+        else:
+            # Unpacked archive entries count towards the total too, so a zip bomb stops early
+            remaining = self.max_total_bytes - self.staged_bytes
+            try:
+                result.tmp_path = save_stream(stream, self.repository.folder, min(self.max_bytes, remaining))
+            except UploadTooLarge as e:
+                result.message = (
+                    str(e) if remaining >= self.max_bytes else f'Import is larger than {self.max_total_bytes} bytes'
+                )
+            else:
+                result.status = 'staged'
+                self.staged_bytes += os.path.getsize(result.tmp_path)
+                self._names.add(filename)
+
+    def _add_zip(self, filename, stream):
+        try:
+            tmp_path = save_stream(stream, self.repository.folder, self.max_total_bytes - self.staged_bytes)
+        except UploadTooLarge:
+            self.results.append(ImportResult(filename, message=f'Import is larger than {self.max_total_bytes} bytes'))
+            return
+        try:
+            with zipfile.ZipFile(tmp_path) as archive:
+                for info in archive.infolist():
+                    name = info.filename.rsplit('/', 1)[-1]
+                    if info.is_dir() or not name or info.filename.startswith(_IGNORED_PREFIXES) or name[0] == '.':
+                        continue
+                    with archive.open(info) as member:
+                        self._add_file(name, member, source=filename)
+        except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError) as e:
+            # RuntimeError and NotImplementedError come from encrypted entries and unsupported compression
+            self.results.append(ImportResult(filename, message=f'Cannot read the zip archive: {e}'))
+        finally:
+            os.remove(tmp_path)
+
+    def run(self):
+        """Check and save the staged files. Returns the list of :class:`ImportResult`, in upload order."""
+        staged = [result for result in self.results if result.status == 'staged']
+        try:
+            with span('validate'):
+                checked = _check_all(staged, self.repository.storage_format, self.max_errors, self.pool, self.workers)
+            with span('write'):
+                for result, (report, error) in zip(staged, checked):
+                    result.report = report
+                    if error is not None:
+                        result.status, result.message = 'error', error
+                    elif not report.ok:
+                        result.status, result.message = 'invalid', 'Does not match the group schema'
+                    else:
+                        self._save(result)
+        finally:
+            self.discard()
+        return self.results
+
+    def _save(self, result):
+        with self.repository.lock(result.filename):
+            self.repository.invalidate(result.filename)
+            if self.history is not None:
+                self.history.baseline(result.filename)
+            os.replace(result.tmp_path, self.repository.path(result.filename))
+            result.tmp_path = None
+            if self.history is not None:
+                self.history.record_file(result.filename)
+        result.status = 'imported'
+
+    def discard(self):
+        """Remove the temporary files of staged files that were not saved."""
+        for result in self.results:
+            if result.tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(result.tmp_path)
+                result.tmp_path = None
+
+
+class _Sink:
+    """Write-only stream that collects what a ``ZipFile`` writes so it can be handed on in pieces."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b''.join(chunks)
+
+
+def export_zip(repository, filenames, chunk_size=CHUNK_SIZE):
+    """Yield a zip archive of the group files ``filenames`` a piece at a time.
+
+    Every file is stored as the indented JSON Jeff's tools import, whatever
+    format it is kept in. Only about one ``chunk_size`` of file content is held
+    in memory at a time for pretty files, and one decoded group for the others.
+    Files deleted while the archive is being built are left out.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename in filenames:
+            with repository.lock(filename):
+                repository.flush(filename)
+                try:
+                    f = open(repository.path(filename), 'rb')
+                except FileNotFoundError:
+                    continue
+            with f:
+                info = zipfile.ZipInfo(filename, time.localtime(os.fstat(f.fileno()).st_mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                head = f.read(8)
+                f.seek(0)
+                if codec.content_encoding(head) is None and codec.is_pretty(head):
+                    with archive.open(info, 'w') as out:
+                        while chunk := f.read(chunk_size):
+                            out.write(chunk)
+                            yield from sink.drain()
+                else:
+                    content = codec.decompress(f.read())
+                    if not codec.is_pretty(content):
+                        content = codec.dumps(codec.loads(content))
+                    archive.writestr(info, content)
+            yield from sink.drain()
+    yield from sink.drain()
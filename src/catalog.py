@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+
+from src import codec
+from src.analytics import MemberColumns
+
+SORT_COLUMNS = {
+    'filename': 'filename COLLATE NOCASE',
+    'name': 'name COLLATE NOCASE',
+    'members': 'member_count',
+    'pv': 'total_pv',
+    'updated': 'last_updated',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    group_label TEXT NOT NULL DEFAULT '',
+    uuid TEXT NOT NULL DEFAULT '',
+    member_count INTEGER NOT NULL DEFAULT 0,
+    total_pv INTEGER NOT NULL DEFAULT 0,
+    last_updated TEXT NOT NULL DEFAULT '',
+    valid INTEGER NOT NULL DEFAULT 1,
+    stats TEXT NOT NULL DEFAULT '{}'
+)
+"""
+
+_UPSERT = """
+INSERT INTO groups (
+    filename, mtime_ns, size, name, group_label, uuid, member_count, total_pv, last_updated, valid, stats
+)
+VALUES (
+    :filename, :mtime_ns, :size, :name, :group_label, :uuid, :member_count, :total_pv, :last_updated, :valid, :stats
+)
+ON CONFLICT(filename) DO UPDATE SET
+    mtime_ns = excluded.mtime_ns,
+    size = excluded.size,
+    name = excluded.name,
+    group_label = excluded.group_label,
+    uuid = excluded.uuid,
+    member_count = excluded.member_count,
+    total_pv = excluded.total_pv,
+    last_updated = excluded.last_updated,
+    valid = excluded.valid,
+    stats = excluded.stats
+"""
+
+
+def summarize(group_data):
+    """Return the catalog columns for a parsed group."""
+    members = [m for m in group_data.get('members') or [] if isinstance(m, Mapping)]
+    return {
+        'name': str(group_data.get('name') or ''),
+        'group_label': str(group_data.get('groupLabel') or ''),
+        'uuid': str(group_data.get('uuid') or ''),
+        'member_count': len(members),
+        'total_pv': sum(int(m.get('basePoints') or 0) for m in members),
+        'last_updated': str(group_data.get('lastUpdated') or ''),
+        'stats': json.dumps(MemberColumns(members).summary()),
+    }
+
+
+class GroupCatalog:
+    """Summary metadata for every group file in a folder, kept in a SQLite sidecar.
+
+    :meth:`refresh` compares each file's ``st_mtime_ns`` and size with the stored
+    row and only parses files that changed, so listing a large folder costs one
+    directory scan plus a query. Scans are skipped if the previous one ran less
+    than ``refresh_interval`` seconds ago, or at all while ``watched`` is set and
+    a watcher calls :meth:`refresh_file` for each change; writes made through
+    :meth:`update` show up immediately regardless.
+    """
+
+    def __init__(self, folder, db_path, refresh_interval=0.0):
+        self.folder = folder
+        self.refresh_interval = refresh_interval
+        self.watched = False
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            columns = {row['name'] for row in self._db.execute('PRAGMA table_info(groups)')}
+            if columns and 'stats' not in columns:
+                # Written by an older version; the catalog only caches the files, so rebuild it
+                self._db.execute('DROP TABLE groups')
+            self._db.execute(_SCHEMA)
+        rows = self._db.execute('SELECT filename, mtime_ns, size FROM groups')
+        self._known = {filename: (mtime_ns, size) for filename, mtime_ns, size in rows}
+        self._last_refresh = None
+
+    def refresh(self, force=False):
+        """Bring the catalog in line with the files currently in the folder."""
+        now = time.monotonic()
+        if not force and self._last_refresh is not None:
+            if self.watched or now - self._last_refresh < self.refresh_interval:
+                return
+        self._last_refresh = now
+
+        with self._lock:
+            known = dict(self._known)
+
+        seen = set()
+        changed = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                st = entry.stat()
+                if known.get(entry.name) != (st.st_mtime_ns, st.st_size):
+                    changed.append((entry.name, st))
+
+        rows = [self._read_row(filename, st) for filename, st in changed]
+        removed = [(filename,) for filename in known.keys() - seen]
+
+        if rows or removed:
+            with self._lock, self._db:
+                self._db.executemany(_UPSERT, rows)
+                self._db.executemany('DELETE FROM groups WHERE filename = ?', removed)
+                for row in rows:
+                    self._known[row['filename']] = (row['mtime_ns'], row['size'])
+                for (filename,) in removed:
+                    self._known.pop(filename, None)
+
+    def update(self, filename, group_data, st):
+        """Record ``group_data`` as the current content of ``filename`` (stat result ``st``)."""
+        row = {'filename': filename, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'valid': 1}
+        row.update(summarize(group_data))
+        with self._lock, self._db:
+            self._db.execute(_UPSERT, row)
+            self._known[filename] = (st.st_mtime_ns, st.st_size)
+
+    def is_current(self, filename, st):
+        """Return True if the row for ``filename`` was made from the file with stat result ``st``."""
+        with self._lock:
+            return self._known.get(filename) == (st.st_mtime_ns, st.st_size)
+
+    def refresh_file(self, filename):
+        """Bring the row for ``filename`` in line with the file, e.g. after a watcher saw it change."""
+        try:
+            st = os.stat(os.path.join(self.folder, filename))
+        except FileNotFoundError:
+            self.remove(filename)
+            return
+        with self._lock:
+            if self._known.get(filename) == (st.st_mtime_ns, st.st_size):
+                return
+        row = self._read_row(filename, st)
+        with self._lock, self._db:
+            self._db.execute(_UPSERT, row)
+            self._known[filename] = (row['mtime_ns'], row['size'])
+
+    def remove(self, filename):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM groups WHERE filename = ?', (filename,))
+            self._known.pop(filename, None)
+
+    def query(self, search='', sort='filename', descending=False, page=1, per_page=50):
+        """Return ``(rows, total)`` for one page of groups matching ``search``.
+
+        ``search`` is matched case-insensitively against the filename, group name
+        and label. ``sort`` is one of :data:`SORT_COLUMNS`.
+        """
+        order = SORT_COLUMNS.get(sort, SORT_COLUMNS['filename'])
+        direction = 'DESC' if descending else 'ASC'
+        where = ''
+        params = []
+        if search:
+            where = "WHERE filename LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' OR group_label LIKE ? ESCAPE '\\'"
+            # % and _ in the search text are matched literally
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f'%{escaped}%'
+            params = [pattern, pattern, pattern]
+
+        page = max(page, 1)
+        with self._lock:
+            total = self._db.execute(f'SELECT COUNT(*) FROM groups {where}', params).fetchone()[0]
+            rows = self._db.execute(
+                f'SELECT * FROM groups {where} ORDER BY {order} {direction}, filename LIMIT ? OFFSET ?',
+                [*params, per_page, (page - 1) * per_page],
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def summaries(self, filenames=None):
+        """Return the name, label and force summary of the groups ``filenames``, or of every group.
+
+        Unknown filenames are left out. Groups come in the order given, or by
+        filename when ``filenames`` is None.
+        """
+        with self._lock:
+            if filenames is None:
+                rows = self._db.execute('SELECT * FROM groups ORDER BY filename COLLATE NOCASE').fetchall()
+            else:
+                by_name = {}
+                names = list(filenames)
+                # Stay under SQLite's limit on query parameters
+                for start in range(0, len(names), 500):
+                    chunk = names[start : start + 500]
+                    placeholders = ', '.join('?' * len(chunk))
+                    for row in self._db.execute(f'SELECT * FROM groups WHERE filename IN ({placeholders})', chunk):
+                        by_name[row['filename']] = row
+                rows = [by_name[name] for name in dict.fromkeys(names) if name in by_name]
+        return [
+            {
+                'filename': row['filename'],
+                'name': row['name'],
+                'groupLabel': row['group_label'],
+                'valid': bool(row['valid']),
+                **json.loads(row['stats']),
+            }
+            for row in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _read_row(self, filename, st):
+        row = {'filename': filename, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'valid': 1}
+        try:
+            group_data = codec.load_file(os.path.join(self.folder, filename))
+            row.update(summarize(group_data))
+        except (OSError, ValueError, TypeError, AttributeError):
+            row.update(summarize({}))
+            row['valid'] = 0
+        return row
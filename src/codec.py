@@ -0,0 +1,132 @@
+import gzip
+import json
+import zlib
+
+# Fastest available JSON backend: orjson, then msgspec, then the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Standard library from Python 3.14
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+else:
+    BACKEND = 'json'
+
+_BOM = b'\xef\xbb\xbf'
+
+# Storage formats for group files. The compressed formats hold the indented JSON,
+# so a download can pass the stored bytes through with a Content-Encoding header.
+FORMATS = ('pretty', 'minified', 'gzip', 'zstd')
+COMPRESSED = ('gzip', 'zstd')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_DECOMPRESS_ERRORS = (OSError, EOFError, zlib.error) + ((zstd.ZstdError,) if zstd is not None else ())
+
+
+def check_format(storage_format):
+    """Raise ``ValueError`` if ``storage_format`` is unknown or needs a module this Python lacks."""
+    if storage_format not in FORMATS:
+        raise ValueError(f'Unknown storage format {storage_format!r}, expected one of {", ".join(FORMATS)}')
+    if storage_format == 'zstd' and zstd is None:
+        raise ValueError('The zstd storage format needs Python 3.14 or later')
+
+
+def content_encoding(content):
+    """Return ``'gzip'`` or ``'zstd'`` if ``content`` starts like a compressed file, else None."""
+    if content.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    if content.startswith(_ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+
+def decompress(content):
+    """Return ``content`` uncompressed; bytes that are not compressed are returned unchanged."""
+    encoding = content_encoding(content)
+    try:
+        if encoding == 'gzip':
+            return gzip.decompress(content)
+        if encoding == 'zstd':
+            if zstd is None:
+                raise ValueError('Reading zstd-compressed files needs Python 3.14 or later')
+            return zstd.decompress(content)
+    except _DECOMPRESS_ERRORS as e:
+        raise ValueError(f'Corrupt {encoding} data: {e}') from e
+    return content
+
+
+def is_pretty(content):
+    """Return True if ``content`` looks like the indented JSON Jeff's tools export."""
+    if content.startswith(_BOM):
+        content = content[len(_BOM) :]
+    return content.startswith(b'{\n  ') or content in (b'{}', b'{\n}')
+
+
+def loads(data):
+    """Parse JSON from ``bytes`` or ``str``, decompressing gzip or zstd bytes first.
+
+    Raises ``ValueError`` for malformed input.
+    """
+    if isinstance(data, bytes):
+        data = decompress(data)
+        if data.startswith(_BOM):
+            data = data[len(_BOM) :]
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(data)
+
+
+def dumps(data, indent=True):
+    """Serialize ``data`` as UTF-8 JSON bytes indented by two spaces, like the files Jeff's tools export.
+
+    With ``indent=False`` the output has no whitespace at all.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2) if indent else orjson.dumps(data)
+    if msgspec is not None:
+        encoded = msgspec.json.encode(data)
+        return msgspec.json.format(encoded, indent=2) if indent else encoded
+    if indent:
+        return json.dumps(data, indent=2).encode('utf-8')
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def compress(content, encoding):
+    """Compress ``content`` with ``'gzip'`` or ``'zstd'``; the output is the same for the same input."""
+    if encoding == 'zstd':
+        check_format(encoding)
+        return zstd.compress(content)
+    # A fixed mtime keeps the gzip header from changing between saves
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def encode(data, storage_format):
+    """Serialize ``data`` as a group file is written in ``storage_format``."""
+    content = dumps(data, indent=storage_format != 'minified')
+    return compress(content, storage_format) if storage_format in COMPRESSED else content
+
+
+def load_file(filepath):
+    """Read and parse the JSON file at ``filepath``, in any of the storage formats."""
+    with open(filepath, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+from flask import request
+from werkzeug.http import is_resource_modified
+
+# Hidden form field carrying the ETag a page was rendered from, for browsers that cannot send If-Match
+ETAG_FIELD = 'etag'
+
+
+def not_modified(etag, modified=None):
+    """Return True if the request's If-None-Match or If-Modified-Since says the client copy is current."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    last_modified = datetime.fromtimestamp(modified, timezone.utc) if modified is not None else None
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def add_validators(response, etag, modified=None):
+    """Set ``ETag`` and ``Last-Modified`` and make caches check back before reusing ``response``."""
+    response.set_etag(etag)
+    if modified is not None:
+        response.last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    response.cache_control.no_cache = True
+    return response
+
+
+def precondition_failed(*etags):
+    """Return True if the request names a version of the resource other than any of ``etags``.
+
+    The version comes from the ``If-Match`` header or, for HTML forms, the
+    :data:`ETAG_FIELD` field. Requests that name no version are let through.
+    """
+    if 'If-Match' in request.headers:
+        return not any(request.if_match.contains(etag) for etag in etags)
+    submitted = request.form.get(ETAG_FIELD)
+    return bool(submitted) and submitted.strip('"') not in etags
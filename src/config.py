@@ -0,0 +1,55 @@
+import json
+import os
+import secrets
+import tomllib
+
+# Settings are read from JJEDITOR_* environment variables, and from the file named by JJEDITOR_CONFIG
+ENV_PREFIX = 'JJEDITOR'
+CONFIG_FILE_ENV = f'{ENV_PREFIX}_CONFIG'
+
+
+def load_config(config):
+    """Apply the settings file and environment overrides to ``config`` (a Flask ``Config``).
+
+    The file named by ``JJEDITOR_CONFIG`` may be ``.toml``, ``.json`` or a Python
+    file of upper-case assignments. Environment variables come last, so
+    ``JJEDITOR_PORT=8080`` overrides ``PORT`` from the file; values are parsed as
+    JSON when possible (``JJEDITOR_WRITE_BEHIND_DELAY=0`` gives the number 0).
+    """
+    path = os.environ.get(CONFIG_FILE_ENV)
+    if path:
+        path = os.path.abspath(path)
+        if path.endswith('.toml'):
+            config.from_file(path, load=tomllib.load, text=False)
+        elif path.endswith('.json'):
+            config.from_file(path, load=json.load)
+        else:
+            config.from_pyfile(path)
+    config.from_prefixed_env(ENV_PREFIX)
+    return config
+
+
+def load_secret_key(path):
+    """Return the secret key stored at ``path``, creating it on first use.
+
+    Every worker process reads the same file, so sessions and flash messages
+    survive restarts and work whichever worker serves the next request.
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+
+    # Write a complete file first and link it into place, so no worker ever reads a partial key
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(secrets.token_hex(32))
+    try:
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    with open(path, 'r') as f:
+        return f.read().strip()
@@ -0,0 +1,204 @@
+import math
+
+from src.models import Member
+
+# Member fields that are never edited on the form
+EXCLUDED = frozenset({'uuid', 'mechCreatorUUID'})
+
+# Defaults for fields left blank, where zero or empty is not sensible
+DEFAULTS = {'currentSkill': 4, 'size': 1, 'pilot.gunnery': 4, 'pilot.piloting': 4, 'move.type': 'Walk'}
+
+# Form names that are not simply the field path with dots replaced by underscores
+FORM_NAMES = {'move.move': 'move_value', 'move.currentMove': 'move_current', 'move.type': 'move_type'}
+
+_EMPTY = {'string': '', 'integer': 0, 'number': 0, 'boolean': False, 'strings': (), 'integers': ()}
+
+
+class FormError(ValueError):
+    """Raised for a form value that cannot be turned into its field's type."""
+
+
+def _whole(text):
+    try:
+        number = float(text)
+    except ValueError:
+        raise FormError('must be a whole number') from None
+    if not number.is_integer():
+        raise FormError('must be a whole number')
+    return int(number)
+
+
+def _number(text):
+    try:
+        number = float(text)
+    except ValueError:
+        raise FormError('must be a number') from None
+    if not math.isfinite(number):
+        raise FormError('must be a number')
+    return int(number) if number.is_integer() else number
+
+
+def _items(text):
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+
+class FormField:
+    """One member field on the member form: its path in the member, form name, type and default.
+
+    ``path`` is a tuple of keys, with ``0`` standing for the first entry of a list
+    of objects, e.g. ``('move', 0, 'currentMove')``.
+    """
+
+    __slots__ = ('path', 'name', 'kind', 'default', 'required')
+
+    def __init__(self, path, kind, required=False):
+        dotted = '.'.join(key for key in path if isinstance(key, str))
+        self.path = path
+        self.name = FORM_NAMES.get(dotted, dotted.replace('.', '_'))
+        self.kind = kind
+        self.default = DEFAULTS.get(dotted, _EMPTY[kind])
+        self.required = required
+
+    def read(self, raw):
+        """Convert the submitted values for this field (``form.getlist(name)``) into its JSON value."""
+        if self.kind == 'boolean':
+            # Checkboxes are preceded by a hidden empty input, so an unticked box still reads as False
+            return 'on' in raw
+        text = raw[-1]
+        if not text.strip():
+            if self.required:
+                raise FormError('is required')
+            return text if self.kind == 'string' else self.empty()
+        if self.kind == 'string':
+            return text
+        text = text.strip()
+        if self.kind == 'integer':
+            return _whole(text)
+        if self.kind == 'number':
+            return _number(text)
+        if self.kind == 'strings':
+            return _items(text)
+        return [_whole(item) for item in _items(text)]
+
+    def empty(self):
+        """Return the default value, as a new list for list fields."""
+        return list(self.default) if isinstance(self.default, tuple) else self.default
+
+    def show(self, value):
+        """Return ``value`` as it is shown in the form."""
+        if value is None:
+            value = self.default
+        if self.kind in ('strings', 'integers'):
+            return ', '.join(str(item) for item in value)
+        return value
+
+
+def _kind(node):
+    kind = node.get('type')
+    if kind == 'array':
+        items = node.get('items', {}).get('type')
+        return {'string': 'strings', 'integer': 'integers'}.get(items)
+    return kind if kind in _EMPTY else None
+
+
+def _compile(properties, required, prefix=()):
+    for key, node in properties.items():
+        path = prefix + (key,)
+        if key in EXCLUDED and not prefix:
+            continue
+        items = node.get('items', {})
+        if node.get('type') == 'object' and 'properties' in node:
+            yield from _compile(node['properties'], set(node.get('required', [])) if key in required else set(), path)
+        elif node.get('type') == 'array' and items.get('type') == 'object' and 'properties' in items:
+            # Lists of objects (the move list) show their first entry on the form
+            yield from _compile(items['properties'], set(), path + (0,))
+        elif _kind(node) is not None:
+            yield FormField(path, _kind(node), required=key in required)
+
+
+def _get(data, path):
+    if data is None:
+        return None
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def _set(data, path, value):
+    for key, following in zip(path, path[1:]):
+        if isinstance(key, int):
+            while len(data) <= key:
+                data.append({})
+            data = data[key]
+        else:
+            data = data.setdefault(key, [] if isinstance(following, int) else {})
+    data[path[-1]] = value
+
+
+class MemberForm:
+    """The member add/edit form, compiled once from the member schema.
+
+    One table of :class:`FormField` drives reading a submitted form, checking
+    its values and filling the form from a member, so new schema fields such as
+    ``pilot.alphaStrikeAbilities`` work without further code. Fields the
+    submitted form does not contain are left as they are when editing and take
+    their default when adding. The first move is kept only while ``move_value``
+    has a value.
+    """
+
+    def __init__(self, member_schema):
+        self.fields = tuple(_compile(member_schema.get('properties', {}), set(member_schema.get('required', []))))
+        self.by_name = {field.name: field for field in self.fields}
+        # List key -> first field of the list's first entry, e.g. 'move' -> move_value
+        self.entries = {}
+        for field in self.fields:
+            if len(field.path) > 2 and field.path[1] == 0:
+                self.entries.setdefault(field.path[0], field)
+
+    @classmethod
+    def from_group_schema(cls, schema):
+        return cls(schema.get('properties', {}).get('members', {}).get('items', {}))
+
+    def parse(self, form, member=None):
+        """Return ``(data, errors)`` for a submitted ``form`` (a werkzeug ``MultiDict``).
+
+        ``data`` is the JSON form of ``member`` with the submitted fields
+        applied, or of a new member when ``member`` is None. ``errors`` maps form
+        names to messages; when it is not empty ``data`` should not be saved.
+        """
+        data = member.to_dict() if member is not None else {}
+        errors = {}
+        for field in self.fields:
+            raw = form.getlist(field.name)
+            if not raw:
+                if member is None:
+                    _set(data, field.path, field.empty())
+                continue
+            try:
+                _set(data, field.path, field.read(raw))
+            except FormError as e:
+                errors[field.name] = str(e)
+
+        # The first entry of an object list exists only while its first field is filled in
+        for key, field in self.entries.items():
+            if (member is None or field.name in form) and not form.get(field.name, '').strip():
+                entries = data.get(key)
+                if entries:
+                    del entries[0]
+
+        if member is None:
+            data = {key: data[key] for key in Member.KEYS if key in data} | data
+        return data, errors
+
+    def values(self, member=None, form=None):
+        """Return the form name -> shown value mapping for ``member`` (or a new member), overlaid with ``form``."""
+        values = {field.name: field.show(_get(member, field.path)) for field in self.fields}
+        if form is not None:
+            for name, field in self.by_name.items():
+                raw = form.getlist(name)
+                if raw:
+                    values[name] = 'on' in raw if field.kind == 'boolean' else raw[-1]
+        return values
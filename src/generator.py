@@ -0,0 +1,172 @@
+import argparse
+import copy
+import glob
+import os
+import random
+import sys
+import uuid as uuid_lib
+from datetime import datetime, timedelta
+
+from src import codec
+from src.persistence import write_json_atomic
+from src.validation import GroupValidator, format_error
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# class, variant, type, size, tonnage, role, tmm, move, jump, armor, structure, pv, (S, M, L, E)
+CHASSIS = [
+    ('Atlas', 'AS7-D', 'BM', 4, 100, 'Juggernaut', 1, 6, 0, 10, 8, 52, (5, 5, 2, 0)),
+    ('Locust', 'LCT-1V', 'BM', 1, 20, 'Scout', 3, 16, 0, 2, 2, 18, (1, 1, 0, 0)),
+    ('Hunchback', 'HBK-4G', 'BM', 2, 50, 'Juggernaut', 1, 8, 0, 5, 4, 23, (4, 3, 0, 0)),
+    ('Marauder', 'MAD-3R', 'BM', 3, 75, 'Sniper', 1, 8, 0, 6, 6, 37, (3, 3, 3, 0)),
+    ('Timber Wolf', 'Prime', 'BM', 3, 75, 'Brawler', 2, 10, 0, 8, 4, 54, (5, 5, 4, 0)),
+    ('Catapult', 'CPLT-C1', 'BM', 3, 65, 'Missile Boat', 1, 8, 8, 5, 5, 33, (2, 3, 2, 0)),
+    ('Shadow Hawk', 'SHD-2H', 'BM', 2, 55, 'Skirmisher', 2, 10, 6, 5, 5, 26, (2, 2, 1, 0)),
+    ('Warhammer', 'WHM-6R', 'BM', 3, 70, 'Brawler', 1, 8, 0, 6, 6, 35, (3, 3, 2, 0)),
+    ('Demolisher Heavy Tank', 'Standard', 'CV', 3, 80, 'Juggernaut', 0, 6, 0, 8, 4, 31, (5, 4, 0, 0)),
+    ('Asgard Missile VTOL', 'AG-12', 'CV', 1, 25, 'Missile Boat', 4, 20, 0, 2, 2, 21, (2, 2, 0, 0)),
+    ('Savannah Master Hovercraft', 'Standard', 'CV', 1, 5, 'Scout', 4, 20, 0, 1, 1, 11, (1, 0, 0, 0)),
+    ('Elemental Battle Armor', '[Laser]', 'BA', 1, 1, 'Ambusher', 1, 6, 6, 2, 1, 23, (2, 1, 0, 0)),
+]
+PILOT_NAMES = ['', 'Natasha', 'Kai', 'Morgan', 'Aidan', 'Victor', 'Jaime', 'Phelan', 'Anastasius', 'Isis', 'Ryan']
+ABILITIES = ['CASE', 'ENE', 'IF1', 'IF2', 'LRM1/1/1', 'REAR1/1/-', 'SRM2/2', 'TAG', 'ECM', 'PRB', 'MHQ1', 'OMNI']
+MOVE_TYPES = {'BM': '', 'CV': 'h', 'BA': 'j'}
+TRACKS = ('engineHits', 'fireControlHits', 'mpControlHits', 'weaponHits', 'vehicleMotive910', 'vehicleMotive11')
+TRACK_LENGTHS = {'engineHits': 2, 'fireControlHits': 4, 'mpControlHits': 5, 'weaponHits': 4}
+
+
+def load_templates(folder=SAMPLE_FOLDER):
+    """Return the members of the sample group files in ``folder``, used as the shape of generated members."""
+    templates = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.json'))):
+        try:
+            templates.extend(m for m in codec.load_file(path).get('members', []) if isinstance(m, dict))
+        except (OSError, ValueError):
+            continue
+    if not templates:
+        raise ValueError(f'No sample members found in {folder}')
+    return templates
+
+
+def _uuid(rng):
+    return str(uuid_lib.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _track(rng, length, hit_chance=0.2):
+    return [rng.random() < hit_chance for _ in range(length)]
+
+
+def generate_member(rng, templates):
+    """Return a random member shaped like one of ``templates``."""
+    member = copy.deepcopy(rng.choice(templates))
+    cls, variant, unit_type, size, tonnage, role, tmm, move, jump, armor, structure, pv, damage = rng.choice(CHASSIS)
+    gunnery = rng.choices([2, 3, 4, 5, 6], weights=[1, 3, 8, 3, 1])[0]
+
+    member.update(
+        {
+            'uuid': _uuid(rng),
+            'class': cls,
+            'variant': variant,
+            'name': f'{cls} {variant}',
+            'customName': rng.choice(['', '', f'{cls} {rng.randint(1, 99)}']),
+            'type': unit_type,
+            'size': size,
+            'tonnage': tonnage,
+            'role': role,
+            'tmm': tmm,
+            'jumpMove': jump,
+            'move': [{'move': move, 'currentMove': move, 'type': MOVE_TYPES[unit_type]}],
+            'armor': armor,
+            'structure': structure,
+            'basePoints': pv,
+            'currentSkill': gunnery,
+            'mulID': rng.randint(1, 9999),
+            'abilities': rng.sample(ABILITIES, rng.randint(0, 3)),
+            'currentHeat': rng.choice([0, 0, 0, 1, 2]),
+            'currentArmor': _track(rng, armor),
+            'currentStructure': _track(rng, structure),
+            'roundArmor': [False] * armor,
+            'roundStructure': [False] * structure,
+        }
+    )
+    member['damage'] = dict(
+        member.get('damage', {}),
+        short=damage[0],
+        medium=damage[1],
+        long=damage[2],
+        extreme=damage[3],
+    )
+    member['pilot'] = dict(
+        member.get('pilot', {}),
+        name=rng.choice(PILOT_NAMES),
+        gunnery=gunnery,
+        piloting=min(gunnery + rng.choice([0, 1, 1]), 7),
+        wounds=rng.choice([0, 0, 0, 1]),
+    )
+    for key in TRACKS:
+        length = TRACK_LENGTHS.get(key, 2)
+        member[key] = _track(rng, length, 0.1)
+        member[f'round{key[0].upper()}{key[1:]}'] = [False] * length
+    return member
+
+
+def generate_group(rng, member_count, templates, name=None):
+    """Return a group with ``member_count`` random members."""
+    updated = datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+    return {
+        'name': name or f'{rng.choice(["Alpha", "Bravo", "Charlie", "Delta", "Striker", "Command"])} Lance',
+        'uuid': _uuid(rng),
+        'lastUpdated': updated.isoformat(),
+        'formationBonus': rng.choice(['', 'Battle Lance', 'Striker Lance', 'Fire Lance']),
+        'groupLabel': rng.choice(['', 'Alpha', 'Reserve', 'Test']),
+        'members': [generate_member(rng, templates) for _ in range(member_count)],
+    }
+
+
+def write_groups(folder, files, members, seed=0, templates=None, prefix='generated'):
+    """Write ``files`` groups of ``members`` members each into ``folder`` and return their filenames.
+
+    The output depends only on ``seed``, so benchmark runs see the same data.
+    """
+    rng = random.Random(seed)
+    templates = templates or load_templates()
+    os.makedirs(folder, exist_ok=True)
+    width = len(str(files))
+    filenames = []
+    for number in range(files):
+        filename = f'{prefix}_{number:0{width}d}.json'
+        group = generate_group(rng, members, templates, name=f'Generated Group {number}')
+        write_json_atomic(os.path.join(folder, filename), group)
+        filenames.append(filename)
+    return filenames
+
+
+def main(argv=None):
+    """Command line generator: ``python -m src.generator --files 100 --members 50 OUT_FOLDER``."""
+    parser = argparse.ArgumentParser(prog='python -m src.generator', description='Generate synthetic group files.')
+    parser.add_argument('folder', help='folder to write the group files into')
+    parser.add_argument('--files', type=int, default=1, help='number of group files (default: 1)')
+    parser.add_argument('--members', type=int, default=10, help='members per group (default: 10)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--prefix', default='generated', help='filename prefix (default: generated)')
+    parser.add_argument('--validate', action='store_true', help='check every generated file against the schema')
+    args = parser.parse_args(argv)
+    if args.files < 1 or args.members < 0:
+        parser.error('--files must be at least 1 and --members at least 0')
+
+    filenames = write_groups(args.folder, args.files, args.members, seed=args.seed, prefix=args.prefix)
+
+    if args.validate:
+        validator = GroupValidator.from_file()
+        for filename in filenames:
+            errors = validator.validate(codec.load_file(os.path.join(args.folder, filename)))
+            if errors:
+                print(f'{filename}: {format_error(errors[0])}', file=sys.stderr)
+                return 1
+
+    print(f'Wrote {len(filenames)} file{"" if len(filenames) == 1 else "s"} of {args.members} members to {args.folder}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,517 @@
+import contextlib
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src import codec
+from src.models import Group
+from src.persistence import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+# Entries that start a new line of history, after which there is nothing left to redo
+_NEW_STATE_OPS = frozenset({'create', 'edit', 'external', 'upload', 'restore', 'delete', 'undelete'})
+
+# Changes recorded whenever a file is written, which are left out when nothing changed
+_WRITE_OPS = frozenset({'edit', 'external'})
+
+OP_LABELS = {
+    'create': 'Created',
+    'edit': 'Edited',
+    'external': 'Changed outside the editor',
+    'upload': 'Uploaded',
+    'undo': 'Undo',
+    'redo': 'Redo',
+    'restore': 'Restored',
+    'delete': 'Deleted',
+    'undelete': 'Restored from trash',
+}
+
+
+class HistoryError(Exception):
+    """Raised when an undo, redo or restore is not possible."""
+
+
+def diff(old, new):
+    """Return the operations that turn group ``old`` into group ``new`` (both plain dicts).
+
+    Members are matched by ``uuid``, so a change to one field of one member is a
+    single ``['set', ['members', uuid, field], value]`` operation. Other
+    operations are ``['del', path]``, ``['add', member]``, ``['remove', uuid]``
+    and ``['order', uuids]``. When member UUIDs are missing or repeated the
+    whole member list is set instead.
+    """
+    ops = []
+    for key in old.keys() - new.keys():
+        ops.append(['del', [key]])
+    for key, value in new.items():
+        if key == 'members' and key in old and _keyed(old[key]) and _keyed(value):
+            _diff_members(old[key], value, ops)
+        elif key not in old:
+            ops.append(['set', [key], value])
+        else:
+            _diff_value(old[key], value, [key], ops)
+    return ops
+
+
+def _keyed(members):
+    if not isinstance(members, list):
+        return False
+    if not all(isinstance(m, dict) and isinstance(m.get('uuid'), str) for m in members):
+        return False
+    return len({m['uuid'] for m in members}) == len(members)
+
+
+def _diff_value(old, new, path, ops):
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            ops.append(['del', path + [key]])
+        for key, value in new.items():
+            if key not in old:
+                ops.append(['set', path + [key], value])
+            else:
+                _diff_value(old[key], value, path + [key], ops)
+    else:
+        ops.append(['set', path, new])
+
+
+def _diff_members(old, new, ops):
+    old_by_uuid = {m['uuid']: m for m in old}
+    new_uuids = {m['uuid'] for m in new}
+    order = [m['uuid'] for m in old if m['uuid'] in new_uuids]
+    for uuid in old_by_uuid.keys() - new_uuids:
+        ops.append(['remove', uuid])
+    for member in new:
+        uuid = member['uuid']
+        if uuid in old_by_uuid:
+            _diff_value(old_by_uuid[uuid], member, ['members', uuid], ops)
+        else:
+            ops.append(['add', member])
+            order.append(uuid)
+    if order != [m['uuid'] for m in new]:
+        ops.append(['order', [m['uuid'] for m in new]])
+
+
+def apply(content, ops):
+    """Apply operations from :func:`diff` to the group dict ``content`` in place."""
+    members = None
+    for op in ops:
+        kind = op[0]
+        member_op = kind in ('add', 'remove', 'order') or (len(op[1]) > 1 and op[1][0] == 'members')
+        if member_op and members is None:
+            members = {m['uuid']: m for m in content.get('members', [])}
+        if kind == 'set' or kind == 'del':
+            path = op[1]
+            if len(path) > 1 and path[0] == 'members':
+                target, path = members[path[1]], path[2:]
+            else:
+                target = content
+            for key in path[:-1]:
+                target = target[key]
+            if kind == 'set':
+                target[path[-1]] = copy.deepcopy(op[2])
+            else:
+                del target[path[-1]]
+            if path == ['members']:
+                members = None
+        elif kind == 'add':
+            member = copy.deepcopy(op[1])
+            content.setdefault('members', []).append(member)
+            members[member['uuid']] = member
+        elif kind == 'remove':
+            removed = members.pop(op[1])
+            content['members'] = [m for m in content['members'] if m is not removed]
+        elif kind == 'order':
+            content['members'] = [members[uuid] for uuid in op[1]]
+    return content
+
+
+def describe(entry):
+    """Return a short description of the change a journal entry made."""
+    if 'snapshot' in entry and 'diff' not in entry:
+        return 'Full copy of the group'
+    ops = entry.get('diff', [])
+    added = sum(op[0] == 'add' for op in ops)
+    removed = sum(op[0] == 'remove' for op in ops)
+    changed = {op[1][1] for op in ops if op[0] in ('set', 'del') and len(op[1]) > 2 and op[1][0] == 'members'}
+    fields = {op[1][0] for op in ops if op[0] in ('set', 'del') and (op[1][0] != 'members' or len(op[1]) == 1)}
+    parts = []
+    if fields:
+        parts.append(', '.join(sorted(fields)))
+    for count, what in ((added, 'added'), (removed, 'removed'), (len(changed), 'changed')):
+        if count:
+            parts.append(f'{count} member{"" if count == 1 else "s"} {what}')
+    if any(op[0] == 'order' for op in ops):
+        parts.append('members reordered')
+    return '; '.join(parts) or 'No changes'
+
+
+def _state(entry):
+    return entry.get('state', entry['v'])
+
+
+class _Head:
+    """The latest state of a journal, kept so a new entry can be diffed without replaying the file."""
+
+    __slots__ = ('content', 'v', 'op', 'since_snapshot', 'count', 'first_time', 'size')
+
+    def __init__(self, content, v, op, since_snapshot, count, first_time, size):
+        self.content = content
+        self.v = v
+        self.op = op
+        self.since_snapshot = since_snapshot
+        self.count = count
+        self.first_time = first_time
+        self.size = size
+
+
+class GroupHistory:
+    """Append-only change journal for every group in a folder, with undo, redo, restore and soft delete.
+
+    Each group has a journal ``<folder>/.history/<filename>.jsonl`` with one JSON
+    entry per line. An entry holds the :func:`diff` from the previous state, or,
+    every ``snapshot_interval`` entries, a full ``snapshot`` so that replaying
+    any version starts close by. History therefore grows with the size of the
+    changes rather than of the group.
+
+    :meth:`record` is registered as a repository listener and journals every
+    write. Undo, redo and restore are themselves saved through the repository
+    inside :meth:`label`, which names the entry they create. A deleted group
+    keeps its journal, whose last entry holds its final state, and can be
+    brought back from the trash.
+
+    Journals longer than ``max_entries`` are compacted: older entries are
+    folded into a snapshot, as are entries older than ``retention_days``, and
+    trashed groups are purged after ``retention_days``. Callers must hold the
+    repository's lock for the file.
+    """
+
+    def __init__(self, folder, snapshot_interval=50, max_entries=200, retention_days=30, enabled=True, max_heads=64):
+        self.folder = os.path.join(folder, '.history')
+        self.data_folder = folder
+        self.snapshot_interval = max(snapshot_interval, 1)
+        self.max_entries = max(max_entries, 1)
+        self.retention = retention_days * 86400 if retention_days else None
+        self.enabled = enabled
+        self.max_heads = max_heads
+        self._lock = threading.Lock()
+        self._heads = OrderedDict()
+        self._labels = {}
+
+    def path(self, filename):
+        return os.path.join(self.folder, f'{filename}.jsonl')
+
+    @contextlib.contextmanager
+    def label(self, filename, op, **fields):
+        """Make the next entry recorded for ``filename`` an ``op`` entry carrying ``fields``."""
+        with self._lock:
+            self._labels[filename] = (op, fields)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._labels.pop(filename, None)
+
+    def record(self, filename, group, st=None):
+        """Journal ``group`` as the new content of ``filename``; a repository listener."""
+        if not self.enabled:
+            return
+        # A detached copy, so later in-place edits of the group cannot change the recorded state
+        content = codec.loads(codec.dumps(group.to_dict() if isinstance(group, Group) else group, indent=False))
+        with self._lock:
+            op, fields = self._labels.pop(filename, None) or ('edit', {})
+        self._record(filename, content, op, fields)
+
+    def _record(self, filename, content, op, fields):
+        head = self._head(filename)
+        now = round(time.time(), 3)
+
+        if head is None:
+            entry = {'v': 0, 't': now, 'op': 'create' if op in _WRITE_OPS else op, 'snapshot': content}
+        else:
+            if op in _WRITE_OPS and head.op == 'delete':
+                op = 'create'
+            ops = diff(head.content, content)
+            if not ops and op in _WRITE_OPS:
+                return
+            entry = {'v': head.v + 1, 't': now, 'op': op, **fields}
+            if entry.get('state') == entry['v']:
+                del entry['state']
+            if head.since_snapshot + 1 >= self.snapshot_interval:
+                entry['snapshot'] = content
+            else:
+                entry['diff'] = ops
+        self._append(filename, entry, content, head)
+
+    def record_file(self, filename, op='upload'):
+        """Journal the group file ``filename`` as it is now on disk, e.g. after an upload replaced it.
+
+        Raises :class:`HistoryError` if the file is not valid JSON.
+        """
+        if not self.enabled:
+            return
+        try:
+            content = codec.load_file(os.path.join(self.data_folder, filename))
+        except FileNotFoundError:
+            return
+        except ValueError:
+            raise HistoryError(f'"{filename}" is not valid JSON') from None
+        self._record(filename, content, op, {})
+
+    def baseline(self, filename):
+        """Journal the file ``filename`` as it is before its first recorded change; a repository listener.
+
+        Groups that were in the folder before history was kept, or were put there
+        by other tools, then have their original content to go back to.
+        """
+        with self._lock:
+            if filename in self._heads:
+                return
+        if self.enabled and not os.path.exists(self.path(filename)):
+            try:
+                self.record_file(filename, 'create')
+            except HistoryError:
+                logger.warning('Not recording %s in its history: the file is not valid JSON', filename)
+
+    def entries(self, filename):
+        """Return the journal entries of ``filename``, oldest first; an empty list without history."""
+        try:
+            with open(self.path(filename), 'rb') as f:
+                return [codec.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def content_at(self, entries, v):
+        """Return the group as it was after entry ``v`` of ``entries``.
+
+        The entries' snapshots are reused rather than copied, so ``entries`` must
+        not be used again afterwards.
+        """
+        start = None
+        for index, entry in enumerate(entries):
+            if entry['v'] > v:
+                break
+            if 'snapshot' in entry:
+                start = index
+        if start is None or not any(entry['v'] == v for entry in entries):
+            raise HistoryError(f'Version {v} is no longer in the history')
+
+        content = entries[start]['snapshot']
+        for entry in entries[start + 1 :]:
+            if entry['v'] > v:
+                break
+            apply(content, entry['diff'])
+        return content
+
+    def undo_target(self, entries):
+        """Return ``(v, state)``: the entry whose content an undo goes back to and its state, or None."""
+        if not entries or entries[-1]['op'] == 'delete':
+            return None
+        state = _state(entries[-1])
+        by_v = {entry['v']: entry for entry in entries}
+        previous = by_v.get(state - 1)
+        return None if previous is None else (previous['v'], _state(previous))
+
+    def redo_target(self, entries):
+        """Return the state a redo goes forward to, or None."""
+        undone = []
+        for entry in entries:
+            if entry['op'] == 'undo':
+                undone.append(entry['undone'])
+            elif entry['op'] == 'redo':
+                if undone:
+                    undone.pop()
+            elif entry['op'] in _NEW_STATE_OPS:
+                undone.clear()
+        return undone[-1] if undone else None
+
+    def current_state(self, entries):
+        return _state(entries[-1]) if entries else None
+
+    def undo(self, filename):
+        """Return ``(content, fields)`` for undoing the last change to ``filename``.
+
+        Save the content inside ``label(filename, 'undo', **fields)``.
+        """
+        entries = self.entries(filename)
+        target = self.undo_target(entries)
+        if target is None:
+            raise HistoryError('There is nothing to undo')
+        return self.content_at(entries, target[0]), {'undone': _state(entries[-1]), 'state': target[1]}
+
+    def redo(self, filename):
+        """Return ``(content, fields)`` for redoing the last undone change to ``filename``."""
+        entries = self.entries(filename)
+        state = self.redo_target(entries)
+        if state is None:
+            raise HistoryError('There is nothing to redo')
+        return self.content_at(entries, state), {'state': state}
+
+    def restore(self, filename, v=None, at=None):
+        """Return ``(content, fields)`` for going back to version ``v``, or to the version current at time ``at``."""
+        entries = self.entries(filename)
+        if at is not None:
+            earlier = [entry['v'] for entry in entries if entry['t'] <= at]
+            if not earlier:
+                raise HistoryError('The history does not go back that far')
+            v = earlier[-1]
+        return self.content_at(entries, v), {'target': v}
+
+    def undelete(self, filename):
+        """Return ``(content, fields)`` for bringing ``filename`` back from the trash."""
+        entries = self.entries(filename)
+        if not entries or entries[-1]['op'] != 'delete':
+            raise HistoryError(f'"{filename}" is not in the trash')
+        return self.content_at(entries, entries[-1]['v']), {}
+
+    def in_trash(self, filename):
+        """Return True if ``filename`` was deleted and its last state can still be brought back."""
+        if os.path.exists(os.path.join(self.data_folder, filename)):
+            return False
+        last = self._last_entry(filename)
+        return last is not None and last['op'] == 'delete'
+
+    def deleted(self):
+        """Return ``[(filename, deleted_at)]`` for groups in the trash, purging those past retention."""
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return []
+        deleted = []
+        now = time.time()
+        for name in names:
+            if not name.endswith('.jsonl'):
+                continue
+            filename = name[: -len('.jsonl')]
+            if os.path.exists(os.path.join(self.data_folder, filename)):
+                continue
+            last = self._last_entry(filename)
+            if last is None or last['op'] != 'delete':
+                continue
+            if self.retention is not None and now - last['t'] > self.retention:
+                self.purge(filename)
+                continue
+            deleted.append((filename, last['t']))
+        return sorted(deleted, key=lambda item: item[1], reverse=True)
+
+    def rename(self, filename, new_filename):
+        """Move the history of ``filename`` along with the file.
+
+        Raises :class:`HistoryError` if ``new_filename`` has a history of its
+        own, such as a group of that name in the trash.
+        """
+        if new_filename != filename and os.path.exists(self.path(new_filename)):
+            raise HistoryError(f'"{new_filename}" still has a history; restore it from the trash or remove it for good')
+        with self._lock:
+            self._heads.pop(filename, None)
+            self._heads.pop(new_filename, None)
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(self.path(filename), self.path(new_filename))
+
+    def purge(self, filename):
+        """Remove the history of ``filename`` for good."""
+        with self._lock:
+            self._heads.pop(filename, None)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path(filename))
+
+    def _last_entry(self, filename):
+        try:
+            with open(self.path(filename), 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                # Entries can be large; read backwards until the last complete line is in the buffer
+                block = 4096
+                while True:
+                    start = max(end - block, 0)
+                    f.seek(start)
+                    data = f.read(end - start).rstrip(b'\n')
+                    newline = data.rfind(b'\n')
+                    if newline >= 0 or start == 0:
+                        return codec.loads(data[newline + 1 :]) if data else None
+                    block *= 4
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _head(self, filename):
+        path = self.path(filename)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._heads.pop(filename, None)
+            return None
+        with self._lock:
+            head = self._heads.get(filename)
+            if head is not None and head.size == size:
+                self._heads.move_to_end(filename)
+                return head
+
+        # Not cached, or another process appended to the journal
+        entries = self.entries(filename)
+        if not entries:
+            return None
+        since_snapshot = next(
+            (count for count, entry in enumerate(reversed(entries)) if 'snapshot' in entry), len(entries)
+        )
+        last = entries[-1]
+        content = self.content_at(entries, last['v'])
+        head = _Head(content, last['v'], last['op'], since_snapshot, len(entries), entries[0]['t'], size)
+        self._keep(filename, head)
+        return head
+
+    def _append(self, filename, entry, content, head):
+        os.makedirs(self.folder, exist_ok=True)
+        line = codec.dumps(entry, indent=False) + b'\n'
+        with open(self.path(filename), 'ab') as f:
+            f.write(line)
+            size = f.tell()
+        if head is None:
+            head = _Head(content, entry['v'], entry['op'], 0, 1, entry['t'], size)
+        else:
+            head = _Head(
+                content,
+                entry['v'],
+                entry['op'],
+                0 if 'snapshot' in entry else head.since_snapshot + 1,
+                head.count + 1,
+                head.first_time,
+                size,
+            )
+        self._keep(filename, head)
+
+        expired = self.retention is not None and entry['t'] - head.first_time > self.retention
+        # Allow some slack so that compaction, which rewrites the journal, runs only now and then
+        if head.count > self.max_entries + max(self.max_entries // 4, 1) or (expired and head.count > 1):
+            self.compact(filename)
+
+    def compact(self, filename):
+        """Fold entries beyond ``max_entries`` or older than the retention period into one snapshot."""
+        entries = self.entries(filename)
+        keep = max(len(entries) - self.max_entries, 0)
+        if self.retention is not None:
+            cutoff = time.time() - self.retention
+            while keep < len(entries) - 1 and entries[keep]['t'] < cutoff:
+                keep += 1
+        if keep == 0:
+            return
+
+        first = dict(entries[keep])
+        first.pop('diff', None)
+        first['snapshot'] = self.content_at(entries, first['v'])
+        kept = [first] + entries[keep + 1 :]
+        write_bytes_atomic(self.path(filename), b''.join(codec.dumps(entry, indent=False) + b'\n' for entry in kept))
+        with self._lock:
+            self._heads.pop(filename, None)
+
+    def _keep(self, filename, head):
+        with self._lock:
+            self._heads[filename] = head
+            self._heads.move_to_end(filename)
+            while len(self._heads) > self.max_heads:
+                self._heads.popitem(last=False)
@@ -0,0 +1,257 @@
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+
+from flask import Response, before_render_template, current_app, g, request, template_rendered
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'jeffjsoneditor'
+
+# Upper bounds in seconds, from half a millisecond to ten seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Spans recorded outside a request, e.g. deferred writes flushed by a timer thread
+BACKGROUND = 'background'
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations, one series per label tuple."""
+
+    def __init__(self, name, documentation, labels, buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label_values, value):
+        # Caller holds the registry lock
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {self.documentation}')
+        lines.append(f'# TYPE {self.name} histogram')
+        for label_values, (counts, total) in sorted(self._series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+
+
+class Counter:
+    """Monotonic counter, one series per label tuple."""
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        # Caller holds the registry lock
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {self.documentation}')
+        lines.append(f'# TYPE {self.name} counter')
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{{{_labels(self.labels, label_values)}}} {value}')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Registry:
+    """The app's request and span metrics, rendered in the Prometheus text format.
+
+    ``collectors`` are callables returning ``(name, type, help, value)`` tuples
+    for figures kept elsewhere, such as the group cache counters; they are read
+    when the metrics are rendered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(f'{PREFIX}_requests_total', 'Requests handled.', ('route', 'method', 'status'))
+        self.latency = Histogram(f'{PREFIX}_request_duration_seconds', 'Request latency by route.', ('route', 'method'))
+        self.spans = Histogram(
+            f'{PREFIX}_span_duration_seconds',
+            'Time spent in each phase of a request: read, parse, validate, mutate, serialize, write, render.',
+            ('route', 'span'),
+        )
+        self.collectors = []
+
+    def observe_request(self, route, method, status, seconds):
+        with self._lock:
+            self.requests.inc((route, method, str(status)))
+            self.latency.observe((route, method), seconds)
+
+    def observe_span(self, route, name, seconds):
+        with self._lock:
+            self.spans.observe((route, name), seconds)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for metric in (self.requests, self.latency, self.spans):
+                metric.render(lines)
+        for collector in self.collectors:
+            for name, kind, documentation, value in collector():
+                lines.append(f'# HELP {PREFIX}_{name} {documentation}')
+                lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+                lines.append(f'{PREFIX}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Per-request state: route name and the span durations recorded so far
+_request = contextvars.ContextVar('request_spans', default=None)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time the enclosed block as span ``name`` of the current request (or of background work)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def record_span(name, seconds):
+    state = _request.get()
+    if state is None:
+        registry.observe_span(BACKGROUND, name, seconds)
+        return
+    state['spans'][name] = state['spans'].get(name, 0.0) + seconds
+
+
+class RequestMetrics:
+    """Flask hooks that time every request and its spans and serve them at ``/metrics``.
+
+    Time in the view not covered by another span is recorded as ``mutate`` for
+    requests that change data and as ``handler`` for GET requests. With
+    ``PROFILE_REQUESTS`` enabled, adding ``?profile=1`` to a URL returns a
+    profile of that request instead of its response, from pyinstrument when it
+    is installed and ``PROFILER`` allows it, otherwise from cProfile. Requests
+    slower than ``SLOW_REQUEST_SECONDS`` are logged with their spans.
+    """
+
+    def __init__(self, app=None, registry=registry):
+        self.registry = registry
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_REQUESTS', False)
+        app.config.setdefault('PROFILER', 'auto')
+        app.config.setdefault('SLOW_REQUEST_SECONDS', 1.0)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def metrics_view(self):
+        return Response(self.registry.render(), mimetype='text/plain; version=0.0.4')
+
+    def _before_request(self):
+        g.metrics_token = _request.set({'started': time.perf_counter(), 'spans': {}})
+        if request.args.get('profile') and current_app.config['PROFILE_REQUESTS']:
+            g.profiler = self._start_profiler()
+
+    def _after_request(self, response):
+        state = _request.get()
+        if state is None:
+            return response
+        elapsed = time.perf_counter() - state['started']
+        route = request.endpoint or 'unmatched'
+        spans = state['spans']
+        spans['mutate' if request.method not in ('GET', 'HEAD') else 'handler'] = max(
+            elapsed - sum(spans.values()), 0.0
+        )
+
+        self.registry.observe_request(route, request.method, response.status_code, elapsed)
+        for name, seconds in spans.items():
+            self.registry.observe_span(route, name, seconds)
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.2f}' for name, seconds in (*spans.items(), ('total', elapsed))
+        )
+        if elapsed >= current_app.config['SLOW_REQUEST_SECONDS']:
+            logger.warning(
+                'Slow request %s %s took %.3fs (%s)',
+                request.method,
+                request.path,
+                elapsed,
+                ', '.join(f'{name} {seconds:.3f}s' for name, seconds in spans.items()),
+            )
+        _request.reset(g.pop('metrics_token'))
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            return self._profile_response(profiler)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request is skipped when a request fails before a response exists
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            _request.reset(token)
+        profiler = g.pop('profiler', None)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        elif profiler is not None:
+            profiler.stop()
+
+    def _before_render(self, app, template, context, **extra):
+        state = _request.get()
+        if state is not None:
+            state.setdefault('render_started', []).append(time.perf_counter())
+
+    def _after_render(self, app, template, context, **extra):
+        state = _request.get()
+        if state is not None and state.get('render_started'):
+            record_span('render', time.perf_counter() - state['render_started'].pop())
+
+    def _start_profiler(self):
+        if pyinstrument is not None and current_app.config['PROFILER'] in ('auto', 'pyinstrument'):
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _profile_response(self, profiler):
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(50)
+            return Response(out.getvalue(), mimetype='text/plain')
+        profiler.stop()
+        return Response(profiler.output_html(), mimetype='text/html')
@@ -0,0 +1,472 @@
+import copy
+import functools
+import uuid as uuid_lib
+from collections.abc import MutableMapping
+
+# Interned key orders, so records read from files with the same layout share one tuple
+_ORDERS = {}
+
+
+def _intern_order(keys):
+    keys = tuple(keys)
+    return _ORDERS.setdefault(keys, keys)
+
+
+def pack_flags(flags):
+    """Pack a list of booleans into an int, with a marker bit above the last flag recording the length."""
+    bits = 1 << len(flags)
+    for position, flag in enumerate(flags):
+        if flag:
+            bits |= 1 << position
+    return bits
+
+
+def unpack_flags(bits):
+    """Inverse of :func:`pack_flags`."""
+    return list(_unpack(bits))
+
+
+# Most tracks in a group share a handful of values (all clear, one or two boxes marked)
+@functools.lru_cache(maxsize=4096)
+def _unpack(bits):
+    return tuple(bool(bits >> position & 1) for position in range(bits.bit_length() - 1))
+
+
+def _slot_names(keys, tracks=()):
+    # 'class' is a keyword, and tracks hold packed ints that must be decoded, so
+    # neither can be read directly as an attribute (templates fall back to [key]).
+    names = []
+    for key in keys:
+        if key in tracks:
+            names.append(f'{key}_bits')
+        elif key == 'class':
+            names.append('class_')
+        else:
+            names.append(key)
+    return tuple(names)
+
+
+# How to_dict reads each slot
+_PLAIN, _TRACK, _NESTED = range(3)
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    """Base for the compact member models: a slotted object that behaves like its JSON dict.
+
+    Each known JSON key in ``KEYS`` has its own slot; unknown keys are kept in
+    ``_extra`` so files round-trip unchanged, and so does the key order. Keys in
+    ``TRACKS`` (lists of booleans such as crit tracks) are stored as packed ints
+    and come back as fresh lists, so change them by assigning the whole list.
+    Keys in ``NESTED`` hold another record built from the nested object.
+    """
+
+    __slots__ = ('_extra', '_order')
+    KEYS = ()
+    TRACKS = frozenset()
+    NESTED = {}
+    _SLOTS = {}
+    _FIELDS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._SLOTS = dict(zip(cls.KEYS, _slot_names(cls.KEYS, cls.TRACKS)))
+        cls._FIELDS = {
+            key: (slot, _TRACK if key in cls.TRACKS else _NESTED if key in cls.NESTED else _PLAIN)
+            for key, slot in cls._SLOTS.items()
+        }
+
+    def __init__(self, data=()):
+        self._extra = None
+        self._order = None
+        if data:
+            order = tuple(data)
+            if order != self.KEYS:
+                self._order = _intern_order(order)
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    def __getitem__(self, key):
+        slot = self._SLOTS.get(key)
+        if slot is None:
+            if self._extra is None:
+                raise KeyError(key)
+            return self._extra[key]
+
+        try:
+            value = getattr(self, slot)
+        except AttributeError:
+            raise KeyError(key) from None
+        if key in self.TRACKS:
+            # Anything that was not a list of booleans is kept as is, wrapped in a tuple
+            return unpack_flags(value) if type(value) is int else value[0]
+        return value
+
+    def __setitem__(self, key, value):
+        if self._order is not None and key not in self._order:
+            self._order = _intern_order(self._order + (key,))
+
+        slot = self._SLOTS.get(key)
+        if slot is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+            return
+
+        if key in self.TRACKS:
+            if isinstance(value, list) and all(type(flag) is bool for flag in value):
+                value = pack_flags(value)
+            else:
+                value = (value,)
+        elif key in self.NESTED and isinstance(value, dict):
+            value = self.NESTED[key](value)
+        setattr(self, slot, value)
+
+    def __delitem__(self, key):
+        slot = self._SLOTS.get(key)
+        if slot is None:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+            return
+        try:
+            delattr(self, slot)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        slot = self._SLOTS.get(key)
+        if slot is None:
+            return self._extra is not None and key in self._extra
+        return hasattr(self, slot)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        order = self._order or self.KEYS
+        keys = [key for key in order if key in self]
+        if self._order is None and self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def __or__(self, other):
+        return self.to_dict() | dict(other)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """Return a deep copy. Packed tracks are plain ints, so they are shared rather than copied."""
+        clone = object.__new__(type(self))
+        clone._order = self._order
+        clone._extra = copy.deepcopy(self._extra)
+        for slot in self._SLOTS.values():
+            try:
+                value = getattr(self, slot)
+            except AttributeError:
+                continue
+            if isinstance(value, Record):
+                value = value.copy()
+            elif isinstance(value, (list, dict, tuple)):
+                value = copy.deepcopy(value)
+            setattr(clone, slot, value)
+        return clone
+
+    def to_dict(self):
+        """Return the JSON wire form of this record."""
+        # Runs for every member on every save, so slots are read directly rather than through keys() and __getitem__
+        result = {}
+        fields = self._FIELDS
+        extra = self._extra
+        for key in self._order or self.KEYS:
+            field = fields.get(key)
+            if field is None:
+                if extra is not None and key in extra:
+                    result[key] = extra[key]
+                continue
+            value = getattr(self, field[0], _MISSING)
+            if value is _MISSING:
+                continue
+            if field[1] == _TRACK:
+                value = list(_unpack(value)) if type(value) is int else value[0]
+            elif field[1] == _NESTED and isinstance(value, Record):
+                value = value.to_dict()
+            result[key] = value
+        if self._order is None and extra:
+            result.update(extra)
+        return result
+
+
+class Pilot(Record):
+    KEYS = ('name', 'piloting', 'gunnery', 'wounds', 'alphaStrikeAbilities')
+    __slots__ = _slot_names(KEYS)
+
+
+class Damage(Record):
+    KEYS = ('short', 'medium', 'long', 'extreme', 'shortMinimal', 'mediumMinimal', 'longMinimal', 'extremeMinimal')
+    __slots__ = _slot_names(KEYS)
+
+
+class Member(Record):
+    """A group member. Key order follows the Jeff's BT Tools export."""
+
+    KEYS = (
+        'mechCreatorUUID',
+        'customName',
+        'currentArmor',
+        'currentStructure',
+        'engineHits',
+        'fireControlHits',
+        'mpControlHits',
+        'weaponHits',
+        'vehicleMotive910',
+        'vehicleMotive11',
+        'vehicleMotive12',
+        'roundArmor',
+        'roundStructure',
+        'roundEngineHits',
+        'roundFireControlHits',
+        'roundMpControlHits',
+        'roundWeaponHits',
+        'roundVehicleMotive910',
+        'roundVehicleMotive11',
+        'roundVehicleMotive12',
+        'roundHeat',
+        'classification',
+        'class',
+        'costCR',
+        'mulID',
+        'currentHeat',
+        'damage',
+        'variant',
+        'dateIntroduced',
+        'name',
+        'tmm',
+        'tonnage',
+        'tro',
+        'role',
+        'threshold',
+        'pilot',
+        'imageURL',
+        'move',
+        'jumpMove',
+        'structure',
+        'armor',
+        'type',
+        'size',
+        'showDetails',
+        'abilities',
+        'overheat',
+        'basePoints',
+        'currentSkill',
+        'uuid',
+    )
+    TRACKS = frozenset(
+        {
+            'currentArmor',
+            'currentStructure',
+            'engineHits',
+            'fireControlHits',
+            'mpControlHits',
+            'weaponHits',
+            'vehicleMotive910',
+            'vehicleMotive11',
+            'roundArmor',
+            'roundStructure',
+            'roundEngineHits',
+            'roundFireControlHits',
+            'roundMpControlHits',
+            'roundWeaponHits',
+            'roundVehicleMotive910',
+            'roundVehicleMotive11',
+        }
+    )
+    NESTED = {'pilot': Pilot, 'damage': Damage}
+    __slots__ = _slot_names(KEYS, TRACKS)
+
+
+def as_member(member):
+    """Return ``member`` as a :class:`Member`, converting a plain dict."""
+    return Member(member) if isinstance(member, dict) else member
+
+
+class Group:
+    """A parsed group file with an index from member UUID to position in ``members``.
+
+    The parsed JSON object is kept in ``data`` and item access is passed through
+    to it, so ``group['name']`` and ``{{ group.name }}`` in templates work as they
+    did on the plain dict. Members are held as :class:`Member` records; use
+    :meth:`to_dict` for the JSON form. Members must be added, removed and
+    reordered through the methods below so the index stays in step with the list.
+
+    Inserting, removing or moving a member shifts the members after it, which
+    is O(n) in the list itself. The index is not rebuilt then: positions from
+    the first shifted one on are marked stale and rebuilt on the next lookup
+    that needs them, so a run of changes costs one rebuild and lookups of
+    members before the shifted ones cost none.
+    """
+
+    __slots__ = ('data', '_positions', '_stale')
+
+    def __init__(self, data):
+        self.data = data
+        data['members'] = [as_member(member) for member in data.get('members', [])]
+        self._stale = None
+        self.reindex()
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        if key == 'members':
+            value = [as_member(member) for member in value]
+        self.data[key] = value
+        if key == 'members':
+            self.reindex()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    @property
+    def members(self):
+        return self.data['members']
+
+    def reindex(self, start=0):
+        """Rebuild the UUID index for members from position ``start`` onwards, and from any stale position."""
+        if self._stale is not None:
+            start = min(start, self._stale)
+            self._stale = None
+        positions = self._positions if start else {}
+        members = self.data['members']
+        seen = set()
+        for position in range(start, len(members)):
+            member_uuid = members[position].get('uuid')
+            # Keep the first occurrence if a file contains a UUID twice
+            if member_uuid in seen:
+                continue
+            seen.add(member_uuid)
+            current = positions.get(member_uuid)
+            if current is None or current >= start:
+                positions[member_uuid] = position
+        self._positions = positions
+
+    def _shifted(self, position):
+        """Mark the index stale from ``position`` on, after the members there moved."""
+        if self._stale is None or position < self._stale:
+            self._stale = position
+
+    def _position(self, member_uuid):
+        position = self._positions.get(member_uuid)
+        # Positions before the first shifted member are still right
+        if self._stale is not None and (position is None or position >= self._stale):
+            self.reindex(self._stale)
+            position = self._positions.get(member_uuid)
+        return position
+
+    def index_of(self, member_uuid):
+        """Return the position of the member with ``member_uuid``, or None."""
+        return self._position(member_uuid)
+
+    def find(self, member_uuid):
+        """Return the member with ``member_uuid``, or None."""
+        position = self._position(member_uuid)
+        return None if position is None else self.data['members'][position]
+
+    def add(self, member):
+        """Append ``member`` and return it."""
+        member = as_member(member)
+        members = self.data['members']
+        members.append(member)
+        self._positions.setdefault(member.get('uuid'), len(members) - 1)
+        return member
+
+    def insert(self, position, member):
+        """Insert ``member`` at ``position`` and return it."""
+        member = as_member(member)
+        members = self.data['members']
+        position = max(0, min(position, len(members)))
+        members.insert(position, member)
+        self._shifted(position)
+        return member
+
+    def replace(self, member_uuid, member):
+        """Put ``member`` in the place of the member with ``member_uuid``. Returns the old member or None."""
+        position = self._position(member_uuid)
+        if position is None:
+            return None
+
+        members = self.data['members']
+        old = members[position]
+        members[position] = member = as_member(member)
+        if member.get('uuid') != member_uuid:
+            del self._positions[member_uuid]
+            # Either UUID may belong to another member too; the next lookup sorts out which comes first
+            self._shifted(position)
+        return old
+
+    def remove(self, member_uuid):
+        """Remove the member with ``member_uuid``. Returns the removed member or None."""
+        position = self._position(member_uuid)
+        if position is None:
+            return None
+
+        del self._positions[member_uuid]
+        removed = self.data['members'].pop(position)
+        self._shifted(position)
+        return removed
+
+    def duplicate(self, member_uuid, suffix=' (Copy)'):
+        """Append a copy of the member with ``member_uuid`` under a new UUID. Returns the copy or None."""
+        source = self.find(member_uuid)
+        if source is None:
+            return None
+
+        member = source.copy() if isinstance(source, Member) else copy.deepcopy(source)
+        member['uuid'] = str(uuid_lib.uuid4())
+        if member.get('name'):
+            member['name'] = f'{member["name"]}{suffix}'
+        return self.add(member)
+
+    def move(self, member_uuid, position):
+        """Move the member with ``member_uuid`` to ``position``. Returns False if it does not exist."""
+        current = self._position(member_uuid)
+        if current is None:
+            return False
+
+        members = self.data['members']
+        position = max(0, min(position, len(members) - 1))
+        members.insert(position, members.pop(current))
+        self._shifted(min(current, position))
+        return True
+
+    def regenerate_member_uuids(self):
+        """Give every member a fresh UUID, as done when copying a group."""
+        for member in self.data['members']:
+            member['uuid'] = str(uuid_lib.uuid4())
+        self.reindex()
+
+    def copy(self):
+        """Return a deep copy of the group."""
+        data = {key: copy.deepcopy(value) for key, value in self.data.items() if key != 'members'}
+        data['members'] = [copy.deepcopy(member) for member in self.data['members']]
+        return Group(data)
+
+    def to_dict(self):
+        """Return the group as plain JSON data, with keys in their original order."""
+        data = dict(self.data)
+        data['members'] = [member.to_dict() if isinstance(member, Record) else member for member in data['members']]
+        return data
@@ -0,0 +1,197 @@
+import copy
+
+JSON_PATCH = 'application/json-patch+json'
+MERGE_PATCH = 'application/merge-patch+json'
+
+
+class PatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied."""
+
+
+class PatchTestFailed(PatchError):
+    """Raised when a JSON Patch ``test`` operation does not match."""
+
+
+def parse_pointer(pointer):
+    """Split an RFC 6901 JSON pointer into its unescaped reference tokens."""
+    if not isinstance(pointer, str):
+        raise PatchError('path must be a string')
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError(f'invalid JSON pointer {pointer!r}')
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _index(container, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f'invalid array index {token!r}')
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f'array index {index} out of range')
+    return index
+
+
+def _json_equal(a, b):
+    # Python treats True == 1 and 1 == 1.0; JSON only the latter
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+class _Patcher:
+    """Applies operations without modifying the input document.
+
+    Before a container is changed it is replaced by a shallow copy, and so is
+    every container on the way to it from the root. Unchanged parts of the
+    document are shared between the input and the result.
+    """
+
+    def __init__(self, doc):
+        self.root = doc
+        self._owned = set()
+
+    def _own(self, container):
+        if id(container) in self._owned:
+            return container
+        container = dict(container) if isinstance(container, dict) else list(container)
+        self._owned.add(id(container))
+        return container
+
+    def get(self, tokens):
+        node = self.root
+        for token in tokens:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise PatchError(f'path /{"/".join(tokens)} does not exist')
+                node = node[token]
+            elif isinstance(node, list):
+                node = node[_index(node, token)]
+            else:
+                raise PatchError(f'path /{"/".join(tokens)} does not exist')
+        return node
+
+    def _parent(self, tokens):
+        if not isinstance(self.root, (dict, list)):
+            raise PatchError(f'path /{"/".join(tokens)} does not exist')
+        self.root = node = self._own(self.root)
+        for token in tokens[:-1]:
+            key = token if isinstance(node, dict) else _index(node, token)
+            if isinstance(node, dict) and key not in node:
+                raise PatchError(f'path /{"/".join(tokens)} does not exist')
+            child = node[key]
+            if not isinstance(child, (dict, list)):
+                raise PatchError(f'path /{"/".join(tokens)} does not exist')
+            node[key] = node = self._own(child)
+        return node, tokens[-1]
+
+    def add(self, tokens, value):
+        if not tokens:
+            self.root = value
+            return
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            parent[token] = value
+        else:
+            parent.insert(_index(parent, token, allow_end=True), value)
+
+    def remove(self, tokens):
+        if not tokens:
+            raise PatchError('cannot remove the whole document')
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f'path /{"/".join(tokens)} does not exist')
+            return parent.pop(token)
+        return parent.pop(_index(parent, token))
+
+    def replace(self, tokens, value):
+        if not tokens:
+            self.root = value
+            return
+        parent, token = self._parent(tokens)
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f'path /{"/".join(tokens)} does not exist')
+            parent[token] = value
+        else:
+            parent[_index(parent, token)] = value
+
+
+def apply_json_patch(doc, operations):
+    """Apply an RFC 6902 JSON Patch and return the patched document.
+
+    ``doc`` itself is left unchanged. Raises :class:`PatchError` (or
+    :class:`PatchTestFailed`) if any operation cannot be applied.
+    """
+    if not isinstance(operations, list):
+        raise PatchError('a JSON Patch must be an array of operations')
+
+    patcher = _Patcher(doc)
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError('each JSON Patch operation must be an object')
+        op = operation.get('op')
+        tokens = parse_pointer(operation.get('path'))
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f'{op} needs a "value"')
+
+        if op == 'add':
+            patcher.add(tokens, operation['value'])
+        elif op == 'remove':
+            patcher.remove(tokens)
+        elif op == 'replace':
+            patcher.replace(tokens, operation['value'])
+        elif op == 'test':
+            if not _json_equal(patcher.get(tokens), operation['value']):
+                raise PatchTestFailed(f'test failed at {operation["path"]}')
+        elif op in ('move', 'copy'):
+            source = parse_pointer(operation.get('from'))
+            if op == 'move':
+                if tokens[: len(source)] == source and len(tokens) > len(source):
+                    raise PatchError('cannot move a value into one of its children')
+                if source == tokens:
+                    # Moving a value onto itself changes nothing, but the value must exist
+                    patcher.get(source)
+                    continue
+                value = patcher.remove(source)
+            else:
+                value = copy.deepcopy(patcher.get(source))
+            patcher.add(tokens, value)
+        else:
+            raise PatchError(f'unknown JSON Patch op {op!r}')
+
+    return patcher.root
+
+
+def apply_merge_patch(target, patch):
+    """Apply an RFC 7396 JSON Merge Patch and return the result, leaving ``target`` unchanged."""
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def apply_patch(doc, patch, content_type):
+    """Apply ``patch`` to ``doc`` according to the request ``content_type``.
+
+    ``application/json-patch+json`` means RFC 6902, ``application/merge-patch+json``
+    RFC 7396. For plain ``application/json`` an array is treated as a JSON Patch
+    and an object as a merge patch.
+    """
+    if content_type == JSON_PATCH or (content_type != MERGE_PATCH and isinstance(patch, list)):
+        return apply_json_patch(doc, patch)
+    return apply_merge_patch(doc, patch)
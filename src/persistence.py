@@ -0,0 +1,112 @@
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+
+from src import codec
+
+logger = logging.getLogger(__name__)
+
+
+def write_json_atomic(filepath, data):
+    """Write ``data`` as JSON to ``filepath`` without ever exposing a partial file."""
+    write_bytes_atomic(filepath, codec.dumps(data))
+
+
+def write_bytes_atomic(filepath, content):
+    """Write ``content`` to ``filepath`` without ever exposing a partial file.
+
+    The bytes are written to a temporary file in the same folder, fsynced and
+    then renamed over ``filepath``, so readers see either the old or the new content.
+    """
+    folder, name = os.path.split(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=folder or '.', prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class WriteBehind:
+    """Coalesce repeated writes to the same key into one delayed flush.
+
+    :meth:`put` records the latest value for a key and, if nothing is pending for
+    it yet, starts a timer that calls ``write(key, value)`` after ``delay``
+    seconds. Further puts inside that window only replace the pending value. With
+    a delay of zero, values are written immediately.
+    """
+
+    def __init__(self, write, delay=0.0):
+        self.write = write
+        self.delay = delay
+        self._pending = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, value):
+        if self.delay <= 0:
+            self.write(key, value)
+            return
+
+        with self._lock:
+            self._pending[key] = value
+            self._schedule(key)
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def flush(self, key):
+        """Write the pending value for ``key`` now. Returns False if there was none."""
+        with self._lock:
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            if key not in self._pending:
+                return False
+            value = self._pending.pop(key)
+
+        try:
+            self.write(key, value)
+        except BaseException:
+            with self._lock:
+                self._pending.setdefault(key, value)
+            raise
+        return True
+
+    def flush_all(self):
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.flush(key)
+
+    def discard(self, key):
+        """Forget the pending value for ``key`` without writing it."""
+        with self._lock:
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            self._pending.pop(key, None)
+
+    def _schedule(self, key):
+        if key not in self._timers:
+            timer = threading.Timer(self.delay, self._flush_from_timer, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def _flush_from_timer(self, key):
+        try:
+            self.flush(key)
+        except Exception:
+            logger.exception('Deferred write of %s failed, retrying in %ss', key, self.delay)
+            with self._lock:
+                if key in self._pending:
+                    self._schedule(key)
@@ -0,0 +1,330 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src import codec
+from src.locking import FileLock
+from src.metrics import span
+from src.models import Group
+from src.persistence import WriteBehind, write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """A cached group together with the file stat it was parsed from.
+
+    ``weight`` is what the entry counts against the cache size: the uncompressed
+    JSON size, which for a compressed file is well above its size on disk.
+    """
+
+    __slots__ = ('group', 'mtime_ns', 'size', 'weight')
+
+    def __init__(self, group, mtime_ns, size, weight=None):
+        self.group = group
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.weight = size if weight is None else weight
+
+
+class GroupRepository:
+    """Load and save group files in a folder, keeping parsed groups in an LRU cache.
+
+    Entries are keyed by filename and checked against the file's ``st_mtime_ns``
+    and ``st_size`` on every lookup, so a file changed outside the app is parsed
+    again. The cache is bounded by ``max_bytes``, measured as the uncompressed
+    JSON size of the cached files; the least recently used groups are evicted first.
+
+    Files are written in ``storage_format`` (one of :data:`src.codec.FORMATS`)
+    and read in any of them, so changing the format needs no conversion step.
+
+    Groups are returned as :class:`~src.models.Group` objects shared with the cache. A caller that
+    mutates one must either :meth:`save` it or :meth:`invalidate` the filename,
+    and should hold :meth:`lock` for the filename while doing so.
+
+    Saves are written atomically. A deferred save (``defer=True``) is held in the
+    cache and flushed after ``write_delay`` seconds, so a burst of edits to one
+    group costs a single write. Pending saves are never evicted and are written
+    out by :meth:`flush` or :meth:`close`.
+
+    :meth:`version` gives a strong ETag for each file, a hash of its stored
+    bytes, so every process serving the folder agrees on it. A deferred save
+    gets a new random ETag straight away; once it is written the file's hash
+    takes over, and :meth:`etags` still accepts the random one until the file
+    changes again.
+
+    While ``watched`` is set, a watcher reports every change to the folder as it
+    happens through :meth:`refresh`, and cached groups are returned without
+    checking the file's stat on every load. Reports arrive a moment after the
+    change, so code about to change a file must call :meth:`refresh` once it
+    holds :meth:`lock`, as a write from another process may not be reported yet.
+
+    File locks are shared with other processes through lock files in
+    ``lock_folder`` (``.locks`` inside ``folder`` by default). When several
+    processes serve the same folder, use ``write_delay=0`` so that no process
+    holds edits the others cannot see.
+    """
+
+    def __init__(self, folder, max_bytes=64 * 1024 * 1024, write_delay=0.0, lock_folder=None, storage_format='pretty'):
+        codec.check_format(storage_format)
+        self.folder = folder
+        self.storage_format = storage_format
+        self.lock_folder = lock_folder or os.path.join(folder, '.locks')
+        self.max_bytes = max_bytes
+        self.watched = False
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._file_locks = {}
+        # filename -> (st_mtime_ns, st_size, etag, modified, etag of the deferred save that wrote the file or None);
+        # the stat is None while a deferred save is pending
+        self._versions = {}
+        self._writer = WriteBehind(self._write, delay=write_delay)
+        self._listeners = []
+        self._before_write = []
+
+    def path(self, filename):
+        """Return the path of ``filename`` inside the repository folder."""
+        return os.path.join(self.folder, filename)
+
+    def exists(self, filename):
+        return os.path.exists(self.path(filename))
+
+    def lock(self, filename):
+        """Return the re-entrant lock that serializes changes to ``filename``, across processes too."""
+        with self._lock:
+            file_lock = self._file_locks.get(filename)
+            if file_lock is None:
+                os.makedirs(self.lock_folder, exist_ok=True)
+                file_lock = FileLock(os.path.join(self.lock_folder, f'{filename}.lock'))
+                self._file_locks[filename] = file_lock
+            return file_lock
+
+    def add_listener(self, callback, before=False):
+        """Call ``callback(filename, group, stat_result)`` after every file this repository writes.
+
+        With ``before=True``, ``callback(filename)`` is called instead just before
+        the file is overwritten, while its old content is still on disk. Errors
+        raised by a listener after the write are logged; the save still succeeds.
+        """
+        (self._before_write if before else self._listeners).append(callback)
+
+    def load(self, filename):
+        """Return the parsed group stored in ``filename``."""
+        if self.watched or self._writer.is_pending(filename):
+            with self._lock:
+                entry = self._entries.get(filename)
+                if entry is not None:
+                    self._entries.move_to_end(filename)
+                    self.hits += 1
+                    return entry.group
+
+        filepath = self.path(filename)
+        st = os.stat(filepath)
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self._entries.move_to_end(filename)
+                self.hits += 1
+                return entry.group
+            self.misses += 1
+
+        with span('read'), open(filepath, 'rb') as f:
+            content = f.read()
+        self._set_version(filename, st, _digest(content))
+        with span('parse'):
+            content = codec.decompress(content)
+            group = Group(codec.loads(content))
+
+        self._store(filename, group, st, len(content))
+        return group
+
+    def version(self, filename):
+        """Return ``(etag, modified)`` for the current content of ``filename``.
+
+        ``etag`` is an unquoted strong entity tag and ``modified`` a POSIX
+        timestamp of the last change, including deferred saves not yet on disk.
+        """
+        if not self._writer.is_pending(filename):
+            self.load(filename)
+        with self._lock:
+            known = self._versions.get(filename)
+        if known is None:
+            # Invalidated by another thread in between; read the file again
+            self.load(filename)
+            known = self._versions[filename]
+        return known[2], known[3]
+
+    def etags(self, filename):
+        """Return the ETags that name the current content of ``filename``, the one from :meth:`version` first.
+
+        A client that made a deferred save was given a random ETag before the
+        content was written; it still names the content until the file changes.
+        """
+        etag = self.version(filename)[0]
+        with self._lock:
+            known = self._versions.get(filename)
+        if known is not None and known[2] == etag and known[4] is not None:
+            return etag, known[4]
+        return (etag,)
+
+    def save(self, filename, group, defer=False):
+        """Write ``group`` to ``filename`` and keep it cached.
+
+        ``group`` may be a :class:`~src.models.Group` or a plain dict. With
+        ``defer=True`` the write is coalesced with other saves of the same file
+        made within the repository's write delay.
+        """
+        if not isinstance(group, Group):
+            group = Group(group)
+
+        if not defer:
+            self._writer.discard(filename)
+            with self._lock:
+                self._versions.pop(filename, None)
+            self._write(filename, group)
+            return
+
+        with self._lock:
+            self._versions[filename] = (None, None, os.urandom(8).hex(), time.time(), None)
+            entry = self._entries.get(filename)
+            if entry is not None and entry.group is group:
+                self._entries.move_to_end(filename)
+            else:
+                size, weight = (entry.size, entry.weight) if entry is not None else (0, 0)
+                self._put(filename, _Entry(group, None, size, weight))
+        self._writer.put(filename, group)
+
+    def flush(self, filename=None):
+        """Write out the pending save for ``filename``, or for every file."""
+        if filename is None:
+            self._writer.flush_all()
+        else:
+            self._writer.flush(filename)
+
+    def close(self):
+        """Flush every pending save, logging rather than raising on failures."""
+        with self._lock:
+            filenames = [name for name in self._entries if self._writer.is_pending(name)]
+        for filename in filenames:
+            try:
+                self._writer.flush(filename)
+            except Exception:
+                logger.exception('Could not write %s on shutdown', filename)
+
+    def refresh(self, filename):
+        """Drop the cached copy of ``filename`` if the file changed on disk since this repository read or wrote it.
+
+        Returns False if the cached copy is current or a deferred save of the
+        file is pending, which will overwrite the change; True otherwise, including
+        when the file was not cached. Callers should hold :meth:`lock` for the file.
+        """
+        if self._writer.is_pending(filename):
+            return False
+        try:
+            st = os.stat(self.path(filename))
+        except FileNotFoundError:
+            st = None
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None and st is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+                return False
+        self.invalidate(filename)
+        return True
+
+    def invalidate(self, filename):
+        """Drop ``filename`` from the cache, e.g. after it was renamed or deleted.
+
+        Any pending deferred save for the file is discarded as well.
+        """
+        self._writer.discard(filename)
+        with self._lock:
+            self._versions.pop(filename, None)
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._bytes -= entry.weight
+
+    def clear(self):
+        self.close()
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'storage_format': self.storage_format,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _write(self, filename, group):
+        with self.lock(filename):
+            filepath = self.path(filename)
+            for callback in self._before_write:
+                callback(filename)
+            with span('serialize'):
+                content = codec.dumps(group.to_dict(), indent=self.storage_format != 'minified')
+                weight = len(content)
+                if self.storage_format in codec.COMPRESSED:
+                    content = codec.compress(content, self.storage_format)
+            with span('write'):
+                write_bytes_atomic(filepath, content)
+            st = os.stat(filepath)
+            self._set_version(filename, st, _digest(content))
+            self._store(filename, group, st, weight)
+            # The file is written; a failing listener must not make the save look failed and be retried
+            for callback in self._listeners:
+                try:
+                    callback(filename, group, st)
+                except Exception:
+                    logger.exception('A write listener failed for %s', filename)
+
+    def _set_version(self, filename, st, etag):
+        with self._lock:
+            known = self._versions.get(filename)
+            if known is not None and known[0] is None:
+                # A flushed deferred save: the content hash is the ETag every process sees from now on
+                self._versions[filename] = (st.st_mtime_ns, st.st_size, etag, st.st_mtime, known[2])
+            elif known is None or (known[0], known[1]) != (st.st_mtime_ns, st.st_size):
+                self._versions[filename] = (st.st_mtime_ns, st.st_size, etag, st.st_mtime, None)
+
+    def _store(self, filename, group, st, weight=None):
+        entry = _Entry(group, st.st_mtime_ns, st.st_size, weight)
+        with self._lock:
+            if entry.weight > self.max_bytes and not self._writer.is_pending(filename):
+                old = self._entries.pop(filename, None)
+                if old is not None:
+                    self._bytes -= old.weight
+                return
+            self._put(filename, entry)
+
+    def _put(self, filename, entry):
+        # Caller holds self._lock
+        old = self._entries.pop(filename, None)
+        if old is not None:
+            self._bytes -= old.weight
+        self._entries[filename] = entry
+        self._bytes += entry.weight
+
+        if self._bytes > self.max_bytes:
+            for name in list(self._entries):
+                if self._bytes <= self.max_bytes or name == filename:
+                    break
+                if self._writer.is_pending(name):
+                    continue
+                self._bytes -= self._entries.pop(name).weight
+
+
+def _digest(content):
+    return hashlib.blake2b(content, digest_size=12).hexdigest()
@@ -0,0 +1,102 @@
+# Sort options for a group's member list: None keeps the order of the file
+SORT_KEYS = {
+    'position': None,
+    'name': 'name',
+    'class': 'class',
+    'role': 'role',
+    'pv': 'basePoints',
+    'skill': 'currentSkill',
+    'tonnage': 'tonnage',
+    'size': 'size',
+    'gunnery': 'pilot.gunnery',
+    'piloting': 'pilot.piloting',
+}
+
+# Fields a member filter looks in
+FILTER_FIELDS = ('name', 'customName', 'class', 'variant', 'role', 'type', 'pilot.name')
+
+NUMERIC_SORTS = frozenset({'pv', 'skill', 'tonnage', 'size', 'gunnery', 'piloting'})
+
+
+def _field(member, path):
+    if path.startswith('pilot.'):
+        pilot = member.get('pilot')
+        return pilot.get(path[6:]) if pilot is not None else None
+    return member.get(path)
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sort_value(member, sort):
+    value = _field(member, SORT_KEYS[sort])
+    if sort in NUMERIC_SORTS:
+        return _number(value)
+    return str(value).casefold() if value else None
+
+
+def member_summary(member):
+    """Return the fields of ``member`` shown in member lists and the duplicate picker."""
+    pilot = member.get('pilot') or {}
+    return {
+        'uuid': member.get('uuid'),
+        'name': member.get('name'),
+        'customName': member.get('customName'),
+        'class': member.get('class'),
+        'variant': member.get('variant'),
+        'role': member.get('role'),
+        'tonnage': member.get('tonnage'),
+        'pv': member.get('basePoints'),
+        'skill': member.get('currentSkill'),
+        'pilot': {'name': pilot.get('name'), 'gunnery': pilot.get('gunnery'), 'piloting': pilot.get('piloting')},
+    }
+
+
+def query_members(members, query='', sort='position', descending=False, page=1, per_page=24):
+    """Filter, sort and page a group's members.
+
+    Every word of ``query`` must appear (ignoring case) in one of
+    :data:`FILTER_FIELDS`. Returns ``(items, total)`` where ``items`` holds
+    ``(position, member)`` pairs for the requested page and ``total`` counts all
+    matching members. Without a filter or sort only the page itself is touched.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f'Unknown sort {sort!r}')
+
+    words = query.casefold().split()
+    if not words and SORT_KEYS[sort] is None:
+        total = len(members)
+        if descending:
+            stop = max(total - (page - 1) * per_page, 0)
+            start = max(stop - per_page, 0)
+            return [(position, members[position]) for position in range(stop - 1, start - 1, -1)], total
+        start = (page - 1) * per_page
+        return list(enumerate(members[start : start + per_page], start)), total
+
+    items = list(enumerate(members))
+    if words:
+        items = [item for item in items if _matches(item[1], words)]
+    if SORT_KEYS[sort] is None:
+        if descending:
+            items.reverse()
+    else:
+        keyed = [(_sort_value(member, sort), (position, member)) for position, member in items]
+        # Members without a value go last, whichever way the list is sorted
+        present = [entry for entry in keyed if entry[0] is not None]
+        present.sort(key=lambda entry: entry[0], reverse=descending)
+        items = [entry[1] for entry in present] + [entry[1] for entry in keyed if entry[0] is None]
+    start = (page - 1) * per_page
+    return items[start : start + per_page], len(items)
+
+
+def _matches(member, words):
+    text = ' '.join(str(value) for value in (_field(member, path) for path in FILTER_FIELDS) if value).casefold()
+    return all(word in text for word in words)
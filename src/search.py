@@ -0,0 +1,435 @@
+import argparse
+import bisect
+import json
+import os
+import re
+import shlex
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+
+from src import codec
+from src.models import Group
+
+# Text fields: query name -> path into the member
+TEXT_FIELDS = {
+    'class': ('class',),
+    'variant': ('variant',),
+    'name': ('name',),
+    'customname': ('customName',),
+    'role': ('role',),
+    'type': ('type',),
+    'abilities': ('abilities',),
+    'pilot': ('pilot', 'name'),
+}
+
+# Numeric fields: query name -> path into the member
+NUMERIC_FIELDS = {
+    'pv': ('basePoints',),
+    'skill': ('currentSkill',),
+    'gunnery': ('pilot', 'gunnery'),
+    'piloting': ('pilot', 'piloting'),
+    'wounds': ('pilot', 'wounds'),
+    'tonnage': ('tonnage',),
+    'size': ('size',),
+    'tmm': ('tmm',),
+    'armor': ('armor',),
+    'structure': ('structure',),
+    'threshold': ('threshold',),
+    'overheat': ('overheat',),
+    'heat': ('currentHeat',),
+}
+
+# Numeric fields of the group a member belongs to
+GROUP_FIELDS = ('group.pv', 'group.members')
+
+_TERM = re.compile(r'^(?P<field>[A-Za-z.]+)(?P<op><=|>=|!=|<|>|=|:)(?P<value>.*)$', re.DOTALL)
+_WORD = re.compile(r'[a-z0-9]+')
+_COMPARE = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+
+class SearchError(ValueError):
+    """Raised for a query that cannot be parsed."""
+
+
+def _lookup(member, path):
+    value = member
+    for key in path:
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _words(value):
+    if isinstance(value, list):
+        return {word for item in value if isinstance(item, str) for word in _WORD.findall(item.lower())}
+    if isinstance(value, str):
+        return set(_WORD.findall(value.lower()))
+    return set()
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def parse_query(query):
+    """Split ``query`` into terms.
+
+    Bare words match any text field; ``field:word`` matches one of
+    :data:`TEXT_FIELDS`; ``field<op>number`` compares one of
+    :data:`NUMERIC_FIELDS` or :data:`GROUP_FIELDS` with ``<``, ``<=``, ``>``,
+    ``>=``, ``=`` (or ``:``) or ``!=``; ``group:word`` matches the group name or
+    label. A trailing ``*`` makes a word a prefix. Quote values containing spaces.
+    Returns a list of ``(kind, field, op, value)`` tuples.
+    """
+    try:
+        parts = shlex.split(query)
+    except ValueError:
+        parts = query.split()
+
+    terms = []
+    for part in parts:
+        match = _TERM.match(part)
+        field = match['field'].lower() if match else None
+        if match and (field in NUMERIC_FIELDS or field in GROUP_FIELDS):
+            op = '=' if match['op'] == ':' else match['op']
+            try:
+                value = float(match['value'])
+            except ValueError:
+                raise SearchError(f'{field} needs a number, got {match["value"]!r}') from None
+            terms.append(('group' if field in GROUP_FIELDS else 'number', field, op, value))
+        elif match and match['op'] == ':' and (field in TEXT_FIELDS or field == 'group'):
+            terms.append(('group' if field == 'group' else 'text', field, ':', match['value']))
+        elif match and match['op'] != ':':
+            raise SearchError(f'unknown numeric field {field!r}')
+        elif match and field not in TEXT_FIELDS:
+            raise SearchError(f'unknown field {field!r}')
+        else:
+            terms.append(('text', None, ':', part))
+    return terms
+
+
+class SearchIndex:
+    """Inverted index over the members of every group file in a folder.
+
+    Text fields are split into lowercase words, each mapping to the set of
+    members containing it, both per field (``class:atlas``) and across fields
+    (``atlas``). Numeric fields map each distinct value to its members, with the
+    values kept sorted so a range condition is a bisection and a set union.
+    :meth:`update` re-indexes one file and is meant to be registered as a
+    repository write listener; :meth:`refresh` picks up files changed outside the
+    app, comparing ``st_mtime_ns`` and size like the catalog does, at most every
+    ``refresh_interval`` seconds. While ``watched`` is set, a watcher calls
+    :meth:`refresh_file` for each change instead.
+    """
+
+    def __init__(self, folder, refresh_interval=0.0):
+        self.folder = folder
+        self.refresh_interval = refresh_interval
+        self.watched = False
+        self._lock = threading.Lock()
+        self._last_refresh = None
+        self._next_id = 0
+        self._known = {}
+        self._files = {}
+        self._groups = {}
+        self._docs = {}
+        self._doc_keys = {}
+        self._words = {}
+        self._group_words = {}
+        self._numbers = {field: {} for field in NUMERIC_FIELDS}
+        self._buckets = {field: {} for field in NUMERIC_FIELDS}
+        self._values = {field: [] for field in NUMERIC_FIELDS}
+
+    def refresh(self, force=False):
+        """Re-index the files that changed on disk since they were last indexed."""
+        now = time.monotonic()
+        if not force and self._last_refresh is not None:
+            if self.watched or now - self._last_refresh < self.refresh_interval:
+                return
+        self._last_refresh = now
+
+        with self._lock:
+            known = dict(self._known)
+
+        seen = set()
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                st = entry.stat()
+                stamp = (st.st_mtime_ns, st.st_size)
+                if known.get(entry.name) == stamp:
+                    continue
+                try:
+                    group_data = codec.load_file(entry.path)
+                except (OSError, ValueError):
+                    group_data = None
+                with self._lock:
+                    # Skip the file if the app re-indexed it while it was being read
+                    if self._known.get(entry.name) == known.get(entry.name):
+                        self._index_file(entry.name, group_data)
+                        self._known[entry.name] = stamp
+
+        with self._lock:
+            for filename in known.keys() - seen:
+                if self._known.get(filename) == known[filename]:
+                    self._drop_file(filename)
+                    self._known.pop(filename, None)
+
+    def update(self, filename, group_data, st=None):
+        """Index ``group_data`` as the current content of ``filename`` (stat result ``st``)."""
+        with self._lock:
+            self._index_file(filename, group_data)
+            if st is not None:
+                self._known[filename] = (st.st_mtime_ns, st.st_size)
+            else:
+                self._known.pop(filename, None)
+
+    def is_current(self, filename, st):
+        """Return True if ``filename`` was indexed from the file with stat result ``st``."""
+        with self._lock:
+            return self._known.get(filename) == (st.st_mtime_ns, st.st_size)
+
+    def refresh_file(self, filename):
+        """Re-index ``filename`` if it changed on disk, or drop it if it is gone."""
+        filepath = os.path.join(self.folder, filename)
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
+            self.remove(filename)
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            known = self._known.get(filename)
+        if known == stamp:
+            return
+        try:
+            group_data = codec.load_file(filepath)
+        except (OSError, ValueError):
+            group_data = None
+        with self._lock:
+            # Skip the file if the app re-indexed it while it was being read
+            if self._known.get(filename) == known:
+                self._index_file(filename, group_data)
+                self._known[filename] = stamp
+
+    def remove(self, filename):
+        with self._lock:
+            self._drop_file(filename)
+            self._known.pop(filename, None)
+
+    def search(self, query, limit=100):
+        """Return ``(results, total)`` for the members matching every term of ``query``.
+
+        Results are dicts with the member's file, position and summary fields.
+        At most ``limit`` are returned, taken in indexing order (whole files at a
+        time) and then ordered by filename and position.
+        """
+        terms = parse_query(query)
+        if not terms:
+            return [], 0
+
+        with self._lock:
+            ids = self._match(terms)
+            docs = [self._docs[doc_id] for doc_id in sorted(ids)[:limit]]
+        docs.sort(key=lambda d: (d['filename'], d['position']))
+        return [dict(doc) for doc in docs], len(ids)
+
+    def stats(self):
+        with self._lock:
+            return {'files': len(self._files), 'members': len(self._docs), 'words': len(self._words)}
+
+    def _match(self, terms):
+        # Caller holds self._lock
+        candidates = None
+        for kind, field, op, value in terms:
+            if kind != 'text':
+                continue
+            words = _WORD.findall(value.lower())
+            for position, word in enumerate(words):
+                key = word if field is None else f'{field}:{word}'
+                if value.endswith('*') and position == len(words) - 1:
+                    ids = set().union(*(s for k, s in self._words.items() if k.startswith(key)))
+                else:
+                    ids = self._words.get(key, set())
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return set()
+
+        group_terms = [term for term in terms if term[0] == 'group']
+        if group_terms:
+            files = set(self._groups)
+            for _, field, op, value in group_terms:
+                if field == 'group':
+                    for word in _words(value):
+                        files &= self._group_words.get(word, set())
+                else:
+                    key = field.split('.', 1)[1]
+                    files = {f for f in files if _COMPARE[op](self._groups[f][key], value)}
+            ids = set().union(*(self._files[f] for f in files))
+            candidates = ids if candidates is None else candidates & ids
+
+        for _, field, op, value in (term for term in terms if term[0] == 'number'):
+            ids = self._range(field, op, value)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+
+        return candidates if candidates is not None else set()
+
+    def _range(self, field, op, value):
+        # Members are bucketed by value; fields hold few distinct values, so this
+        # is a bisection over the values plus a union of the matching buckets.
+        values = self._values[field]
+        buckets = self._buckets[field]
+        low = bisect.bisect_left(values, value)
+        high = bisect.bisect_right(values, value)
+        if op == '<':
+            selected = values[:low]
+        elif op == '<=':
+            selected = values[:high]
+        elif op == '>':
+            selected = values[high:]
+        elif op == '>=':
+            selected = values[low:]
+        elif op == '=':
+            selected = values[low:high]
+        else:
+            selected = values[:low] + values[high:]
+        return set().union(*(buckets[v] for v in selected))
+
+    def _index_file(self, filename, group_data):
+        # Caller holds self._lock
+        self._drop_file(filename)
+        if not isinstance(group_data, (Mapping, Group)):
+            return
+
+        members = group_data.get('members')
+        members = [m for m in members if isinstance(m, Mapping)] if isinstance(members, list) else []
+        ids = []
+        for position, member in enumerate(members):
+            doc_id = self._next_id
+            self._next_id += 1
+            ids.append(doc_id)
+            self._docs[doc_id] = {
+                'filename': filename,
+                'position': position,
+                'uuid': member.get('uuid'),
+                'name': member.get('name'),
+                'class': member.get('class'),
+                'variant': member.get('variant'),
+                'pv': member.get('basePoints'),
+                'skill': member.get('currentSkill'),
+            }
+
+            keys = []
+            for field, path in TEXT_FIELDS.items():
+                for word in _words(_lookup(member, path)):
+                    keys.append(word)
+                    keys.append(f'{field}:{word}')
+            keys = list(dict.fromkeys(keys))
+            for key in keys:
+                self._words.setdefault(key, set()).add(doc_id)
+            self._doc_keys[doc_id] = keys
+
+            for field, path in NUMERIC_FIELDS.items():
+                value = _number(_lookup(member, path))
+                if value is not None:
+                    self._numbers[field][doc_id] = value
+                    bucket = self._buckets[field].get(value)
+                    if bucket is None:
+                        bucket = self._buckets[field][value] = set()
+                        bisect.insort(self._values[field], value)
+                    bucket.add(doc_id)
+
+        self._files[filename] = ids
+        words = _words(group_data.get('name')) | _words(group_data.get('groupLabel'))
+        self._groups[filename] = {
+            'name': group_data.get('name'),
+            'pv': sum(_number(m.get('basePoints')) or 0 for m in members),
+            'members': len(members),
+            'words': words,
+        }
+        for word in words:
+            self._group_words.setdefault(word, set()).add(filename)
+
+    def _drop_file(self, filename):
+        # Caller holds self._lock
+        for doc_id in self._files.pop(filename, ()):
+            del self._docs[doc_id]
+            for key in self._doc_keys.pop(doc_id):
+                ids = self._words[key]
+                ids.discard(doc_id)
+                if not ids:
+                    del self._words[key]
+            for field, numbers in self._numbers.items():
+                value = numbers.pop(doc_id, None)
+                if value is not None:
+                    bucket = self._buckets[field][value]
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[field][value]
+                        values = self._values[field]
+                        del values[bisect.bisect_left(values, value)]
+
+        group = self._groups.pop(filename, None)
+        if group is not None:
+            for word in group['words']:
+                files = self._group_words[word]
+                files.discard(filename)
+                if not files:
+                    del self._group_words[word]
+
+
+def group_counts(results):
+    """Return ``[(filename, matches), ...]`` for ``results``, in filename order."""
+    return sorted(Counter(result['filename'] for result in results).items())
+
+
+def main(argv=None):
+    """Command line search: ``python -m src.search [--folder data] QUERY``."""
+    parser = argparse.ArgumentParser(prog='python -m src.search', description='Search members across group files.')
+    parser.add_argument('query', nargs='+', help='search terms, e.g. atlas "gunnery<=3" "group.pv>300"')
+    parser.add_argument('--folder', default='data', help='folder holding the group files (default: data)')
+    parser.add_argument('--limit', type=int, default=100, help='maximum number of members to print')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.folder)
+    index.refresh(force=True)
+    started = time.perf_counter()
+    try:
+        results, total = index.search(' '.join(shlex.quote(part) for part in args.query), limit=args.limit)
+    except SearchError as e:
+        parser.error(str(e))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        json.dump({'total': total, 'results': results}, sys.stdout, indent=2)
+        print()
+        return 0
+
+    for result in results:
+        label = ' '.join(str(result[key]) for key in ('class', 'variant') if result[key])
+        name = result['name'] or 'Unnamed'
+        print(f'{result["filename"]}  #{result["position"] + 1}  {name}  ({label})  PV {result["pv"]}')
+    print(f'{total} member{"" if total == 1 else "s"} matched in {elapsed:.2f} ms', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
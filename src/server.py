@@ -0,0 +1,154 @@
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import sys
+
+from flask import Config
+
+from src.config import ENV_PREFIX, load_config
+
+logger = logging.getLogger(__name__)
+
+SERVERS = ('auto', 'waitress', 'gunicorn', 'werkzeug')
+
+# Read from the settings file and JJEDITOR_* variables, like the app's own settings
+DEFAULTS = {
+    'SERVER': 'auto',
+    'HOST': '0.0.0.0',
+    'PORT': 5000,
+    # Worker processes; only gunicorn runs more than one
+    'WORKERS': 1,
+    # Request threads per worker process
+    'THREADS': 8,
+    # Seconds a stopping worker gets to finish its requests and flush pending writes
+    'GRACEFUL_TIMEOUT': 30,
+}
+
+
+def server_settings():
+    """Return the server settings without importing the app, so a gunicorn master stays light."""
+    return load_config(Config(os.getcwd(), DEFAULTS))
+
+
+def precompile_templates(app):
+    """Compile every template up front and stop checking them for changes on each render."""
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.auto_reload = False
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def choose_server(name, workers):
+    """Resolve ``auto`` to an installed production server, falling back to the Werkzeug server."""
+    if name != 'auto':
+        return name
+    gunicorn = os.name == 'posix' and importlib.util.find_spec('gunicorn') is not None
+    if workers > 1 and gunicorn:
+        return 'gunicorn'
+    if importlib.util.find_spec('waitress') is not None:
+        return 'waitress'
+    if gunicorn:
+        return 'gunicorn'
+    return 'werkzeug'
+
+
+def load_app():
+    from src.app import app
+
+    precompile_templates(app)
+    return app
+
+
+def shutdown():
+    """Write out deferred saves and release the app's files."""
+    from src.app import repository, watcher
+
+    watcher.stop()
+    logger.info('Flushing pending writes')
+    repository.close()
+
+
+def _exit(signum, frame):
+    raise SystemExit(0)
+
+
+def serve_waitress(host, port, threads):
+    import waitress
+
+    app = load_app()
+    # Turn termination into SystemExit so the finally block below still runs
+    signal.signal(signal.SIGTERM, _exit)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, _exit)
+    try:
+        waitress.serve(app, host=host, port=port, threads=threads)
+    finally:
+        shutdown()
+
+
+def serve_gunicorn(host, port, workers, threads, graceful_timeout):
+    from gunicorn.app.base import BaseApplication
+
+    if workers > 1:
+        # Deferred writes live in one worker's memory; with several workers every save goes straight to disk
+        os.environ[f'{ENV_PREFIX}_WRITE_BEHIND_DELAY'] = '0'
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('graceful_timeout', graceful_timeout)
+            self.cfg.set('worker_exit', lambda server, worker: shutdown())
+
+        def load(self):
+            # Runs in each worker, so every process has its own repository and catalog connection
+            return load_app()
+
+    Application().run()
+
+
+def serve_werkzeug(host, port, threads, debug):
+    from src.app import app
+
+    if not debug:
+        precompile_templates(app)
+    try:
+        app.run(host=host, port=port, debug=debug, threaded=threads > 1)
+    finally:
+        shutdown()
+
+
+def main(argv=None):
+    settings = server_settings()
+    parser = argparse.ArgumentParser(description='Serve the Alpha Strike Group Editor.')
+    parser.add_argument('--server', choices=SERVERS, default=settings['SERVER'], help='WSGI server to run')
+    parser.add_argument('--host', default=settings['HOST'])
+    parser.add_argument('--port', type=int, default=settings['PORT'])
+    parser.add_argument('--workers', type=int, default=settings['WORKERS'], help='worker processes (gunicorn)')
+    parser.add_argument('--threads', type=int, default=settings['THREADS'], help='request threads per worker')
+    parser.add_argument('--debug', action='store_true', help='run the Werkzeug development server with the debugger')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    server = 'werkzeug' if args.debug else choose_server(args.server, args.workers)
+    if server != 'gunicorn' and args.workers > 1:
+        logger.warning('%s runs a single process; ignoring --workers %d', server, args.workers)
+    if server == 'werkzeug' and args.server == 'auto' and not args.debug:
+        logger.warning('No production server installed (pip install waitress); using the Werkzeug server')
+
+    logger.info('Serving on http://%s:%d with %s', args.host, args.port, server)
+    if server == 'waitress':
+        serve_waitress(args.host, args.port, args.threads)
+    elif server == 'gunicorn':
+        serve_gunicorn(args.host, args.port, args.workers, args.threads, settings['GRACEFUL_TIMEOUT'])
+    else:
+        serve_werkzeug(args.host, args.port, args.threads, args.debug)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import contextlib
+import json
+import os
+import tempfile
+
+from src.validation import format_error
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# Key used by iter_group for each element of the members array
+MEMBER = 'members[]'
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+class UploadReport:
+    """Outcome of validating an uploaded group file.
+
+    ``errors`` holds group-level messages and ``members`` one entry per member
+    with problems: ``{'index': ..., 'name': ..., 'errors': [...]}``. When the
+    error limit was hit, ``truncated`` is set and checking stopped early.
+    """
+
+    __slots__ = ('errors', 'members', 'member_count', 'error_count', 'truncated')
+
+    def __init__(self):
+        self.errors = []
+        self.members = []
+        self.member_count = 0
+        self.error_count = 0
+        self.truncated = False
+
+    @property
+    def ok(self):
+        return self.error_count == 0
+
+
+def save_stream(stream, folder, max_bytes, chunk_size=CHUNK_SIZE):
+    """Copy ``stream`` into a temporary file in ``folder`` and return its path.
+
+    At most ``chunk_size`` bytes are held in memory at a time. Raises
+    :class:`UploadTooLarge` (after removing the partial file) once more than
+    ``max_bytes`` have been read.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-', suffix='.tmp')
+    try:
+        written = 0
+        with os.fdopen(fd, 'wb') as out:
+            while chunk := stream.read(chunk_size):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f'Upload is larger than {max_bytes} bytes')
+                out.write(chunk)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+class _JsonReader:
+    """Read JSON values one at a time from a text file without loading all of it."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE, max_value_size=16 * 1024 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character, or '' at the end of the file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Expected {char!r} but found {found or "end of file"!r}')
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or len(self.buf) - self.pos > self.max_value_size:
+                    raise
+                self._fill()
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and isinstance(value, (int, float)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_group(f):
+    """Yield ``(key, value)`` for each top-level field of the group in ``f``.
+
+    The ``members`` array is not returned as a whole: ``('members', [])`` marks
+    its start and each member follows as ``(MEMBER, member)``. A ``members``
+    value that is not an array is yielded as is.
+    """
+    reader = _JsonReader(f)
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError('Expected a property name')
+            reader.expect(':')
+            if key == 'members' and reader.peek() == '[':
+                reader.pos += 1
+                yield 'members', []
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield MEMBER, reader.value()
+                        if reader.peek() == ']':
+                            reader.pos += 1
+                            break
+                        reader.expect(',')
+            else:
+                yield key, reader.value()
+
+            if reader.peek() == '}':
+                reader.pos += 1
+                break
+            reader.expect(',')
+
+    if reader.peek() != '':
+        raise ValueError('Unexpected data after the group object')
+
+
+def validate_group_file(filepath, validator, max_errors=50):
+    """Check the group file at ``filepath`` against ``validator`` one member at a time.
+
+    Returns an :class:`UploadReport`. Raises ``ValueError`` if the file is not
+    well-formed JSON.
+    """
+    report = UploadReport()
+    seen = set()
+
+    def add_errors(errors, member=None):
+        if not errors:
+            return
+        messages = [format_error(e) for e in errors]
+        if member is None:
+            report.errors.extend(messages)
+        else:
+            report.members.append(member | {'errors': messages})
+        report.error_count += len(messages)
+        if report.error_count >= max_errors:
+            report.truncated = True
+
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        if _first_char(f) != '{':
+            add_errors([('', 'expected a JSON object at the top level')])
+            return report
+        f.seek(0)
+
+        for key, value in iter_group(f):
+            seen.add(key)
+            if key == MEMBER:
+                index = report.member_count
+                report.member_count += 1
+                name = value.get('name', '') if isinstance(value, dict) else ''
+                add_errors(validator.validate_member(value, f'members[{index}]'), {'index': index, 'name': name})
+            elif key == 'members':
+                add_errors(validator.validate_members_container(value))
+            else:
+                add_errors(validator.validate_field(key, value))
+            if report.truncated:
+                return report
+
+    seen.discard(MEMBER)
+    add_errors([(key, 'is required') for key in validator.required if key not in seen])
+    return report
+
+
+def _first_char(f):
+    while char := f.read(1):
+        if char not in _WHITESPACE:
+            return char
+    return ''
@@ -0,0 +1,160 @@
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'jeffimport.schema.json'
+
+_TYPE_NAMES = {
+    str: 'string',
+    bool: 'boolean',
+    int: 'integer',
+    float: 'number',
+    list: 'array',
+    dict: 'object',
+    type(None): 'null',
+}
+
+
+def _is_type(value, name):
+    # bool is a subclass of int, but JSON booleans are not numbers
+    if name == 'string':
+        return isinstance(value, str)
+    if name == 'integer':
+        return (isinstance(value, int) and not isinstance(value, bool)) or (
+            isinstance(value, float) and value.is_integer()
+        )
+    if name == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if name == 'boolean':
+        return isinstance(value, bool)
+    if name == 'array':
+        return isinstance(value, list)
+    if name == 'object':
+        return isinstance(value, Mapping)
+    if name == 'null':
+        return value is None
+    return True
+
+
+def _join(path, key):
+    if isinstance(key, int):
+        return f'{path}[{key}]'
+    return f'{path}.{key}' if path else key
+
+
+def _compile(node):
+    """Turn a schema node into ``check(value, path, errors)``, which appends ``(path, message)`` tuples."""
+    checks = []
+
+    types = node.get('type')
+    if types is not None:
+        types = [types] if isinstance(types, str) else list(types)
+
+    if 'enum' in node:
+        allowed = list(node['enum'])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append((path, f'must be one of {allowed}'))
+
+        checks.append(check_enum)
+
+    required = node.get('required', [])
+    properties = {key: _compile(sub) for key, sub in node.get('properties', {}).items()}
+    if required or properties:
+
+        def check_object(value, path, errors):
+            if not isinstance(value, Mapping):
+                return
+            for key in required:
+                if key not in value:
+                    errors.append((_join(path, key), 'is required'))
+            for key, check in properties.items():
+                if key in value:
+                    check(value[key], _join(path, key), errors)
+
+        checks.append(check_object)
+
+    if 'items' in node:
+        check_item = _compile(node['items'])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    check_item(item, _join(path, index), errors)
+
+        checks.append(check_items)
+
+    def check(value, path, errors):
+        if types is not None and not any(_is_type(value, name) for name in types):
+            got = _TYPE_NAMES.get(type(value), type(value).__name__)
+            errors.append((path, f'expected {" or ".join(types)}, got {got}'))
+            return
+        for nested in checks:
+            nested(value, path, errors)
+
+    return check
+
+
+class GroupValidator:
+    """Validator for group files, compiled once from the group JSON schema.
+
+    Besides checking a whole group, it can check the top-level fields and the
+    members separately, which lets callers validate a group piece by piece as it
+    is read. Errors are ``(path, message)`` tuples.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.required = list(schema.get('required', []))
+        properties = schema.get('properties', {})
+        self._fields = {key: _compile(sub) for key, sub in properties.items() if key != 'members'}
+        self._members = _compile({k: v for k, v in properties.get('members', {}).items() if k != 'items'})
+        self._member = _compile(properties.get('members', {}).get('items', {}))
+        self._group = _compile(schema)
+
+    @classmethod
+    def from_file(cls, path=SCHEMA_PATH):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def validate(self, group_data):
+        """Return every error in ``group_data``."""
+        errors = []
+        self._group(group_data, '', errors)
+        return errors
+
+    def validate_field(self, key, value):
+        """Return the errors for one top-level group field (not ``members``)."""
+        errors = []
+        check = self._fields.get(key)
+        if check is not None:
+            check(value, key, errors)
+        return errors
+
+    def validate_metadata(self, fields):
+        """Return the errors for a group's top-level fields other than ``members``."""
+        errors = []
+        for key, value in fields.items():
+            check = self._fields.get(key)
+            if check is not None:
+                check(value, key, errors)
+        errors.extend((key, 'is required') for key in self.required if key != 'members' and key not in fields)
+        return errors
+
+    def validate_member(self, member, path=''):
+        """Return the errors for one member object."""
+        errors = []
+        self._member(member, path, errors)
+        return errors
+
+    def validate_members_container(self, value):
+        """Check the ``members`` value itself (its type), but not the members in it."""
+        errors = []
+        self._members(value, 'members', errors)
+        return errors
+
+
+def format_error(error):
+    path, message = error
+    return f'{path}: {message}' if path else message
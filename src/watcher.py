@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from src import codec
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'watchdog', 'poll')
+
+# watchdog also reports files being opened and read; only these events can change a file
+_CHANGE_EVENTS = frozenset({'created', 'modified', 'deleted', 'moved', 'closed'})
+
+
+def is_group_file(name):
+    # Temporary files of atomic writes and uploads start with a dot
+    return name.endswith('.json') and not name.startswith('.')
+
+
+if Observer is not None:
+
+    class _Handler(FileSystemEventHandler):
+        def __init__(self, notify):
+            self.notify = notify
+
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in _CHANGE_EVENTS:
+                return
+            self.notify(os.fsdecode(event.src_path))
+            if getattr(event, 'dest_path', ''):
+                self.notify(os.fsdecode(event.dest_path))
+
+
+class FolderWatcher:
+    """Call ``callback(filename)`` whenever a group file in ``folder`` is created, changed or deleted, by anyone.
+
+    With ``watchdog`` installed the operating system reports changes as they
+    happen (inotify, FSEvents or ReadDirectoryChangesW); otherwise the folder is
+    scanned every ``interval`` seconds for files whose ``st_mtime_ns`` or size
+    changed. Events for one file that arrive within ``debounce`` seconds are
+    reported once, so the several events of an atomic rename make one call.
+    Callbacks run on the watcher's thread, one at a time.
+    """
+
+    def __init__(self, folder, callback, interval=1.0, backend='auto', debounce=0.05):
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown watch backend {backend!r}, expected one of {", ".join(BACKENDS)}')
+        if backend == 'watchdog' and Observer is None:
+            raise RuntimeError('The watchdog backend needs the watchdog package (pip install watchdog)')
+        self.folder = os.path.abspath(folder)
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.backend = 'poll' if backend == 'poll' or Observer is None else 'watchdog'
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @property
+    def live(self):
+        """True while changes are reported as they happen, so caches need not check files themselves."""
+        return self.running and self.backend == 'watchdog'
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self.backend == 'watchdog':
+            self._observer = Observer()
+            self._observer.schedule(_Handler(self._notify), self.folder, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+            target = self._dispatch
+        else:
+            target = self._poll
+        self._thread = threading.Thread(target=target, name='folder-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _notify(self, path):
+        name = os.path.basename(path)
+        if os.path.dirname(os.path.abspath(path)) == self.folder and is_group_file(name):
+            with self._lock:
+                self._pending.add(name)
+            self._wake.set()
+
+    def _dispatch(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            # Let the rest of a burst of events arrive
+            time.sleep(self.debounce)
+            with self._lock:
+                self._wake.clear()
+                names, self._pending = self._pending, set()
+            for name in sorted(names):
+                self._report(name)
+
+    def _poll(self):
+        known = self._scan()
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            for name in sorted(current.keys() | known.keys()):
+                if current.get(name) != known.get(name):
+                    self._report(name)
+            known = current
+
+    def _scan(self):
+        stamps = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not is_group_file(entry.name):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    stamps[entry.name] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+        return stamps
+
+    def _report(self, filename):
+        try:
+            self.callback(filename)
+        except Exception:
+            logger.exception('Could not handle the change to %s', filename)
+
+
+class ChangeFeed:
+    """Hand change notifications to open pages as Server-Sent Event streams.
+
+    Every stream holds a request thread while it is open, so at most
+    ``max_subscribers`` are served at once and each is closed after
+    ``stream_seconds``; the browser reconnects on its own. A stream that finds
+    the feed full tells the browser to try again later.
+    """
+
+    def __init__(self, max_subscribers=4, stream_seconds=300, heartbeat=15, max_queued=100):
+        self.max_subscribers = max_subscribers
+        self.stream_seconds = stream_seconds
+        self.heartbeat = heartbeat
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        # queue -> filename it follows, or None for every file
+        self._subscribers = {}
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, filename, event):
+        """Send ``event``, a JSON-ready dict, to the streams following ``filename`` or every file."""
+        data = f'event: change\ndata: {codec.dumps(event, indent=False).decode("utf-8")}\n\n'.encode('utf-8')
+        with self._lock:
+            targets = [q for q, followed in self._subscribers.items() if followed in (None, filename)]
+        for q in targets:
+            try:
+                q.put_nowait(data)
+            except queue.Full:
+                # The page stopped reading; it will reload everything when it reconnects
+                pass
+
+    def stream(self, filename=None):
+        """Yield the Server-Sent Event stream for changes to ``filename``, or to every file."""
+        q = queue.Queue(self.max_queued)
+        with self._lock:
+            full = len(self._subscribers) >= self.max_subscribers
+            if not full:
+                self._subscribers[q] = filename
+        if full:
+            yield b'retry: 30000\n\n'
+            return
+
+        try:
+            yield b'retry: 3000\n\n'
+            deadline = time.monotonic() + self.stream_seconds
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    yield q.get(timeout=min(self.heartbeat, remaining))
+                except queue.Empty:
+                    # Comments keep proxies from closing the connection and reveal closed pages
+                    yield b': keep-alive\n\n'
+        finally:
+            with self._lock:
+                self._subscribers.pop(q, None)
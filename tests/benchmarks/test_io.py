@@ -0,0 +1,160 @@
+import os
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from src import codec
+from src.analytics import MemberColumns
+from src.catalog import GroupCatalog
+from src.forms import MemberForm
+from src.history import GroupHistory
+from src.models import Group
+from src.persistence import write_json_atomic
+from src.repository import GroupRepository
+from src.search import SearchIndex
+from src.uploads import validate_group_file
+from src.validation import GroupValidator
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(scope='module')
+def data_folder(bench_root):
+    return str(bench_root / 'data')
+
+
+@pytest.fixture(scope='module')
+def large_bytes(data_folder, large_file):
+    with open(os.path.join(data_folder, large_file), 'rb') as f:
+        return f.read()
+
+
+def test_codec_loads(measure, large_bytes):
+    measure(codec.loads, large_bytes)
+
+
+def test_codec_dumps(measure, large_bytes):
+    measure(codec.dumps, codec.loads(large_bytes))
+
+
+def test_group_from_json(measure, large_bytes):
+    measure(lambda: Group(codec.loads(large_bytes)))
+
+
+def test_group_to_dict(measure, large_bytes):
+    measure(Group(codec.loads(large_bytes)).to_dict)
+
+
+def test_repository_load_cold(measure, data_folder, large_file):
+    repository = GroupRepository(data_folder)
+    measure(repository.load, large_file, setup=repository.clear)
+
+
+def test_repository_load_warm(measure, data_folder, large_file):
+    repository = GroupRepository(data_folder)
+    repository.load(large_file)
+    measure(repository.load, large_file)
+
+
+def test_repository_load_watched(measure, data_folder, large_file):
+    # With a watcher reporting changes, a cached group is returned without a stat call
+    repository = GroupRepository(data_folder)
+    repository.watched = True
+    repository.load(large_file)
+    measure(repository.load, large_file)
+
+
+@pytest.mark.parametrize('storage_format', ['pretty', 'minified', 'gzip'])
+def test_repository_save(measure, data_folder, large_file, tmp_path, storage_format):
+    group = GroupRepository(data_folder).load(large_file)
+    repository = GroupRepository(str(tmp_path), storage_format=storage_format)
+    measure(repository.save, 'saved.json', group)
+
+
+@pytest.mark.parametrize('storage_format', ['minified', 'gzip'])
+def test_repository_load_cold_compact(measure, data_folder, large_file, tmp_path, storage_format):
+    repository = GroupRepository(str(tmp_path), storage_format=storage_format)
+    repository.save(large_file, GroupRepository(data_folder).load(large_file))
+    measure(repository.load, large_file, setup=repository.clear)
+
+
+def test_write_json_atomic(measure, large_bytes, tmp_path):
+    data = codec.loads(large_bytes)
+    measure(write_json_atomic, str(tmp_path / 'atomic.json'), data)
+
+
+def test_validate_group_file(measure, data_folder, large_file):
+    validator = GroupValidator.from_file()
+    measure(validate_group_file, os.path.join(data_folder, large_file), validator)
+
+
+def test_catalog_refresh_cold(measure, data_folder, tmp_path):
+    catalogs = []
+
+    def setup():
+        if catalogs:
+            catalogs.pop().close()
+        db_path = tmp_path / 'catalog.sqlite3'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(f'{db_path}{suffix}'):
+                os.remove(f'{db_path}{suffix}')
+        catalogs.append(GroupCatalog(data_folder, str(db_path)))
+
+    measure(lambda: catalogs[-1].refresh(force=True), setup=setup, rounds=5)
+    catalogs.pop().close()
+
+
+def test_catalog_refresh_warm(measure, data_folder, tmp_path):
+    catalog = GroupCatalog(data_folder, str(tmp_path / 'catalog.sqlite3'))
+    catalog.refresh(force=True)
+    measure(catalog.refresh, force=True)
+    catalog.close()
+
+
+def test_search_index_build(measure, data_folder):
+    indexes = []
+    measure(lambda: indexes[-1].refresh(force=True), setup=lambda: indexes.append(SearchIndex(data_folder)), rounds=5)
+
+
+def test_search_index_update(measure, data_folder, large_file):
+    index = SearchIndex(data_folder)
+    index.refresh(force=True)
+    group = GroupRepository(data_folder).load(large_file)
+    measure(index.update, large_file, group)
+
+
+def test_member_form_parse(measure, data_folder, large_file):
+    form = MemberForm.from_group_schema(GroupValidator.from_file().schema)
+    member = GroupRepository(data_folder).load(large_file).members[0]
+    values = form.values(member)
+    submitted = MultiDict(
+        {name: ('on' if value else '') if isinstance(value, bool) else str(value) for name, value in values.items()}
+    )
+    measure(form.parse, submitted, member)
+
+
+def test_member_form_values(measure, data_folder, large_file):
+    form = MemberForm.from_group_schema(GroupValidator.from_file().schema)
+    member = GroupRepository(data_folder).load(large_file).members[0]
+    measure(form.values, member)
+
+
+def test_member_columns_summary(measure, data_folder, large_file):
+    members = GroupRepository(data_folder).load(large_file).members
+    measure(lambda: MemberColumns(members).summary())
+
+
+def test_history_record_member_edit(measure, data_folder, large_file, tmp_path):
+    group = GroupRepository(data_folder).load(large_file)
+    history = GroupHistory(str(tmp_path))
+    history.record(large_file, group)
+    member = group.members[0]
+
+    def edit():
+        member['currentSkill'] = (member['currentSkill'] + 1) % 8
+        history.record(large_file, group)
+
+    measure(edit)
+    # Each entry holds the one changed field, not the group
+    entries = history.entries(large_file)
+    assert all(len(entry.get('diff', ())) == 1 for entry in entries[1:])
@@ -0,0 +1,269 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(params=['small', 'large'])
+def group_file(request, small_file, large_file):
+    return small_file if request.param == 'small' else large_file
+
+
+def first_member(app_module, filename):
+    return app_module.repository.load(filename).members[0]['uuid']
+
+
+def member_form(app_module, filename, member_uuid):
+    member = app_module.repository.load(filename).find(member_uuid)
+    return {
+        'class': member['class'],
+        'variant': member['variant'],
+        'name': member['name'],
+        'tonnage': str(member['tonnage']),
+        'basePoints': str(member['basePoints']),
+        'currentSkill': str(member['currentSkill']),
+        'armor': str(member['armor']),
+        'structure': str(member['structure']),
+        'size': str(member['size']),
+        'move_value': '8',
+        'move_current': '8',
+        'move_type': 'Walk',
+        'damage_short': '3',
+        'damage_medium': '2',
+        'damage_long': '1',
+        'damage_extreme': '0',
+        'pilot_name': 'Benchmark',
+        'pilot_gunnery': '4',
+        'pilot_piloting': '5',
+    }
+
+
+def check(response, status=200):
+    assert response.status_code == status, response.data[:500]
+    return response
+
+
+def test_index(measure, client):
+    measure(lambda: check(client.get('/')))
+
+
+def test_index_filtered_sorted(measure, client):
+    measure(lambda: check(client.get('/?q=Generated&sort=pv&order=desc&page=2')))
+
+
+def test_edit_group_get(measure, client, group_file):
+    measure(lambda: check(client.get(f'/edit/{group_file}')))
+
+
+def test_edit_group_members_filtered(measure, client, group_file):
+    measure(lambda: check(client.get(f'/edit/{group_file}?q=atlas&sort=pv&order=desc')))
+
+
+def test_member_cards_page(measure, client, group_file):
+    measure(lambda: check(client.get(f'/edit/{group_file}/members?page=2&sort=name')))
+
+
+def test_api_members(measure, client, group_file):
+    measure(lambda: check(client.get(f'/api/groups/{group_file}/members?sort=skill&per_page=100')))
+
+
+def test_edit_group_not_modified(measure, client, group_file):
+    etag = check(client.get(f'/edit/{group_file}')).headers['ETag']
+    measure(lambda: check(client.get(f'/edit/{group_file}', headers={'If-None-Match': etag}), 304))
+
+
+def test_edit_group_post(measure, client, group_file):
+    form = {'name': 'Benchmark Group', 'formationBonus': 'Battle Lance', 'groupLabel': 'Bench'}
+    measure(lambda: check(client.post(f'/edit/{group_file}', data=form), 302))
+
+
+def test_new_member_get(measure, client, group_file):
+    measure(lambda: check(client.get(f'/member/{group_file}/new')))
+
+
+def test_new_member_post(measure, app_module, client, small_file):
+    form = member_form(app_module, small_file, first_member(app_module, small_file))
+    measure(lambda: check(client.post(f'/member/{small_file}/new', data=form), 302))
+
+
+def test_edit_member_get(measure, app_module, client, group_file):
+    member_uuid = first_member(app_module, group_file)
+    measure(lambda: check(client.get(f'/member/{group_file}/edit/{member_uuid}')))
+
+
+def test_edit_member_post(measure, app_module, client, group_file):
+    member_uuid = first_member(app_module, group_file)
+    form = member_form(app_module, group_file, member_uuid)
+    measure(lambda: check(client.post(f'/member/{group_file}/edit/{member_uuid}', data=form), 302))
+
+
+def test_delete_member(measure, app_module, client, group_file):
+    added = []
+
+    def setup():
+        group = app_module.repository.load(group_file)
+        added.append(group.duplicate(group.members[0]['uuid'])['uuid'])
+
+    measure(lambda: check(client.post(f'/member/{group_file}/delete/{added[-1]}'), 302), setup=setup)
+
+
+def test_new_group(measure, app_module, client):
+    def setup():
+        path = app_module.repository.path('new_group.json')
+        if os.path.exists(path):
+            app_module.repository.invalidate('new_group.json')
+            os.remove(path)
+
+    form = {'filename': 'new_group.json', 'name': 'New'}
+    measure(lambda: check(client.post('/new', data=form), 302), setup=setup)
+
+
+def test_copy_group(measure, app_module, client, group_file):
+    target = f'copy_of_{group_file}'
+
+    def setup():
+        path = app_module.repository.path(target)
+        if os.path.exists(path):
+            app_module.repository.invalidate(target)
+            os.remove(path)
+
+    form = {'new_filename': target, 'update_member_uuids': 'on'}
+    measure(lambda: check(client.post(f'/copy/{group_file}', data=form), 302), setup=setup)
+
+
+def test_rename_group(measure, client, small_file):
+    names = [small_file, 'renamed.json']
+
+    def rename():
+        check(client.post(f'/rename/{names[0]}', data={'new_filename': names[1]}), 302)
+        names.reverse()
+
+    measure(rename)
+    if names[0] != small_file:
+        rename()
+
+
+def test_delete_group(measure, app_module, client, small_file):
+    def setup():
+        app_module.repository.save('doomed.json', app_module.repository.load(small_file).copy())
+
+    measure(lambda: check(client.post('/delete/doomed.json'), 302), setup=setup)
+
+
+def test_group_history(measure, app_module, client, group_file):
+    check(client.post(f'/edit/{group_file}', data={'name': 'History', 'formationBonus': '', 'groupLabel': ''}), 302)
+    app_module.repository.flush(group_file)
+    measure(lambda: check(client.get(f'/history/{group_file}')))
+
+
+def test_undo_redo(measure, client, group_file):
+    check(client.post(f'/edit/{group_file}', data={'name': 'Undo', 'formationBonus': '', 'groupLabel': ''}), 302)
+
+    def undo_redo():
+        check(client.post(f'/history/{group_file}/undo'), 302)
+        check(client.post(f'/history/{group_file}/redo'), 302)
+
+    measure(undo_redo)
+
+
+def test_external_change(measure, app_module, client, group_file):
+    path = app_module.repository.path(group_file)
+    check(client.get(f'/edit/{group_file}'))
+
+    def touch():
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    measure(app_module.file_changed, group_file, setup=touch)
+
+
+def test_download(measure, client, group_file):
+    measure(lambda: check(client.get(f'/download/{group_file}')).close())
+
+
+def test_upload(measure, app_module, client, group_file):
+    with open(app_module.repository.path(group_file), 'rb') as f:
+        content = f.read()
+
+    def upload():
+        data = {'file': (io.BytesIO(content), f'uploaded_{group_file}')}
+        check(client.post('/upload', data=data, content_type='multipart/form-data'), 302)
+
+    measure(upload)
+
+
+def test_api_group_analytics(measure, client, group_file):
+    measure(lambda: check(client.get(f'/api/groups/{group_file}/analytics')))
+
+
+def test_api_analytics(measure, client):
+    measure(lambda: check(client.get('/api/analytics')))
+
+
+def test_compare_page(measure, client):
+    measure(lambda: check(client.get('/analytics')))
+
+
+@pytest.fixture
+def import_zip(app_module):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename in sorted(os.listdir(app_module.app.config['UPLOAD_FOLDER'])):
+            if filename.startswith('generated_'):
+                archive.write(app_module.repository.path(filename), f'campaign/imported_{filename}')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('pool', ['thread', 'process'])
+def test_import_zip(measure, app_module, client, import_zip, pool, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'IMPORT_POOL', pool)
+    monkeypatch.setitem(app_module.app.config, 'IMPORT_WORKERS', 4)
+
+    def upload():
+        data = {'file': (io.BytesIO(import_zip), 'campaign.zip')}
+        response = check(client.post('/api/import', data=data, content_type='multipart/form-data'))
+        assert response.json['imported'] == len(response.json['results'])
+
+    measure(upload)
+
+
+def test_export_zip(measure, client):
+    def export():
+        response = check(client.get('/export'))
+        assert zipfile.ZipFile(io.BytesIO(response.data)).testzip() is None
+
+    measure(export)
+
+
+@pytest.mark.parametrize('query', ['atlas', 'class:locust gunnery<=3', 'group.pv>300 role:sniper'])
+def test_search_page(measure, client, query):
+    measure(lambda: check(client.get('/search', query_string={'q': query})))
+
+
+def test_api_search(measure, client):
+    measure(lambda: check(client.get('/api/search', query_string={'q': 'timber wolf pv>=30'})))
+
+
+def test_batch_members(measure, app_module, client, group_file):
+    member_uuid = first_member(app_module, group_file)
+    operations = [
+        {'op': 'update', 'uuid': member_uuid, 'member': {'currentHeat': 1}},
+        {'op': 'update', 'uuid': member_uuid, 'member': {'currentHeat': 0}},
+    ]
+    measure(lambda: check(client.post(f'/api/groups/{group_file}/members:batch', json=operations)))
+
+
+def test_patch_member(measure, app_module, client, group_file):
+    member_uuid = first_member(app_module, group_file)
+    patch = [{'op': 'replace', 'path': '/currentHeat', 'value': 2}]
+    url = f'/api/groups/{group_file}/members/{member_uuid}'
+    measure(lambda: check(client.patch(url, json=patch, content_type='application/json-patch+json')))
+
+
+def test_patch_group(measure, client, group_file):
+    patch = {'groupLabel': 'Patched'}
+    url = f'/api/groups/{group_file}'
+    measure(lambda: check(client.patch(url, json=patch, content_type='application/merge-patch+json')))
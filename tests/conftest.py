@@ -0,0 +1,141 @@
+import importlib
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from src import codec
+from src.generator import write_groups
+from src.models import Group
+from src.validation import GroupValidator
+
+SAMPLE_GROUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'sample_lance.json')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('jeffjsoneditor benchmarks')
+    group.addoption('--bench-files', type=int, default=50, help='number of generated group files (default: 50)')
+    group.addoption('--bench-members', type=int, default=20, help='members per generated group (default: 20)')
+    group.addoption(
+        '--bench-large-members', type=int, default=2000, help='members in the one large group (default: 2000)'
+    )
+    group.addoption(
+        '--memory-baseline',
+        metavar='PATH',
+        help='saved benchmark JSON (from --benchmark-save) whose peak memory figures the run is compared with',
+    )
+    group.addoption(
+        '--memory-tolerance',
+        type=float,
+        default=0.25,
+        help='allowed growth in peak memory over --memory-baseline, as a fraction (default: 0.25)',
+    )
+
+
+@pytest.fixture(scope='session')
+def bench_root(tmp_path_factory, pytestconfig):
+    """A working folder whose ``data/`` holds the generated groups: ``generated_*.json`` and ``large_0.json``."""
+    root = tmp_path_factory.mktemp('bench')
+    data = root / 'data'
+    write_groups(data, pytestconfig.getoption('bench_files'), pytestconfig.getoption('bench_members'), seed=0)
+    write_groups(data, 1, pytestconfig.getoption('bench_large_members'), seed=1, prefix='large')
+    return root
+
+
+@pytest.fixture(scope='session')
+def app_module(bench_root):
+    """``src.app`` imported with the generated data as its data folder.
+
+    The app resolves ``data/`` against the working directory, so the session
+    runs from ``bench_root``.
+    """
+    cwd = os.getcwd()
+    os.chdir(bench_root)
+    try:
+        module = importlib.import_module('src.app')
+        module.app.config['TESTING'] = True
+        yield module
+        module.watcher.stop()
+        module.repository.close()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def small_file(bench_root):
+    return 'generated_00.json'
+
+
+@pytest.fixture(scope='session')
+def large_file(bench_root):
+    return 'large_0.json'
+
+
+@pytest.fixture(scope='session')
+def validator():
+    return GroupValidator.from_file()
+
+
+@pytest.fixture
+def sample_group():
+    """A fresh copy of the sample lance shipped in ``data/``."""
+    return Group(codec.load_file(SAMPLE_GROUP))
+
+
+@pytest.fixture(scope='session')
+def memory_baseline(pytestconfig):
+    path = pytestconfig.getoption('memory_baseline')
+    if not path:
+        return {}
+    with open(path, 'r') as f:
+        saved = json.load(f)
+    return {b['fullname']: b.get('extra_info', {}).get('peak_memory_kib') for b in saved.get('benchmarks', [])}
+
+
+@pytest.fixture
+def measure(benchmark, request, memory_baseline, pytestconfig):
+    """Benchmark ``func(*args)`` and record the peak memory of one call in ``extra_info``.
+
+    With ``--memory-baseline`` the test fails if the peak grew by more than
+    ``--memory-tolerance`` over the saved figure for the same benchmark.
+    """
+
+    def run(func, *args, setup=None, rounds=None, **kwargs):
+        # Warm up first so one-off work such as building the catalog is not counted
+        if setup is not None:
+            setup()
+        func(*args, **kwargs)
+
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        peak_kib = round(peak / 1024, 1)
+        benchmark.extra_info['peak_memory_kib'] = peak_kib
+
+        baseline = memory_baseline.get(request.node.nodeid)
+        if baseline:
+            limit = baseline * (1 + pytestconfig.getoption('memory_tolerance'))
+            assert peak_kib <= limit, f'peak memory {peak_kib} KiB exceeds the baseline {baseline} KiB'
+
+        if setup is None:
+            return benchmark(func, *args, **kwargs)
+        return benchmark.pedantic(
+            func,
+            args=args,
+            kwargs=kwargs,
+            setup=setup,
+            rounds=rounds or 20,
+        )
+
+    return run
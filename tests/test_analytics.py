@@ -0,0 +1,46 @@
+import pytest
+
+from src.analytics import MemberColumns, adjusted_pv, combine
+
+
+@pytest.mark.parametrize(
+    ('pv', 'skill', 'expected'),
+    [
+        (20, 4, 20),
+        # Better pilots: +1 per level up to 7 PV, +2 from 8 to 12, +4 from 18 to 22
+        (7, 3, 8),
+        (8, 3, 10),
+        (12, 0, 20),
+        (20, 2, 28),
+        # Worse pilots: -1 per level up to 14 PV, -2 from 15 to 24
+        (14, 5, 13),
+        (15, 5, 13),
+        (20, 7, 14),
+        (2, 7, 1),
+        (0, 0, 0),
+    ],
+)
+def test_adjusted_pv(pv, skill, expected):
+    assert adjusted_pv(pv, skill) == expected
+
+
+def test_summary_uses_current_skill_then_gunnery():
+    members = [
+        {'basePoints': 20, 'currentSkill': 2, 'pilot': {'gunnery': 6}},
+        {'basePoints': 20, 'pilot': {'gunnery': 7}},
+        {'basePoints': '8'},
+        {'basePoints': 'n/a', 'currentSkill': 3},
+    ]
+    summary = MemberColumns(members).summary()
+    assert summary['pv'] == 48
+    assert summary['adjustedPv'] == 28 + 14 + 8 + 0
+    assert summary['averageSkill'] == 4.0
+
+
+def test_combined_summary_adds_the_adjusted_pv():
+    first = MemberColumns([{'basePoints': 20, 'currentSkill': 2}]).summary()
+    second = MemberColumns([{'basePoints': 15, 'currentSkill': 5}, {'basePoints': 4}]).summary()
+    total = combine([first, second])
+    assert total['adjustedPv'] == 28 + 13 + 4
+    assert total['pv'] == 39
+    assert combine([])['averageSkill'] is None
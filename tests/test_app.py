@@ -0,0 +1,311 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from src import codec
+from src.patching import MERGE_PATCH
+from src.repository import GroupRepository
+
+
+@pytest.fixture
+def scratch_group(app_module, small_file):
+    """A copy of a generated group under its own name, removed again after the test."""
+    repository = app_module.repository
+    filename = 'scratch.json'
+    repository.save(filename, repository.load(small_file).copy())
+    yield filename
+    repository.invalidate(filename)
+    if os.path.exists(repository.path(filename)):
+        os.remove(repository.path(filename))
+    app_module.catalog.remove(filename)
+    app_module.search_index.remove(filename)
+    app_module.history.purge(filename)
+
+
+@pytest.fixture
+def watched(app_module):
+    """Trust the cache as a live watcher would, with no watcher thread reporting changes in the meantime."""
+    app_module.watcher.stop()
+    app_module.repository.watched = True
+    yield app_module.repository
+    app_module.repository.watched = False
+    app_module.watcher.start()
+
+
+def write_elsewhere(app_module, filename, **fields):
+    """Change ``filename`` as another worker process would."""
+    other = GroupRepository(app_module.app.config['UPLOAD_FOLDER'])
+    group = other.load(filename)
+    for key, value in fields.items():
+        group[key] = value
+    other.save(filename, group)
+    return other.version(filename)[0]
+
+
+def test_watched_cache_refuses_stale_if_match(app_module, client, scratch_group, watched):
+    etag = watched.version(scratch_group)[0]
+    write_elsewhere(app_module, scratch_group, name='Elsewhere')
+
+    response = client.patch(
+        f'/api/groups/{scratch_group}',
+        json={'groupLabel': 'Here'},
+        headers={'Content-Type': 'application/merge-patch+json', 'If-Match': f'"{etag}"'},
+    )
+    assert response.status_code == 412
+    assert watched.load(scratch_group)['name'] == 'Elsewhere'
+
+
+def test_watched_cache_keeps_change_from_another_process(app_module, client, scratch_group, watched):
+    watched.load(scratch_group)
+    write_elsewhere(app_module, scratch_group, name='Elsewhere')
+
+    response = client.patch(
+        f'/api/groups/{scratch_group}',
+        data='{"groupLabel": "Here"}',
+        headers={'Content-Type': 'application/merge-patch+json'},
+    )
+    assert response.status_code == 200
+    watched.flush(scratch_group)
+    saved = GroupRepository(app_module.app.config['UPLOAD_FOLDER']).load(scratch_group)
+    assert (saved['name'], saved['groupLabel']) == ('Elsewhere', 'Here')
+
+
+def test_if_match_accepts_etag_of_flushed_deferred_save(app_module, client, scratch_group):
+    response = client.patch(
+        f'/api/groups/{scratch_group}', data='{"groupLabel": "First"}', content_type='application/merge-patch+json'
+    )
+    given = response.headers['ETag']
+    app_module.repository.flush(scratch_group)
+    assert f'"{app_module.repository.version(scratch_group)[0]}"' != given
+
+    response = client.patch(
+        f'/api/groups/{scratch_group}',
+        data='{"groupLabel": "Second"}',
+        headers={'Content-Type': 'application/merge-patch+json', 'If-Match': given},
+    )
+    assert response.status_code == 200
+
+
+def test_json_patch_to_group(app_module, client, scratch_group):
+    response = client.patch(
+        f'/api/groups/{scratch_group}',
+        json=[{'op': 'replace', 'path': '/groupLabel', 'value': 'Patched'}],
+        headers={'Content-Type': 'application/json-patch+json'},
+    )
+    assert response.status_code == 200
+    assert app_module.repository.load(scratch_group)['groupLabel'] == 'Patched'
+
+
+@pytest.mark.parametrize(
+    ('operations', 'status'),
+    [
+        ([{'op': 'test', 'path': '/groupLabel', 'value': 'Not the label'}], 409),
+        ([{'op': 'remove', 'path': '/no-such-field'}], 422),
+        ([{'op': 'jump', 'path': '/groupLabel'}], 422),
+    ],
+)
+def test_failed_json_patch_leaves_group_unchanged(app_module, client, scratch_group, operations, status):
+    before = app_module.repository.load(scratch_group).to_dict()
+    response = client.patch(
+        f'/api/groups/{scratch_group}', json=operations, headers={'Content-Type': 'application/json-patch+json'}
+    )
+    assert response.status_code == status
+    assert app_module.repository.load(scratch_group).to_dict() == before
+
+
+def test_patch_needs_a_patch_media_type(client, scratch_group):
+    response = client.patch(f'/api/groups/{scratch_group}', data='{}', content_type='text/plain')
+    assert response.status_code == 415
+
+
+def test_edit_page_answers_conditional_get(client, scratch_group):
+    response = client.get(f'/edit/{scratch_group}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    assert client.get(f'/edit/{scratch_group}', headers={'If-None-Match': etag}).status_code == 304
+    client.patch(f'/api/groups/{scratch_group}', json={'groupLabel': 'Changed'}, content_type=MERGE_PATCH)
+    response = client.get(f'/edit/{scratch_group}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_if_match_guards_form_and_api_writes(app_module, client, scratch_group):
+    etag = app_module.repository.version(scratch_group)[0]
+    client.patch(f'/api/groups/{scratch_group}', json={'groupLabel': 'Changed'}, content_type=MERGE_PATCH)
+
+    # Forms are sent back to the edit page with a warning rather than answered with a bare 412
+    client.post(f'/edit/{scratch_group}', data={'name': 'Stale', 'etag': etag})
+    assert app_module.repository.load(scratch_group)['name'] != 'Stale'
+    response = client.patch(
+        f'/api/groups/{scratch_group}',
+        json={'groupLabel': 'Stale'},
+        headers={'Content-Type': MERGE_PATCH, 'If-Match': f'"{etag}"'},
+    )
+    assert response.status_code == 412
+    assert app_module.repository.load(scratch_group)['groupLabel'] == 'Changed'
+
+    current = app_module.repository.version(scratch_group)[0]
+    response = client.post(f'/edit/{scratch_group}', data={'name': 'Fresh', 'etag': current})
+    assert response.status_code == 302
+    assert app_module.repository.load(scratch_group)['name'] == 'Fresh'
+
+
+def test_failing_batch_changes_nothing(app_module, client, scratch_group):
+    group = app_module.repository.load(scratch_group)
+    before = group.to_dict()
+    first, second = (member['uuid'] for member in group.members[:2])
+
+    response = client.post(
+        f'/api/groups/{scratch_group}/members:batch',
+        json={
+            'operations': [{'op': 'delete', 'uuid': first}, {'op': 'update', 'uuid': second, 'member': {'size': 'L'}}]
+        },
+    )
+    assert response.status_code == 422
+    assert [result['status'] for result in response.get_json()['results']] == ['rolled_back', 'error']
+    assert app_module.repository.load(scratch_group).to_dict() == before
+
+
+@pytest.fixture
+def import_names(app_module):
+    """Names used by an import test, removed again afterwards."""
+    names = ['imported.json', 'broken.json', 'invalid.json']
+    yield names
+    for name in names:
+        app_module.repository.invalidate(name)
+        if os.path.exists(app_module.repository.path(name)):
+            os.remove(app_module.repository.path(name))
+        app_module.catalog.remove(name)
+        app_module.search_index.remove(name)
+        app_module.history.purge(name)
+
+
+def test_import_reports_each_file(app_module, client, small_file, import_names):
+    good = codec.dumps(app_module.repository.load(small_file).to_dict())
+    invalid = codec.dumps({'name': 'No members'})
+    files = [
+        (io.BytesIO(good), 'imported.json'),
+        (io.BytesIO(b'{"name": '), 'broken.json'),
+        (io.BytesIO(invalid), 'invalid.json'),
+        (io.BytesIO(b'hello'), 'notes.txt'),
+        (io.BytesIO(good), 'imported.json'),
+    ]
+    response = client.post('/api/import', data={'file': files}, content_type='multipart/form-data')
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['imported'] == 1
+    assert [(result['filename'], result['status']) for result in body['results']] == [
+        ('imported.json', 'imported'),
+        ('broken.json', 'error'),
+        ('invalid.json', 'invalid'),
+        ('notes.txt', 'skipped'),
+        ('imported.json', 'skipped'),
+    ]
+    assert body['results'][2]['errors']
+    assert app_module.repository.exists('imported.json')
+    assert not app_module.repository.exists('broken.json')
+    assert not app_module.repository.exists('invalid.json')
+    assert not [name for name in os.listdir(app_module.repository.folder) if name.startswith('.') and 'tmp' in name]
+
+
+def test_import_with_nothing_imported_is_unprocessable(client, import_names):
+    files = [(io.BytesIO(b'[]'), 'broken.json'), (io.BytesIO(b'hello'), 'notes.txt')]
+    response = client.post('/api/import', data={'file': files}, content_type='multipart/form-data')
+    assert response.status_code == 422
+    assert response.get_json()['imported'] == 0
+
+
+def test_unparseable_group_is_not_deleted_without_a_trash_copy(app_module, client, scratch_group):
+    path = app_module.repository.path(scratch_group)
+    with open(path, 'w') as f:
+        f.write('{"name": ')
+    app_module.repository.invalidate(scratch_group)
+
+    client.post(f'/delete/{scratch_group}')
+    assert os.path.exists(path)
+    assert scratch_group not in [filename for filename, _ in app_module.history.deleted()]
+
+
+def test_rename_onto_a_trashed_group_is_refused(app_module, client, scratch_group, small_file):
+    other = 'scratch-other.json'
+    app_module.repository.save(other, app_module.repository.load(small_file).copy())
+    client.post(f'/delete/{scratch_group}')
+    assert scratch_group in [filename for filename, _ in app_module.history.deleted()]
+
+    response = client.post(f'/rename/{other}', data={'new_filename': scratch_group})
+    assert response.status_code == 200
+    assert app_module.repository.exists(other)
+    assert not app_module.repository.exists(scratch_group)
+    assert scratch_group in [filename for filename, _ in app_module.history.deleted()]
+
+    client.post(f'/delete/{other}')
+    app_module.history.purge(other)
+
+
+def test_purge_only_removes_groups_in_the_trash(app_module, client, scratch_group):
+    response = client.post('/trash/never-there.json/purge', follow_redirects=True)
+    assert b'is not in the trash' in response.data
+
+    response = client.post(f'/trash/{scratch_group}/purge', follow_redirects=True)
+    assert b'is not in the trash' in response.data
+    assert app_module.repository.exists(scratch_group)
+
+    client.post(f'/delete/{scratch_group}')
+    response = client.post(f'/trash/{scratch_group}/purge', follow_redirects=True)
+    assert b'removed from the trash for good' in response.data
+    assert not os.path.exists(app_module.history.path(scratch_group))
+
+
+@pytest.mark.parametrize('storage_format', ['minified', 'gzip'])
+def test_download_is_indented_json_whatever_the_storage_format(app_module, client, scratch_group, storage_format):
+    stored = GroupRepository(app_module.app.config['UPLOAD_FOLDER'], storage_format=storage_format)
+    stored.save(scratch_group, app_module.repository.load(scratch_group).copy())
+    data = stored.load(scratch_group).to_dict()
+
+    response = client.get(f'/download/{scratch_group}')
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == codec.dumps(data)
+
+    response = client.get(f'/download/{scratch_group}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert codec.decompress(response.data) == codec.dumps(data)
+    if storage_format == 'gzip':
+        assert response.data == open(stored.path(scratch_group), 'rb').read()
+
+
+def test_member_api_filters_sorts_and_pages(app_module, client, scratch_group):
+    group = app_module.repository.load(scratch_group).copy()
+    for position, member in enumerate(group.members):
+        member['name'] = f'Quokka {position}' if position % 2 else f'Wombat {position}'
+    app_module.repository.save(scratch_group, group)
+    scouts = [position for position in range(len(group.members)) if position % 2]
+
+    response = client.get(f'/api/groups/{scratch_group}/members?q=quokka&order=desc&per_page=2&page=2')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == len(scouts)
+    assert data['pages'] == (len(scouts) + 1) // 2
+    assert [member['position'] for member in data['members']] == scouts[::-1][2:4]
+    assert all(member['name'].startswith('Quokka') for member in data['members'])
+
+    response = client.get(f'/api/groups/{scratch_group}/members?per_page=100000')
+    assert response.get_json()['per_page'] == app_module.app.config['MEMBER_API_MAX_PAGE_SIZE']
+    response = client.get(f'/api/groups/{scratch_group}/members', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert client.get('/api/groups/missing.json/members').status_code == 404
+
+
+def test_export_streams_the_named_groups(client, scratch_group, small_file):
+    response = client.get(f'/export?file={scratch_group}&file={small_file}&file={scratch_group}')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Cache-Control'] == 'no-store'
+    with zipfile.ZipFile(io.BytesIO(response.get_data())) as archive:
+        assert archive.namelist() == [scratch_group, small_file]
+
+    response = client.get('/export?file=../secret.json', follow_redirects=True)
+    assert b'not found' in response.data
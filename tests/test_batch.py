@@ -0,0 +1,56 @@
+from src.batch import apply_batch
+
+ATLAS = '550e8400-e29b-41d4-a716-446655440001'
+
+
+def test_operations_see_earlier_ones(sample_group, validator):
+    new = sample_group.members[0].to_dict() | {'uuid': 'new-1', 'name': 'Atlas AS7-K'}
+    ok, results = apply_batch(
+        sample_group,
+        [
+            {'op': 'add', 'member': new},
+            {'op': 'update', 'uuid': 'new-1', 'member': {'customName': 'Second'}},
+            {'op': 'duplicate', 'uuid': ATLAS, 'name': 'Copy'},
+            {'op': 'delete', 'uuid': ATLAS},
+        ],
+        validator,
+    )
+    assert ok
+    assert [result['status'] for result in results] == ['ok'] * 4
+    assert [member['name'] for member in sample_group.members] == ['Atlas AS7-K', 'Copy']
+    assert sample_group.find('new-1')['customName'] == 'Second'
+    assert sample_group.find(ATLAS) is None
+
+
+def test_failing_operation_rolls_back_the_batch(sample_group, validator):
+    before = sample_group.to_dict()
+    ok, results = apply_batch(
+        sample_group,
+        [
+            {'op': 'duplicate', 'uuid': ATLAS},
+            {'op': 'update', 'uuid': ATLAS, 'member': {'tonnage': 'heavy'}},
+            {'op': 'delete', 'uuid': ATLAS},
+            {'op': 'delete', 'uuid': 'missing'},
+            {'op': 'launch'},
+            'delete everything',
+        ],
+        validator,
+    )
+    assert not ok
+    assert [result['status'] for result in results] == [
+        'rolled_back',
+        'error',
+        'rolled_back',
+        'error',
+        'error',
+        'error',
+    ]
+    assert 'missing' in results[3]['error']
+    assert sample_group.to_dict() == before
+    assert sample_group.find(ATLAS) is not None
+
+
+def test_update_cannot_change_the_uuid(sample_group, validator):
+    ok, results = apply_batch(sample_group, [{'op': 'update', 'uuid': ATLAS, 'member': {'uuid': 'other'}}], validator)
+    assert not ok
+    assert results[0]['error'] == 'update cannot change a member uuid'
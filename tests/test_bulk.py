@@ -0,0 +1,40 @@
+import io
+import os
+import zipfile
+
+from src import codec
+from src.bulk import export_zip
+from src.repository import GroupRepository
+
+
+def group(name):
+    return {'name': name, 'uuid': name, 'members': [{'uuid': 'm1', 'name': 'One'}]}
+
+
+def test_export_zip_holds_indented_json_of_every_format(tmp_path):
+    for storage_format in ('pretty', 'minified', 'gzip'):
+        GroupRepository(str(tmp_path), storage_format=storage_format).save(
+            f'{storage_format}.json', group(storage_format)
+        )
+    repository = GroupRepository(str(tmp_path))
+
+    chunks = list(export_zip(repository, ['pretty.json', 'minified.json', 'gzip.json'], chunk_size=16))
+    assert len(chunks) > 3
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ['pretty.json', 'minified.json', 'gzip.json']
+        for name in archive.namelist():
+            assert archive.read(name) == codec.dumps(group(name[:-5]))
+
+
+def test_export_zip_writes_pending_saves_and_skips_missing_files(tmp_path):
+    repository = GroupRepository(str(tmp_path), write_delay=60)
+    repository.save('a.json', group('a'))
+    repository.save('b.json', group('b'))
+    repository.save('a.json', group('changed'), defer=True)
+    os.remove(repository.path('b.json'))
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(export_zip(repository, ['a.json', 'b.json'])))) as archive:
+        assert archive.namelist() == ['a.json']
+        assert codec.loads(archive.read('a.json')) == group('changed')
+    repository.close()
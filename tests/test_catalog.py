@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from src.catalog import GroupCatalog
+
+
+def write_group(folder, filename, name, label=''):
+    with open(os.path.join(folder, filename), 'w') as f:
+        json.dump({'name': name, 'groupLabel': label, 'uuid': filename, 'members': []}, f)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = GroupCatalog(str(tmp_path), str(tmp_path / '.catalog.sqlite3'))
+    yield catalog
+    catalog.close()
+
+
+@pytest.mark.parametrize(
+    ('search', 'expected'),
+    [('50%', ['half.json']), ('a_b', ['underscore.json']), ('back\\slash', ['slash.json']), ('LANCE', ['half.json'])],
+)
+def test_search_matches_wildcards_literally(tmp_path, catalog, search, expected):
+    write_group(tmp_path, 'half.json', '50% Lance')
+    write_group(tmp_path, 'five.json', '500 Star')
+    write_group(tmp_path, 'underscore.json', 'Group', label='a_b')
+    write_group(tmp_path, 'axb.json', 'Group', label='axb')
+    write_group(tmp_path, 'slash.json', 'back\\slash')
+    catalog.refresh(force=True)
+
+    rows, total = catalog.query(search)
+    assert [row['filename'] for row in rows] == expected
+    assert total == len(expected)
+
+
+def names(catalog):
+    return {row['filename']: (row['name'], row['valid']) for row in catalog.query()[0]}
+
+
+def test_refresh_picks_up_files_changed_outside_the_app(tmp_path, catalog):
+    write_group(tmp_path, 'a.json', 'Alpha')
+    write_group(tmp_path, 'b.json', 'Bravo')
+    catalog.refresh(force=True)
+    assert names(catalog) == {'a.json': ('Alpha', 1), 'b.json': ('Bravo', 1)}
+
+    write_group(tmp_path, 'a.json', 'Alpha Changed')
+    os.remove(tmp_path / 'b.json')
+    (tmp_path / 'c.json').write_text('{"name": ')
+    catalog.refresh(force=True)
+    assert names(catalog) == {'a.json': ('Alpha Changed', 1), 'c.json': ('', 0)}
+
+
+def test_refresh_waits_for_the_interval(tmp_path):
+    catalog = GroupCatalog(str(tmp_path), str(tmp_path / '.catalog.sqlite3'), refresh_interval=3600)
+    catalog.refresh()
+    write_group(tmp_path, 'a.json', 'Alpha')
+    catalog.refresh()
+    assert names(catalog) == {}
+    catalog.refresh(force=True)
+    assert names(catalog) == {'a.json': ('Alpha', 1)}
+    catalog.close()
+
+
+def test_rows_survive_a_restart(tmp_path, catalog):
+    write_group(tmp_path, 'a.json', 'Alpha')
+    catalog.refresh(force=True)
+    reopened = GroupCatalog(str(tmp_path), str(tmp_path / '.catalog.sqlite3'))
+    assert reopened.is_current('a.json', os.stat(tmp_path / 'a.json'))
+    assert names(reopened) == {'a.json': ('Alpha', 1)}
+    reopened.close()
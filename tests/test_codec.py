@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+
+from src import codec
+
+FORMATS = [
+    pytest.param(storage_format, marks=pytest.mark.skipif(codec.zstd is None, reason='zstd needs Python 3.14'))
+    if storage_format == 'zstd'
+    else storage_format
+    for storage_format in codec.FORMATS
+]
+
+
+@pytest.mark.parametrize('storage_format', FORMATS)
+def test_every_format_reads_back(tmp_path, sample_group, storage_format):
+    data = sample_group.to_dict()
+    content = codec.encode(data, storage_format)
+    path = tmp_path / 'group.json'
+    path.write_bytes(content)
+
+    assert codec.load_file(str(path)) == data
+    assert codec.content_encoding(content) == (storage_format if storage_format in codec.COMPRESSED else None)
+    assert codec.is_pretty(codec.decompress(content)) == (storage_format != 'minified')
+
+
+def test_gzip_output_does_not_change_between_saves():
+    content = codec.dumps({'name': 'Crew', 'members': []})
+    assert codec.compress(content, 'gzip') == codec.compress(content, 'gzip')
+
+
+def test_bom_is_skipped():
+    assert codec.loads(b'\xef\xbb\xbf{"name": "Crew"}') == {'name': 'Crew'}
+
+
+@pytest.mark.parametrize('content', [b'{"name": ', gzip.compress(b'{"name": ')[:-4]])
+def test_malformed_input_raises(content):
+    with pytest.raises(ValueError):
+        codec.loads(content)
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        codec.check_format('xml')
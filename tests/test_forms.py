@@ -0,0 +1,85 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from src.forms import MemberForm
+
+
+@pytest.fixture(scope='module')
+def form(validator):
+    return MemberForm.from_group_schema(validator.schema)
+
+
+def submitted(form, values):
+    """The form a browser submits for the shown ``values``, with the hidden input in front of each checkbox."""
+    data = MultiDict()
+    for name, value in values.items():
+        if form.by_name[name].kind == 'boolean':
+            data.add(name, '')
+            if value:
+                data.add(name, 'on')
+        else:
+            data.add(name, str(value))
+    return data
+
+
+def test_unchanged_form_gives_back_the_member(form, sample_group):
+    member = sample_group.members[0]
+    data, errors = form.parse(submitted(form, form.values(member)), member)
+    assert errors == {}
+    assert data == member.to_dict()
+
+
+def test_new_member_takes_every_field_from_the_form(form, sample_group):
+    member = sample_group.members[0].to_dict()
+    data, errors = form.parse(submitted(form, form.values(member)))
+    assert errors == {}
+    assert {key: member[key] for key in data} == data
+    assert 'uuid' not in data
+
+
+def test_values_are_read_as_their_field_types(form, sample_group):
+    member = sample_group.members[0]
+    values = form.values(member) | {
+        'tonnage': '72.5',
+        'pilot_gunnery': '2',
+        'abilities': 'ENE, CASE ,',
+        'pilot_alphaStrikeAbilities': '3, 12',
+        'showDetails': False,
+    }
+    data, errors = form.parse(submitted(form, values), member)
+    assert errors == {}
+    assert data['tonnage'] == 72.5
+    assert data['pilot']['gunnery'] == 2
+    assert data['abilities'] == ['ENE', 'CASE']
+    assert data['pilot']['alphaStrikeAbilities'] == [3, 12]
+    assert data['showDetails'] is False
+
+
+def test_bad_values_are_reported_by_form_name(form, sample_group):
+    member = sample_group.members[0]
+    values = form.values(member) | {'pilot_gunnery': '2.5', 'tonnage': 'heavy', 'name': ' '}
+    data, errors = form.parse(submitted(form, values), member)
+    assert errors == {'pilot_gunnery': 'must be a whole number', 'tonnage': 'must be a number', 'name': 'is required'}
+
+
+def test_fields_missing_from_the_form_are_kept_when_editing(form, sample_group):
+    member = sample_group.members[0]
+    data, errors = form.parse(MultiDict({'customName': 'Blue Leader'}), member)
+    assert errors == {}
+    assert data == member.to_dict() | {'customName': 'Blue Leader'}
+
+
+def test_blank_move_drops_the_first_move(form, sample_group):
+    member = sample_group.members[0]
+    values = form.values(member) | {'move_value': '', 'move_current': '', 'move_type': ''}
+    data, errors = form.parse(submitted(form, values), member)
+    assert errors == {}
+    assert data['move'] == []
+
+
+def test_values_overlay_the_submitted_form(form, sample_group):
+    member = sample_group.members[0]
+    values = form.values(member, MultiDict([('tonnage', 'heavy'), ('showDetails', '')]))
+    assert values['tonnage'] == 'heavy'
+    assert values['showDetails'] is False
+    assert values['pilot_name'] == 'Commander Smith'
@@ -0,0 +1,150 @@
+import json
+import os
+import types
+
+import pytest
+
+from src import history as history_module
+from src.history import GroupHistory, HistoryError
+
+FILENAME = 'crew.json'
+
+
+@pytest.fixture
+def history(tmp_path):
+    return GroupHistory(str(tmp_path), snapshot_interval=3)
+
+
+def group(name, *members):
+    return {'name': name, 'members': [{'uuid': str(i), 'name': member} for i, member in enumerate(members)]}
+
+
+def save(history, content, op=None, **fields):
+    """Write ``content`` as the group file and journal it, as the repository and its listener do."""
+    with open(os.path.join(history.data_folder, FILENAME), 'w') as f:
+        json.dump(content, f)
+    if op is None:
+        history.record(FILENAME, content)
+    else:
+        with history.label(FILENAME, op, **fields):
+            history.record(FILENAME, content)
+
+
+def test_every_version_can_be_replayed(history):
+    versions = [group('Crew'), group('Crew', 'Atlas'), group('Crew', 'Atlas', 'Locust'), group('Band', 'Locust')]
+    for content in versions:
+        save(history, content)
+    save(history, versions[-1])
+
+    entries = history.entries(FILENAME)
+    assert [entry['v'] for entry in entries] == [0, 1, 2, 3]
+    assert 'snapshot' in entries[0] and 'snapshot' in entries[3]
+    for v, content in enumerate(versions):
+        assert history.content_at(history.entries(FILENAME), v) == content
+
+
+def test_undo_and_redo(history):
+    save(history, group('Crew'))
+    save(history, group('Crew', 'Atlas'))
+
+    content, fields = history.undo(FILENAME)
+    assert content == group('Crew')
+    save(history, content, 'undo', **fields)
+    with pytest.raises(HistoryError):
+        history.undo(FILENAME)
+
+    content, fields = history.redo(FILENAME)
+    assert content == group('Crew', 'Atlas')
+    save(history, content, 'redo', **fields)
+    with pytest.raises(HistoryError):
+        history.redo(FILENAME)
+    assert history.undo(FILENAME)[0] == group('Crew')
+
+
+def test_new_change_clears_redo(history):
+    save(history, group('Crew'))
+    save(history, group('Crew', 'Atlas'))
+    content, fields = history.undo(FILENAME)
+    save(history, content, 'undo', **fields)
+    save(history, group('Crew', 'Locust'))
+
+    with pytest.raises(HistoryError):
+        history.redo(FILENAME)
+
+
+def test_restore_by_version_and_time(history, monkeypatch):
+    monkeypatch.setattr(history_module, 'time', types.SimpleNamespace(time=lambda: 1000.0))
+    save(history, group('Crew'))
+    monkeypatch.setattr(history_module, 'time', types.SimpleNamespace(time=lambda: 2000.0))
+    save(history, group('Band'))
+
+    assert history.restore(FILENAME, v=0) == (group('Crew'), {'target': 0})
+    assert history.restore(FILENAME, at=1500.0)[0] == group('Crew')
+    assert history.restore(FILENAME, at=2000.0)[0] == group('Band')
+    with pytest.raises(HistoryError):
+        history.restore(FILENAME, at=999.0)
+    with pytest.raises(HistoryError):
+        history.restore(FILENAME, v=7)
+
+
+def test_deleted_group_comes_back_from_the_trash(history):
+    save(history, group('Crew', 'Atlas'))
+    with pytest.raises(HistoryError):
+        history.undelete(FILENAME)
+
+    history.record_file(FILENAME, 'delete')
+    os.remove(os.path.join(history.data_folder, FILENAME))
+    assert [filename for filename, _ in history.deleted()] == [FILENAME]
+    with pytest.raises(HistoryError):
+        history.undo(FILENAME)
+
+    content, fields = history.undelete(FILENAME)
+    assert content == group('Crew', 'Atlas')
+    save(history, content, 'undelete', **fields)
+    assert history.deleted() == []
+
+
+def test_trash_is_purged_after_retention(tmp_path):
+    history = GroupHistory(str(tmp_path), retention_days=1)
+    save(history, group('Crew'))
+    history.record_file(FILENAME, 'delete')
+    os.remove(os.path.join(history.data_folder, FILENAME))
+
+    history.retention = -1
+    assert history.deleted() == []
+    assert not os.path.exists(history.path(FILENAME))
+
+
+def test_rename_keeps_the_history_of_a_trashed_group(history):
+    save(history, group('Crew'))
+    history.record_file(FILENAME, 'delete')
+    os.remove(os.path.join(history.data_folder, FILENAME))
+    with open(os.path.join(history.data_folder, 'other.json'), 'w') as f:
+        json.dump(group('Other'), f)
+    history.record_file('other.json', 'create')
+
+    with pytest.raises(HistoryError):
+        history.rename('other.json', FILENAME)
+    assert history.undelete(FILENAME)[0] == group('Crew')
+    assert history.entries('other.json')
+
+    history.rename('other.json', 'band.json')
+    assert history.entries('band.json')[0]['snapshot'] == group('Other')
+
+
+def test_unparseable_file_is_not_recorded(history):
+    with open(os.path.join(history.data_folder, FILENAME), 'w') as f:
+        f.write('{"name": ')
+    with pytest.raises(HistoryError):
+        history.record_file(FILENAME, 'delete')
+    history.baseline(FILENAME)
+    assert history.entries(FILENAME) == []
+
+
+def test_in_trash(history):
+    assert not history.in_trash(FILENAME)
+    save(history, group('Crew'))
+    assert not history.in_trash(FILENAME)
+    history.record_file(FILENAME, 'delete')
+    os.remove(os.path.join(history.data_folder, FILENAME))
+    assert history.in_trash(FILENAME)
@@ -0,0 +1,74 @@
+import pytest
+from flask import Flask
+
+from src.metrics import PREFIX, Registry, RequestMetrics, span
+
+
+@pytest.fixture
+def metrics_app():
+    app = Flask(__name__)
+    metrics = RequestMetrics(app, registry=Registry())
+
+    @app.route('/work', methods=['GET', 'POST'])
+    def work():
+        with span('parse'):
+            pass
+        return 'done'
+
+    return app, metrics.registry
+
+
+def test_requests_and_spans_are_rendered(metrics_app):
+    app, registry = metrics_app
+    client = app.test_client()
+    client.get('/work')
+    client.get('/work')
+    client.post('/work')
+    client.get('/missing')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert f'{PREFIX}_requests_total{{route="work",method="GET",status="200"}} 2' in text
+    assert f'{PREFIX}_requests_total{{route="work",method="POST",status="200"}} 1' in text
+    assert f'{PREFIX}_requests_total{{route="unmatched",method="GET",status="404"}} 1' in text
+    assert f'{PREFIX}_request_duration_seconds_bucket{{route="work",method="GET",le="+Inf"}} 2' in text
+    assert f'{PREFIX}_request_duration_seconds_count{{route="work",method="GET"}} 2' in text
+    assert f'{PREFIX}_span_duration_seconds_count{{route="work",span="parse"}} 3' in text
+    assert f'{PREFIX}_span_duration_seconds_count{{route="work",span="handler"}} 2' in text
+    assert f'{PREFIX}_span_duration_seconds_count{{route="work",span="mutate"}} 1' in text
+    assert f'# TYPE {PREFIX}_request_duration_seconds histogram' in text
+
+
+def test_server_timing_header_lists_the_spans(metrics_app):
+    app, _ = metrics_app
+    header = app.test_client().get('/work').headers['Server-Timing']
+    assert [part.split(';')[0] for part in header.split(', ')] == ['parse', 'handler', 'total']
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    for seconds in (0.0001, 0.003, 0.003, 20.0):
+        registry.observe_request('index', 'GET', 200, seconds)
+    text = registry.render()
+    assert f'{PREFIX}_request_duration_seconds_bucket{{route="index",method="GET",le="0.0005"}} 1' in text
+    assert f'{PREFIX}_request_duration_seconds_bucket{{route="index",method="GET",le="0.005"}} 3' in text
+    assert f'{PREFIX}_request_duration_seconds_bucket{{route="index",method="GET",le="10.0"}} 3' in text
+    assert f'{PREFIX}_request_duration_seconds_bucket{{route="index",method="GET",le="+Inf"}} 4' in text
+
+
+def test_background_spans_and_label_escaping():
+    registry = Registry()
+    registry.collectors.append(lambda: [('group_cache_entries', 'gauge', 'Groups held in the cache.', 3)])
+    registry.observe_span('background', 'write', 0.01)
+    registry.observe_request('say "hi"\n', 'GET', 200, 0.01)
+    text = registry.render()
+    assert f'{PREFIX}_span_duration_seconds_count{{route="background",span="write"}} 1' in text
+    assert 'route="say \\"hi\\"\\n"' in text
+    assert f'# TYPE {PREFIX}_group_cache_entries gauge\n{PREFIX}_group_cache_entries 3' in text
+
+
+def test_app_exports_the_cache_counters(client, small_file):
+    client.get(f'/edit/{small_file}')
+    text = client.get('/metrics').get_data(as_text=True)
+    for name in ('group_cache_hits_total', 'group_cache_misses_total', 'group_cache_entries', 'group_cache_bytes'):
+        assert f'\n{PREFIX}_{name} ' in text
+    assert f'{PREFIX}_requests_total{{route="edit_group",method="GET",status="200"}}' in text
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from src.models import Group, Member, pack_flags, unpack_flags
+
+
+def members(*uuids):
+    return [{'uuid': member_uuid, 'name': member_uuid.upper()} for member_uuid in uuids]
+
+
+def positions(group):
+    """The index :meth:`Group.reindex` builds from scratch: the first position of every UUID."""
+    expected = {}
+    for position, member in enumerate(group.members):
+        expected.setdefault(member['uuid'], position)
+    return expected
+
+
+def test_lookups_follow_inserts_removes_and_moves():
+    group = Group({'name': 'Crew', 'members': members('a', 'b', 'c', 'd')})
+    group.insert(1, members('x')[0])
+    group.remove('c')
+    group.move('a', 3)
+    assert [member['uuid'] for member in group.members] == ['x', 'b', 'd', 'a']
+    assert [group.index_of(member_uuid) for member_uuid in 'xbdac'] == [0, 1, 2, 3, None]
+    assert group.find('d')['name'] == 'D'
+
+
+def test_lookups_before_the_first_change_skip_the_rebuild():
+    group = Group({'name': 'Crew', 'members': members('a', 'b', 'c', 'd')})
+    group.remove('c')
+    assert group.index_of('a') == 0
+    assert group._stale == 2
+    assert group.index_of('d') == 2
+    assert group._stale is None
+
+
+def test_duplicate_uuid_takes_over_when_the_first_is_removed():
+    group = Group({'name': 'Crew', 'members': members('a', 'b', 'a')})
+    assert group.remove('a')['uuid'] == 'a'
+    assert group.index_of('a') == 1
+    group.replace('a', {'uuid': 'z', 'name': 'Z'})
+    assert [member['uuid'] for member in group.members] == ['b', 'z']
+
+
+def test_index_matches_a_full_rebuild_after_random_changes():
+    rng = random.Random(0)
+    group = Group({'name': 'Crew', 'members': members(*(f'm{i}' for i in range(20)))})
+    counter = 20
+    for _ in range(500):
+        uuids = [member['uuid'] for member in group.members]
+        action = rng.choice(('insert', 'remove', 'move', 'replace', 'add', 'find'))
+        if action == 'insert' or not uuids:
+            counter += 1
+            group.insert(rng.randrange(len(uuids) + 1), members(f'm{counter}')[0])
+        elif action == 'remove':
+            group.remove(rng.choice(uuids))
+        elif action == 'move':
+            group.move(rng.choice(uuids), rng.randrange(len(uuids)))
+        elif action == 'replace':
+            counter += 1
+            group.replace(rng.choice(uuids), members(f'm{counter}')[0])
+        elif action == 'add':
+            group.add(members(rng.choice(uuids))[0])
+        else:
+            member_uuid = rng.choice(uuids)
+            assert group.find(member_uuid)['uuid'] == member_uuid
+        if rng.random() < 0.2:
+            assert {member_uuid: group.index_of(member_uuid) for member_uuid in positions(group)} == positions(group)
+    assert {member_uuid: group.index_of(member_uuid) for member_uuid in positions(group)} == positions(group)
+
+
+@pytest.mark.parametrize('flags', [[], [False], [True, False, True], [False] * 40])
+def test_flags_pack_and_unpack(flags):
+    assert unpack_flags(pack_flags(flags)) == flags
+
+
+def test_boolean_tracks_are_packed_and_read_back(sample_group):
+    member = sample_group.members[0]
+    member['currentArmor'] = [True, False, False]
+    member['weaponHits'] = []
+    member['engineHits'] = [1, 0]
+    assert member.currentArmor_bits == pack_flags([True, False, False])
+    assert member.engineHits_bits == ([1, 0],)
+
+    data = member.to_dict()
+    assert data['currentArmor'] == [True, False, False]
+    assert data['weaponHits'] == []
+    assert data['engineHits'] == [1, 0]
+    assert Member(data).to_dict() == data
@@ -0,0 +1,109 @@
+import pytest
+
+from src.patching import (
+    JSON_PATCH,
+    MERGE_PATCH,
+    PatchError,
+    PatchTestFailed,
+    apply_json_patch,
+    apply_merge_patch,
+    apply_patch,
+)
+
+
+@pytest.fixture
+def doc():
+    return {'name': 'Crew', 'tags': ['a', 'b', 'c'], 'meta': {'level': 1}}
+
+
+def test_add_inserts_into_arrays_and_objects(doc):
+    patched = apply_json_patch(
+        doc,
+        [
+            {'op': 'add', 'path': '/tags/1', 'value': 'x'},
+            {'op': 'add', 'path': '/tags/-', 'value': 'z'},
+            {'op': 'add', 'path': '/meta/note', 'value': 'hi'},
+        ],
+    )
+    assert patched['tags'] == ['a', 'x', 'b', 'c', 'z']
+    assert patched['meta'] == {'level': 1, 'note': 'hi'}
+    assert doc == {'name': 'Crew', 'tags': ['a', 'b', 'c'], 'meta': {'level': 1}}
+
+
+def test_remove_and_replace(doc):
+    patched = apply_json_patch(
+        doc,
+        [{'op': 'remove', 'path': '/tags/0'}, {'op': 'replace', 'path': '/name', 'value': 'Band'}],
+    )
+    assert patched['tags'] == ['b', 'c']
+    assert patched['name'] == 'Band'
+
+
+@pytest.mark.parametrize(
+    'operation',
+    [
+        {'op': 'remove', 'path': '/missing'},
+        {'op': 'replace', 'path': '/missing', 'value': 1},
+        {'op': 'remove', 'path': '/tags/3'},
+        {'op': 'add', 'path': '/tags/4', 'value': 'x'},
+    ],
+)
+def test_missing_targets_are_errors(doc, operation):
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [operation])
+
+
+def test_move_within_an_array(doc):
+    patched = apply_json_patch(doc, [{'op': 'move', 'from': '/tags/0', 'path': '/tags/2'}])
+    assert patched['tags'] == ['b', 'c', 'a']
+
+
+def test_move_onto_itself_changes_nothing(doc):
+    patched = apply_json_patch(
+        doc,
+        [{'op': 'move', 'from': '/tags/1', 'path': '/tags/1'}, {'op': 'move', 'from': '/name', 'path': '/name'}],
+    )
+    assert patched == doc
+
+
+def test_move_needs_an_existing_source(doc):
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{'op': 'move', 'from': '/tags/5', 'path': '/tags/5'}])
+
+
+def test_move_into_own_child_is_an_error(doc):
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{'op': 'move', 'from': '/meta', 'path': '/meta/inner'}])
+
+
+def test_copy_is_independent_of_its_source(doc):
+    patched = apply_json_patch(doc, [{'op': 'copy', 'from': '/meta', 'path': '/backup'}])
+    patched['backup']['level'] = 2
+    assert patched['meta'] == {'level': 1}
+
+
+def test_test_op(doc):
+    assert apply_json_patch(doc, [{'op': 'test', 'path': '/meta/level', 'value': 1.0}]) == doc
+    with pytest.raises(PatchTestFailed):
+        apply_json_patch(doc, [{'op': 'test', 'path': '/name', 'value': 'Band'}])
+
+
+def test_failed_patch_applies_nothing(doc):
+    with pytest.raises(PatchTestFailed):
+        apply_json_patch(
+            doc,
+            [{'op': 'replace', 'path': '/name', 'value': 'Band'}, {'op': 'test', 'path': '/name', 'value': 'Crew'}],
+        )
+    assert doc['name'] == 'Crew'
+
+
+def test_merge_patch_sets_removes_and_recurses(doc):
+    patched = apply_merge_patch(doc, {'name': 'Band', 'tags': None, 'meta': {'note': 'hi'}})
+    assert patched == {'name': 'Band', 'meta': {'level': 1, 'note': 'hi'}}
+    assert 'tags' in doc
+
+
+def test_apply_patch_picks_the_format(doc):
+    assert apply_patch(doc, [{'op': 'remove', 'path': '/tags'}], JSON_PATCH) == {'name': 'Crew', 'meta': {'level': 1}}
+    assert apply_patch(doc, {'tags': None}, MERGE_PATCH) == {'name': 'Crew', 'meta': {'level': 1}}
+    assert apply_patch(doc, [{'op': 'remove', 'path': '/tags'}], 'application/json')['name'] == 'Crew'
@@ -0,0 +1,80 @@
+import os
+import threading
+
+import pytest
+
+from src import persistence
+from src.persistence import WriteBehind, write_bytes_atomic
+from src.repository import GroupRepository
+
+
+def test_puts_within_the_delay_make_one_write():
+    written = []
+    done = threading.Event()
+
+    def write(key, value):
+        written.append((key, value))
+        done.set()
+
+    writer = WriteBehind(write, delay=0.05)
+    for value in range(5):
+        writer.put('a', value)
+    assert writer.is_pending('a')
+    assert done.wait(2)
+    assert written == [('a', 4)]
+    assert not writer.is_pending('a')
+
+
+def test_flush_and_discard():
+    written = []
+    writer = WriteBehind(lambda key, value: written.append((key, value)), delay=60)
+    writer.put('a', 1)
+    writer.put('b', 2)
+    assert writer.flush('a')
+    assert not writer.flush('a')
+    writer.discard('b')
+    writer.flush_all()
+    assert written == [('a', 1)]
+
+
+def test_failed_flush_keeps_the_value_pending():
+    writer = WriteBehind(lambda key, value: 1 / 0, delay=60)
+    writer.put('a', 1)
+    with pytest.raises(ZeroDivisionError):
+        writer.flush('a')
+    assert writer.is_pending('a')
+    writer.discard('a')
+
+
+def test_zero_delay_writes_straight_away():
+    written = []
+    WriteBehind(lambda key, value: written.append(value)).put('a', 1)
+    assert written == [1]
+
+
+def test_atomic_write_leaves_the_old_file_when_it_fails(tmp_path, monkeypatch):
+    path = tmp_path / 'a.json'
+    write_bytes_atomic(str(path), b'old')
+
+    def fail(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(persistence.os, 'replace', fail)
+    with pytest.raises(OSError):
+        write_bytes_atomic(str(path), b'new')
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['a.json']
+
+
+def test_deferred_saves_of_a_group_are_written_once(tmp_path):
+    repository = GroupRepository(str(tmp_path), write_delay=60)
+    writes = []
+    repository.add_listener(lambda filename, group, st: writes.append(group['name']))
+    for name in ('One', 'Two', 'Three'):
+        repository.save('a.json', {'name': name, 'members': []}, defer=True)
+    assert not os.path.exists(repository.path('a.json'))
+    assert repository.load('a.json')['name'] == 'Three'
+
+    repository.close()
+    assert writes == ['Three']
+    assert GroupRepository(str(tmp_path)).load('a.json')['name'] == 'Three'
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+
+import pytest
+
+from src import codec
+from src.repository import GroupRepository
+
+
+def group(name='Group'):
+    return {'name': name, 'uuid': 'g', 'members': [{'uuid': 'm1', 'name': 'One'}]}
+
+
+def test_flushed_deferred_save_takes_the_content_hash_etag(tmp_path):
+    repository = GroupRepository(str(tmp_path), write_delay=60)
+    repository.save('a.json', group())
+    repository.save('a.json', group('Changed'), defer=True)
+    pending = repository.version('a.json')[0]
+
+    repository.flush('a.json')
+    etag = repository.version('a.json')[0]
+    # A fresh process reading the same bytes agrees on the ETag
+    assert etag == GroupRepository(str(tmp_path)).version('a.json')[0]
+    assert etag != pending
+    # The client that made the save may still name it by the ETag it was given
+    assert repository.etags('a.json') == (etag, pending)
+
+    repository.save('a.json', group('Again'))
+    assert repository.etags('a.json') == (repository.version('a.json')[0],)
+
+
+def test_same_content_gets_the_same_etag(tmp_path):
+    (tmp_path / 'one').mkdir()
+    (tmp_path / 'two').mkdir()
+    first = GroupRepository(str(tmp_path / 'one'), write_delay=0)
+    second = GroupRepository(str(tmp_path / 'two'), write_delay=0)
+    first.save('a.json', group(), defer=True)
+    second.save('a.json', group(), defer=True)
+    first.flush()
+    second.flush()
+    assert first.version('a.json')[0] == second.version('a.json')[0]
+
+
+def test_load_notices_changes_made_by_others(tmp_path):
+    repository = GroupRepository(str(tmp_path))
+    repository.save('a.json', group())
+    GroupRepository(str(tmp_path)).save('a.json', group('Elsewhere'))
+    assert repository.load('a.json')['name'] == 'Elsewhere'
+
+
+def test_failing_listener_does_not_undo_or_repeat_the_save(tmp_path, caplog):
+    repository = GroupRepository(str(tmp_path), write_delay=0.01)
+    calls = []
+
+    def broken(filename, group, st):
+        calls.append(filename)
+        raise RuntimeError('listener bug')
+
+    repository.add_listener(broken)
+    repository.save('a.json', group(), defer=True)
+    # A failed deferred write is retried every write delay; a written one is not
+    time.sleep(0.3)
+
+    assert calls == ['a.json']
+    assert GroupRepository(str(tmp_path)).load('a.json')['name'] == 'Group'
+    assert 'A write listener failed for a.json' in caplog.text
+
+
+def write_file(folder, filename, name):
+    with open(os.path.join(folder, filename), 'w') as f:
+        json.dump(group(name), f)
+    return os.path.getsize(os.path.join(folder, filename))
+
+
+def test_cache_counts_hits_and_evicts_least_recently_used(tmp_path):
+    size = max(write_file(tmp_path, name, 'Group') for name in ('a.json', 'b.json', 'c.json'))
+    repository = GroupRepository(str(tmp_path), max_bytes=2 * size)
+
+    first = repository.load('a.json')
+    repository.load('b.json')
+    assert repository.load('a.json') is first
+    repository.load('c.json')
+    assert (repository.hits, repository.misses) == (1, 3)
+
+    # b was used least recently, so it made room for c
+    repository.load('a.json')
+    repository.load('c.json')
+    assert (repository.hits, repository.misses) == (3, 3)
+    repository.load('b.json')
+    assert (repository.hits, repository.misses) == (3, 4)
+    assert repository.stats()['entries'] == 2
+    assert repository.stats()['bytes'] <= 2 * size
+
+
+def test_group_larger_than_the_cache_is_not_kept(tmp_path):
+    size = write_file(tmp_path, 'a.json', 'Group')
+    repository = GroupRepository(str(tmp_path), max_bytes=size - 1)
+    assert repository.load('a.json') is not repository.load('a.json')
+    assert repository.stats()['entries'] == 0
+
+
+@pytest.mark.parametrize('storage_format', ['pretty', 'minified', 'gzip'])
+def test_files_are_written_in_the_storage_format_and_read_in_any(tmp_path, storage_format):
+    repository = GroupRepository(str(tmp_path), storage_format=storage_format)
+    repository.save('a.json', group('Alpha'))
+    content = open(repository.path('a.json'), 'rb').read()
+    assert content == codec.encode(group('Alpha'), storage_format)
+
+    # Another format reads the file as it is and writes it back in its own
+    other = GroupRepository(str(tmp_path), storage_format='pretty')
+    assert other.load('a.json').to_dict() == group('Alpha')
+    other.save('a.json', group('Bravo'))
+    assert open(repository.path('a.json'), 'rb').read() == codec.encode(group('Bravo'), 'pretty')
+
+
+def test_unknown_storage_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        GroupRepository(str(tmp_path), storage_format='xml')
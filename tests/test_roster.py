@@ -0,0 +1,57 @@
+import pytest
+
+from src.roster import member_summary, query_members
+
+MEMBERS = [
+    {'uuid': 'a', 'name': 'Atlas', 'class': 'Atlas', 'basePoints': 52, 'pilot': {'name': 'Kai', 'gunnery': 3}},
+    {'uuid': 'b', 'name': 'Locust', 'class': 'Locust', 'basePoints': 18, 'pilot': {'name': 'Natasha', 'gunnery': 2}},
+    {'uuid': 'c', 'name': 'Atlas II', 'class': 'Atlas', 'pilot': {'name': 'Morgan'}},
+    {'uuid': 'd', 'name': 'Wasp', 'class': 'Wasp', 'basePoints': 20},
+    {'uuid': 'e', 'name': 'Commando', 'class': 'Commando', 'basePoints': '23'},
+]
+
+
+def uuids(items):
+    return [member['uuid'] for _, member in items]
+
+
+def test_pages_in_file_order():
+    assert query_members(MEMBERS, page=1, per_page=2) == ([(0, MEMBERS[0]), (1, MEMBERS[1])], 5)
+    assert query_members(MEMBERS, page=3, per_page=2) == ([(4, MEMBERS[4])], 5)
+    assert query_members(MEMBERS, page=4, per_page=2) == ([], 5)
+
+
+@pytest.mark.parametrize('sort', ['position', 'name'])
+def test_descending_pages_match_the_reversed_list(sort):
+    everything = uuids(query_members(MEMBERS, sort=sort, descending=True, per_page=5)[0])
+    pages = [uuids(query_members(MEMBERS, sort=sort, descending=True, page=page, per_page=2)[0]) for page in (1, 2, 3)]
+    assert sum(pages, []) == everything
+    if sort == 'position':
+        assert everything == ['e', 'd', 'c', 'b', 'a']
+
+
+def test_every_word_must_match_some_field():
+    assert uuids(query_members(MEMBERS, 'atlas')[0]) == ['a', 'c']
+    assert uuids(query_members(MEMBERS, 'ATLAS morgan')[0]) == ['c']
+    assert query_members(MEMBERS, 'atlas natasha') == ([], 0)
+
+
+def test_numeric_sort_puts_members_without_a_value_last():
+    assert uuids(query_members(MEMBERS, sort='pv')[0]) == ['b', 'd', 'e', 'a', 'c']
+    assert uuids(query_members(MEMBERS, sort='pv', descending=True)[0]) == ['a', 'e', 'd', 'b', 'c']
+    assert uuids(query_members(MEMBERS, sort='gunnery')[0]) == ['b', 'a', 'c', 'd', 'e']
+
+
+def test_positions_refer_to_the_file_order():
+    assert [position for position, _ in query_members(MEMBERS, 'atlas', sort='name', descending=True)[0]] == [2, 0]
+
+
+def test_unknown_sort_is_rejected():
+    with pytest.raises(ValueError):
+        query_members(MEMBERS, sort='colour')
+
+
+def test_summary_fields():
+    summary = member_summary(MEMBERS[0])
+    assert summary['pv'] == 52
+    assert summary['pilot'] == {'name': 'Kai', 'gunnery': 3, 'piloting': None}
@@ -0,0 +1,41 @@
+import pytest
+
+from src.search import SearchError, SearchIndex, parse_query
+
+
+@pytest.mark.parametrize(
+    ('query', 'terms'),
+    [
+        ('atlas', [('text', None, ':', 'atlas')]),
+        ('class:atlas pv>=40', [('text', 'class', ':', 'atlas'), ('number', 'pv', '>=', 40.0)]),
+        ('Pilot:"Commander Smith"', [('text', 'pilot', ':', 'Commander Smith')]),
+        ('gunnery:3 skill!=4', [('number', 'gunnery', '=', 3.0), ('number', 'skill', '!=', 4.0)]),
+        ('group.pv<200 group:lance', [('group', 'group.pv', '<', 200.0), ('group', 'group', ':', 'lance')]),
+        ('atl*', [('text', None, ':', 'atl*')]),
+        ('', []),
+    ],
+)
+def test_parse_query(query, terms):
+    assert parse_query(query) == terms
+
+
+def test_unbalanced_quote_falls_back_to_spaces():
+    assert parse_query('name:"Red leader') == [('text', 'name', ':', '"Red'), ('text', None, ':', 'leader')]
+
+
+@pytest.mark.parametrize('query', ['pv>=heavy', 'colour:red', 'name<3', 'group.pv:many'])
+def test_bad_queries(query):
+    with pytest.raises(SearchError):
+        parse_query(query)
+
+
+def test_search_finds_members_by_text_and_number(tmp_path, sample_group):
+    index = SearchIndex(str(tmp_path))
+    index.update('lance.json', sample_group)
+
+    for query in ('atlas', 'class:atl*', 'pilot:smith pv>90', 'juggernaut tonnage=100'):
+        results, total = index.search(query)
+        assert total == 1, query
+        assert results[0]['filename'] == 'lance.json'
+    assert index.search('pv<90') == ([], 0)
+    assert index.search('locust') == ([], 0)
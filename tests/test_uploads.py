@@ -0,0 +1,99 @@
+import io
+import json
+import os
+
+import pytest
+
+from src.uploads import UploadTooLarge, save_stream, validate_group_file
+
+
+@pytest.fixture
+def group_file(tmp_path, sample_group):
+    """Write the sample group with the given member changes and return its path."""
+
+    def write(*changes, **fields):
+        data = sample_group.to_dict() | fields
+        member = data['members'][0]
+        data['members'] = [member | change for change in changes] or data['members']
+        path = tmp_path / 'group.json'
+        path.write_text(json.dumps(data))
+        return str(path)
+
+    return write
+
+
+def test_valid_file(group_file, validator):
+    report = validate_group_file(group_file({}, {'name': 'Second'}), validator)
+    assert report.ok
+    assert report.member_count == 2
+    assert report.members == []
+
+
+def test_errors_are_reported_per_member(group_file, validator):
+    report = validate_group_file(
+        group_file({}, {'name': 'Heavy', 'tonnage': 'heavy'}, {'name': 'Light', 'size': 'S'}, groupLabel=5), validator
+    )
+    assert not report.ok
+    assert report.member_count == 3
+    assert [(member['index'], member['name']) for member in report.members] == [(1, 'Heavy'), (2, 'Light')]
+    assert 'members[1].tonnage' in report.members[0]['errors'][0]
+    assert len(report.errors) == 1
+    assert report.error_count == 3
+
+
+def test_checking_stops_at_the_error_limit(group_file, validator):
+    report = validate_group_file(group_file(*[{'tonnage': 'heavy'}] * 10), validator, max_errors=3)
+    assert report.truncated
+    assert report.member_count == 3
+
+
+@pytest.mark.parametrize('content', ['[]', '"group"', ''])
+def test_top_level_must_be_an_object(tmp_path, validator, content):
+    path = tmp_path / 'group.json'
+    path.write_text(content)
+    report = validate_group_file(str(path), validator)
+    assert not report.ok
+    assert report.errors == ['expected a JSON object at the top level']
+
+
+def test_malformed_json_raises(tmp_path, validator):
+    path = tmp_path / 'group.json'
+    path.write_text('{"name": "Crew", "members": [{"name": ')
+    with pytest.raises(ValueError):
+        validate_group_file(str(path), validator)
+
+
+def test_save_stream_stops_at_the_limit(tmp_path):
+    path = save_stream(io.BytesIO(b'x' * 100), str(tmp_path), max_bytes=100, chunk_size=7)
+    assert open(path, 'rb').read() == b'x' * 100
+
+    with pytest.raises(UploadTooLarge):
+        save_stream(io.BytesIO(b'x' * 101), str(tmp_path), max_bytes=100, chunk_size=7)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_upload_route_rejects_invalid_and_oversized_files(app_module, client, small_file):
+    data = app_module.repository.load(small_file).to_dict()
+    data['members'][0]['tonnage'] = 'heavy'
+    response = client.post(
+        '/upload',
+        data={'file': (io.BytesIO(json.dumps(data).encode()), 'bad-upload.json')},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 422
+    assert b'members[0].tonnage' in response.data
+    assert not app_module.repository.exists('bad-upload.json')
+
+    limit = app_module.app.config['MAX_UPLOAD_BYTES']
+    app_module.app.config['MAX_UPLOAD_BYTES'] = 10
+    try:
+        response = client.post(
+            '/upload',
+            data={'file': (io.BytesIO(b'{"name": "Too big"}'), 'big-upload.json')},
+            content_type='multipart/form-data',
+            follow_redirects=True,
+        )
+    finally:
+        app_module.app.config['MAX_UPLOAD_BYTES'] = limit
+    assert b'Upload is larger than 10 bytes' in response.data
+    assert not app_module.repository.exists('big-upload.json')